@@ -0,0 +1,197 @@
+import json
+import struct
+import numpy as np
+
+# Binary glTF writer for VAT meshes
+# Only needs NumPy, the meshes are handed over as arrays so the writer never touches the scene
+
+GLBMagic = 0x46546C67
+GLBVersion = 2
+JSONChunkType = 0x4E4F534A
+BINChunkType = 0x004E4942
+ArrayBufferTarget = 34962
+ElementArrayBufferTarget = 34963
+ComponentTypes = {
+    np.dtype(np.int8) : 5120,
+    np.dtype(np.uint8) : 5121,
+    np.dtype(np.int16) : 5122,
+    np.dtype(np.uint16) : 5123,
+    np.dtype(np.uint32) : 5125,
+    np.dtype(np.float32) : 5126
+}
+AccessorTypes = {1 : "SCALAR", 2 : "VEC2", 3 : "VEC3", 4 : "VEC4"}
+
+# Blender is Z up, glTF is Y up with -Z as forward: (X, Y, Z) becomes (X, Z, -Y)
+AxisConversion = np.array([
+    [1.0, 0.0, 0.0, 0.0],
+    [0.0, 0.0, 1.0, 0.0],
+    [0.0, -1.0, 0.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0]
+])
+
+# A triangle mesh as plain vertex arrays, in the coordinate system of Blender
+class GLBMesh:
+    def __init__(self, Name : str, Matrix : np.ndarray, Positions : np.ndarray, Normals : np.ndarray, UVChannels : list[np.ndarray], Indices : np.ndarray):
+        self.Name = Name
+        self.Matrix = np.asarray(Matrix, dtype = np.float64)
+        self.Positions = Positions
+        self.Normals = Normals
+        self.UVChannels = UVChannels
+        self.Indices = Indices
+
+    # Build a mesh from per loop (face corner) data, loops that share their vertex, normal and UVs become one vertex
+    @classmethod
+    def FromLoops(cls, Name : str, Matrix : np.ndarray, Positions : np.ndarray, LoopVertices : np.ndarray, LoopNormals : np.ndarray, LoopUVChannels : list[np.ndarray], TriangleLoops : np.ndarray):
+        LoopCount = len(LoopVertices)
+        LoopAttributes = [np.ascontiguousarray(LoopVertices, dtype = np.int32).reshape(LoopCount, -1)]
+        LoopAttributes.append(np.ascontiguousarray(LoopNormals, dtype = np.float32).reshape(LoopCount, -1))
+        LoopAttributes += [np.ascontiguousarray(LoopUVs, dtype = np.float32).reshape(LoopCount, -1) for LoopUVs in LoopUVChannels]
+        LoopKeys = np.concatenate([Attribute.view(np.uint8).reshape(LoopCount, -1) for Attribute in LoopAttributes], axis = 1)
+        LoopKeys = np.ascontiguousarray(LoopKeys).view(np.dtype((np.void, LoopKeys.shape[1]))).ravel()
+        _, FirstLoops, LoopVertexIndices = np.unique(LoopKeys, return_index = True, return_inverse = True)
+
+        return cls(
+            Name,
+            Matrix,
+            np.asarray(Positions, dtype = np.float32).reshape(-1, 3)[LoopAttributes[0][FirstLoops, 0]],
+            LoopAttributes[1][FirstLoops],
+            [LoopUVs[FirstLoops] for LoopUVs in LoopAttributes[2:]],
+            LoopVertexIndices.ravel()[np.asarray(TriangleLoops).ravel()]
+        )
+
+# Collects the JSON description and the binary buffer of a GLB file
+class GLBBuilder:
+    def __init__(self):
+        self.Document = {
+            "asset" : {"version" : "2.0", "generator" : "VAT exporter"},
+            "scene" : 0,
+            "scenes" : [{"nodes" : []}],
+            "nodes" : [],
+            "meshes" : [],
+            "accessors" : [],
+            "bufferViews" : [],
+            "buffers" : []
+        }
+        self.Blocks = []
+        self.ByteLength = 0
+
+    # Add an array as a buffer view with a single accessor, the rows of the array are the elements
+    # ComponentCount can be lower than the row size to skip the padding that keeps vertex attributes 4 byte aligned
+    def AddAccessor(self, Array : np.ndarray, ComponentCount : int, Target : int, bNormalized : bool = False, bBounds : bool = False) -> int:
+        Array = np.ascontiguousarray(Array)
+        Rows = Array.reshape(len(Array), -1)
+        BufferView = {"buffer" : 0, "byteOffset" : self.ByteLength, "byteLength" : Array.nbytes, "target" : Target}
+        if(Target == ArrayBufferTarget and Rows.shape[1] != ComponentCount):
+            BufferView["byteStride"] = Rows.shape[1] * Array.itemsize
+        self.Blocks.append(Array.tobytes())
+        self.ByteLength += Array.nbytes
+        Padding = -self.ByteLength % 4
+        if(Padding > 0):
+            self.Blocks.append(bytes(Padding))
+            self.ByteLength += Padding
+        self.Document["bufferViews"].append(BufferView)
+
+        Accessor = {
+            "bufferView" : len(self.Document["bufferViews"]) - 1,
+            "componentType" : ComponentTypes[Array.dtype],
+            "count" : len(Array),
+            "type" : AccessorTypes[ComponentCount]
+        }
+        if(bNormalized):
+            Accessor["normalized"] = True
+        if(bBounds and len(Array) > 0):
+            Accessor["min"] = Rows[:, :ComponentCount].min(axis = 0).tolist()
+            Accessor["max"] = Rows[:, :ComponentCount].max(axis = 0).tolist()
+        self.Document["accessors"].append(Accessor)
+        return len(self.Document["accessors"]) - 1
+
+    # Add a node to the document, root nodes are added to the scene
+    def AddNode(self, Node : dict, bRoot : bool = False) -> int:
+        self.Document["nodes"].append(Node)
+        NodeIndex = len(self.Document["nodes"]) - 1
+        if(bRoot):
+            self.Document["scenes"][0]["nodes"].append(NodeIndex)
+        return NodeIndex
+
+    # Write the header, the JSON chunk and the binary chunk
+    def Write(self, FilePath : str):
+        self.Document["buffers"].append({"byteLength" : self.ByteLength})
+        if(self.ByteLength == 0):
+            del self.Document["buffers"]
+        for Key in ["meshes", "accessors", "bufferViews"]:
+            if(len(self.Document[Key]) == 0):
+                del self.Document[Key]
+        JSONChunk = json.dumps(self.Document, separators = (",", ":")).encode("utf-8")
+        JSONChunk += b" " * (-len(JSONChunk) % 4)
+        FileLength = 12 + 8 + len(JSONChunk)
+        if(self.ByteLength > 0):
+            FileLength += 8 + self.ByteLength
+
+        with open(FilePath, "wb") as File:
+            File.write(struct.pack("<III", GLBMagic, GLBVersion, FileLength))
+            File.write(struct.pack("<II", len(JSONChunk), JSONChunkType))
+            File.write(JSONChunk)
+            if(self.ByteLength > 0):
+                File.write(struct.pack("<II", self.ByteLength, BINChunkType))
+                for Block in self.Blocks:
+                    File.write(Block)
+
+# Pad (N, C) rows with zeros to (N, Width)
+def PadRows(Array : np.ndarray, Width : int) -> np.ndarray:
+    Padded = np.zeros((len(Array), Width), dtype = Array.dtype)
+    Padded[:, :Array.shape[1]] = Array
+    return Padded
+
+# Quantize UVs to normalized unsigned shorts when they are all within the 0-1 range, otherwise keep them as floats
+def QuantizeUVs(UVs : np.ndarray):
+    if(len(UVs) > 0 and (UVs.min() < 0.0 or UVs.max() > 1.0)):
+        return UVs, False
+    return np.round(UVs * 65535.0).astype(np.uint16), True
+
+# Write the meshes to a GLB file
+# With quantization, normals are stored as normalized bytes and UVs within the 0-1 range as normalized unsigned shorts, using KHR_mesh_quantization
+# Positions always stay floats, so the mesh keeps its object space (in Blender units) that the VAT offsets are decoded in
+def WriteGLB(FilePath : str, Meshes : list[GLBMesh], bQuantize : bool = False):
+    Builder = GLBBuilder()
+    InverseAxisConversion = AxisConversion.T
+    for Mesh in Meshes:
+        Positions = np.asarray(Mesh.Positions, dtype = np.float32).reshape(-1, 3) @ AxisConversion[:3, :3].T.astype(np.float32)
+        Normals = np.asarray(Mesh.Normals, dtype = np.float32).reshape(-1, 3) @ AxisConversion[:3, :3].T.astype(np.float32)
+        Attributes = dict()
+
+        # Positions and normals
+        Attributes["POSITION"] = Builder.AddAccessor(Positions, 3, ArrayBufferTarget, bBounds = True)
+        if(bQuantize):
+            Lengths = np.maximum(np.linalg.norm(Normals, axis = 1, keepdims = True), 1e-8)
+            QuantizedNormals = np.round(Normals / Lengths * 127.0).astype(np.int8)
+            Attributes["NORMAL"] = Builder.AddAccessor(PadRows(QuantizedNormals, 4), 3, ArrayBufferTarget, bNormalized = True)
+        else:
+            Attributes["NORMAL"] = Builder.AddAccessor(Normals, 3, ArrayBufferTarget)
+
+        # UVs, glTF has its V axis pointing down
+        for i, UVs in enumerate(Mesh.UVChannels):
+            UVs = np.asarray(UVs, dtype = np.float32).reshape(-1, 2).copy()
+            UVs[:, 1] = 1.0 - UVs[:, 1]
+            bNormalized = False
+            if(bQuantize):
+                UVs, bNormalized = QuantizeUVs(UVs)
+            Attributes[f"TEXCOORD_{i}"] = Builder.AddAccessor(UVs, 2, ArrayBufferTarget, bNormalized = bNormalized)
+
+        # Triangles
+        Indices = np.asarray(Mesh.Indices).ravel()
+        IndexType = np.uint16 if len(Positions) <= 65535 else np.uint32
+        IndexAccessor = Builder.AddAccessor(Indices.astype(IndexType), 1, ElementArrayBufferTarget)
+        Builder.Document["meshes"].append({"name" : Mesh.Name, "primitives" : [{"attributes" : Attributes, "indices" : IndexAccessor, "mode" : 4}]})
+        MeshIndex = len(Builder.Document["meshes"]) - 1
+
+        # The object transform is converted to the glTF axes
+        Matrix = AxisConversion @ Mesh.Matrix @ InverseAxisConversion
+        Node = {"name" : Mesh.Name, "mesh" : MeshIndex}
+        if(not np.allclose(Matrix, np.identity(4))):
+            Node["matrix"] = Matrix.T.ravel().tolist()
+        Builder.AddNode(Node, True)
+
+    if(bQuantize):
+        Builder.Document["extensionsUsed"] = ["KHR_mesh_quantization"]
+        Builder.Document["extensionsRequired"] = ["KHR_mesh_quantization"]
+    Builder.Write(FilePath)
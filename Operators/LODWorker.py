@@ -0,0 +1,41 @@
+# Script for the background Blender processes that export a single LOD, see ExportLODsInWorkers
+# Usage: blender --background --factory-startup --python LODWorker.py -- <job file>
+
+import bpy
+import sys
+import json
+import time
+import importlib
+
+# Load the base VAT meshes, decimate them and write the LOD with the add-on's own mesh writers
+def RunJob(JobFile : str):
+    with open(JobFile) as File:
+        Job = json.load(File)
+    sys.path.insert(0, Job["AddonParent"])
+    VATFunctions = importlib.import_module(Job["AddonPackage"] + ".Operators.VATFunctions")
+
+    # Link the base meshes into the (empty) scene, in the order of the export
+    bpy.ops.object.select_all(action = "DESELECT")
+    with bpy.data.libraries.load(Job["BlendFile"]) as (DataFrom, DataTo):
+        DataTo.objects = [Name for Name in Job["ObjectNames"] if Name in DataFrom.objects]
+    Objects = [Object for Object in DataTo.objects if Object is not None]
+    for Object in Objects:
+        bpy.context.collection.objects.link(Object)
+
+    # Decimate & export
+    ExportStart = time.perf_counter()
+    for DecimateModifier in VATFunctions.AddDecimateModifiers(Objects):
+        DecimateModifier.angle_limit = Job["AngleLimit"]
+    FilePath = VATFunctions.WriteMeshFile(Objects, Job["FilePath"], Job["MeshFileFormat"], Job["QuantizeMeshFile"])
+    ExportTime = time.perf_counter() - ExportStart
+
+    # Report back to the add-on
+    with open(Job["ResultFile"], "w") as File:
+        json.dump({
+            "FilePath" : FilePath,
+            "TriangleCount" : VATFunctions.GetTriangleCount(Objects, bpy.context.evaluated_depsgraph_get()),
+            "ExportTime" : ExportTime
+        }, File)
+
+if __name__ == "__main__":
+    RunJob(sys.argv[sys.argv.index("--") + 1])
@@ -0,0 +1,353 @@
+import bpy
+import time
+from bpy.types import Operator
+from bpy.utils import register_class, unregister_class
+from math import ceil
+import numpy as np
+from . import RenderSoftBody, RenderRigidBody, RenderDynamic
+from .VATFunctions import (
+    FilterSelection,
+    GetEvaluationFrame,
+    GetEvaluatedMesh,
+    GetVertexArrays,
+    GetPixelDataType,
+    GetFrameSpacing,
+    GetNormalEncoding,
+    GetNormalChannelCount,
+    GetPositionTextureFormat,
+    GetQuantizationMode,
+    FrameSampler,
+    GetLoopVertexIndices,
+    ChunkTexelCount
+)
+
+# Number of frames that are fully captured to estimate the capture time
+PlanSampleFrameCount = 3
+
+# Predict the texture sizes, peak memory, file sizes and capture time of an export without running it
+# Only the topology of the sampled frames is scanned, so this is a lot faster than the export itself
+# Returns a dict with the plan, see GetPlanReport for a readable version
+def PlanExport() -> dict:
+    context = bpy.context
+    properties = context.scene.VATExporter_RegularProperties
+    StartSelection = context.selected_objects
+    SelectedObjects = FilterSelection(StartSelection)
+    CurrentFrame = context.scene.frame_current
+
+    FrameStart = context.scene.frame_start
+    FrameEnd = context.scene.frame_end
+    FrameSpacing = GetFrameSpacing() if properties.VATType != "FLUID" else properties.FrameSpacing
+    FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
+
+    Plan = dict()
+    Plan["Type"] = properties.VATType
+    Plan["FrameCount"] = FrameCount
+    Plan["ElementCount"] = 0
+    Plan["Textures"] = dict()
+    Plan["PeakMemory"] = 0
+    Plan["EstimatedCaptureTime"] = 0.0
+    Plan["Errors"] = []
+    if(len(SelectedObjects) < 1):
+        Plan["Errors"].append("No valid meshes selected")
+        return Plan
+
+    # Scan the selected objects for the chosen VAT type, and put the scene back on its frame even if the scan fails halfway
+    Sampler = FrameSampler()
+    try:
+        if(properties.VATType == "SOFTBODY"):
+            Textures, Memory, CaptureTime = PlanSoftBody(SelectedObjects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler, Plan)
+        elif(properties.VATType == "RIGIDBODY"):
+            Textures, Memory, CaptureTime = PlanRigidBody(SelectedObjects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler, Plan)
+        else:
+            Textures, Memory, CaptureTime = PlanDynamic(SelectedObjects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler, Plan)
+    finally:
+        context.scene.frame_set(CurrentFrame)
+
+    # Every written texture is converted to a Blender image
+    # A texture entry is (Dimensions, Format) or (Dimensions, Format, ChannelCount) for files with less than 4 channels
+    LargestTexture = 0
+    for TextureName, (Dimensions, Format, *Channels) in Textures.items():
+        TexelCount = Dimensions[0] * Dimensions[1]
+        ChannelCount = Channels[0] if len(Channels) > 0 else 4
+        Plan["Textures"][TextureName] = {
+            "Dimensions" : Dimensions,
+            "Format" : Format,
+            "FileSizes" : {BitDepth : TexelCount * ChannelCount * int(BitDepth) // 8 for BitDepth in ("16", "32")}
+        }
+        LargestTexture = max(LargestTexture, TexelCount * 4 * 4)
+
+    # The pixel buffers and the frame stacks come from CreateStagingBuffer: streaming maps them to files on disk,
+    # and then only a few chunks of them and the arrays that always stay in memory count
+    # All buffers are counted as if they are alive at the same time, so the prediction is an upper bound
+    if(properties.StreamTextures):
+        Plan["PeakMemory"] = Memory["InMemory"] + ChunkTexelCount * 4 * 4 * 2
+    else:
+        Plan["PeakMemory"] = Memory["PixelBuffers"] + Memory["Stacks"] + Memory["InMemory"] + LargestTexture * 2
+    Plan["EstimatedCaptureTime"] = CaptureTime
+    return Plan
+
+# Soft body: the vertex count must be the same for every frame
+def PlanSoftBody(Objects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler : FrameSampler, Plan : dict):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    EdgeSplitModifiers, VertexCount, ObjectVertexCounts = RenderSoftBody.PrepareSelectedObjects(Objects, GetEvaluationFrame(), Sampler)[:3]
+    Plan["ElementCount"] = VertexCount
+
+    # The edge split modifiers are removed again, even if the scan fails
+    try:
+        # Topology scan, only the vertex counts of the evaluated objects are read
+        # The skipped frames are stepped through like the export does, so the simulation is in the same state
+        ScanStart = time.perf_counter()
+        for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameEnd, FrameSpacing):
+            for i, Object in enumerate(Objects):
+                ObjectVertexCount = len(Object.evaluated_get(DependencyGraph).data.vertices)
+                if(ObjectVertexCount != ObjectVertexCounts[i]):
+                    Plan["Errors"].append(f"{Object.name} has {ObjectVertexCount} vertices at frame {Frame} instead of {ObjectVertexCounts[i]}")
+        FrameEvaluationTime = (time.perf_counter() - ScanStart) / (FrameEnd - FrameStart + 1)
+
+        # Timed sample of the full capture, without the frame evaluations that were already measured
+        SampleStart = time.perf_counter()
+        SampleCount = min(PlanSampleFrameCount, FrameCount)
+        SampleEvaluationCount = (SampleCount - 1) * FrameSpacing + 1
+        for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameStart + (SampleCount - 1) * FrameSpacing, FrameSpacing):
+            for Object in Objects:
+                CompareMesh = GetEvaluatedMesh(Object, DependencyGraph)
+                GetVertexArrays(CompareMesh)
+                bpy.data.meshes.remove(CompareMesh)
+        CaptureTime = max((time.perf_counter() - SampleStart - SampleEvaluationCount * FrameEvaluationTime) / SampleCount, 0.0)
+    finally:
+        RenderSoftBody.RemoveEdgeSplit(Objects, EdgeSplitModifiers)
+
+    # The buffers of the export, under the same conditions as RenderSoftbodyVAT
+    Memory = {"PixelBuffers" : 0, "Stacks" : 0, "InMemory" : 0}
+    bIsCompressed = properties.SoftBodyCompression == "PCA"
+    if(properties.FrameSampling == "ADAPTIVE" or bIsCompressed or properties.CompactStaticElements):
+        Memory["Stacks"] += FrameCount * VertexCount * 3 * 4 * 2
+
+    # Adaptive sampling and static vertices can only shorten the textures, so the plan shows the uniform size
+    # Eigen shapes store the mean shape and at most MaxEigenShapeCount basis shapes instead of the frames
+    TextureFrameCount = FrameCount
+    if(bIsCompressed):
+        ShapeCount = min(properties.MaxEigenShapeCount, FrameCount)
+        TextureFrameCount = ShapeCount + 1
+        Memory["Stacks"] += FrameCount * VertexCount * 3 * 4
+        Memory["InMemory"] += (ShapeCount * 3 + 2) * VertexCount * 3 * 4
+    TextureDimensions = RenderSoftBody.GetTextureDimensions(VertexCount, TextureFrameCount)
+    Memory["PixelBuffers"] += GetPixelBufferBytes(TextureDimensions, GetPositionTextureFormat())
+    if(GetNormalEncoding() != "PACKED"):
+        Memory["PixelBuffers"] += GetPixelBufferBytes(TextureDimensions, properties.FileRotationTextureFormat)
+
+    Textures = dict()
+    if(properties.FilePositionTextureEnabled):
+        Textures["Position"] = (TextureDimensions, GetPositionTextureFormat())
+    if(properties.FileRotationTextureEnabled and GetNormalEncoding() != "PACKED"):
+        Textures["Rotation"] = (TextureDimensions, properties.FileRotationTextureFormat, GetNormalChannelCount())
+    if(properties.FrameSampling == "ADAPTIVE" and properties.FileFrameTimeTextureEnabled):
+        Textures["Frame time"] = ((FrameCount, 1), "32")
+    if(bIsCompressed and properties.FileWeightTextureEnabled):
+        Textures["Weight"] = ((RenderSoftBody.GetWeightTextureWidth(ShapeCount), FrameCount), "32")
+    if(GetQuantizationMode() != "GLOBAL"):
+        Memory["InMemory"] += VertexCount * 3 * 4 * 2
+        if(properties.FileBoundsTextureEnabled):
+            ClusterCount = GetPlannedClusterCount(VertexCount, len(Objects), TextureDimensions[1] // TextureFrameCount)
+            Textures["Bounds"] = (RenderSoftBody.GetTextureDimensions(ClusterCount, 2), "32")
+
+    return Textures, Memory, GetCaptureTime(FrameStart, FrameEnd, FrameEvaluationTime, CaptureTime, FrameCount)
+
+# Rigid body: every object gets a column, the start scale can't be zero
+def PlanRigidBody(Objects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler : FrameSampler, Plan : dict):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    ObjectCount = len(Objects)
+    Plan["ElementCount"] = ObjectCount
+    DependencyGraph = Sampler.SetFrame(GetEvaluationFrame())
+    for Object in Objects:
+        if(min(abs(Axis) for Axis in Object.evaluated_get(DependencyGraph).matrix_world.to_scale()) == 0.0):
+            Plan["Errors"].append(f"{Object.name} has a scale of zero at the rest pose frame")
+
+    # Timed sample, the capture only reads the transforms so the frame evaluations (including the skipped frames) are most of the cost
+    SampleStart = time.perf_counter()
+    SampleCount = min(PlanSampleFrameCount, FrameCount)
+    SampleEvaluationCount = (SampleCount - 1) * FrameSpacing + 1
+    for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameStart + (SampleCount - 1) * FrameSpacing, FrameSpacing):
+        for Object in Objects:
+            Object.evaluated_get(DependencyGraph).matrix_world.decompose()
+    FrameTime = (time.perf_counter() - SampleStart) / SampleEvaluationCount
+
+    # The buffers of the export, under the same conditions as RenderRigidBody
+    # Every frame the (N, 4, 4) world matrices of all pieces are in memory, objects on the F-curve fast path get all their frames up front
+    Memory = {"PixelBuffers" : 0, "Stacks" : 0, "InMemory" : ObjectCount * 4 * 4 * 8}
+    if(properties.FrameSampling == "ADAPTIVE" or properties.CompactStaticElements):
+        Memory["Stacks"] += FrameCount * ObjectCount * (3 + 4 + 3) * 4
+    if(properties.FileAABBTextureEnabled):
+        Memory["Stacks"] += FrameCount * ObjectCount * 6 * 4
+    if(properties.UseFCurveFastPath):
+        FastObjectCount = sum(1 for Object in Objects if RenderRigidBody.CanEvaluateFCurves(Object))
+        Memory["Stacks"] += FrameCount * FastObjectCount * RenderRigidBody.FCurveChannelCount * 4
+
+    # Adaptive sampling and static pieces can only shorten the textures, so the plan shows the uniform size
+    # The position, rotation and scale buffers are always created, even for textures that are not written
+    TextureDimensions = RenderRigidBody.GetTextureDimensions(ObjectCount, FrameCount)
+    Memory["PixelBuffers"] += GetPixelBufferBytes(TextureDimensions, properties.FilePositionTextureFormat)
+    Memory["PixelBuffers"] += GetPixelBufferBytes(TextureDimensions, properties.FileRotationTextureFormat)
+    Memory["PixelBuffers"] += GetPixelBufferBytes(TextureDimensions, properties.FileScaleTextureFormat)
+
+    Textures = dict()
+    if(properties.FilePositionTextureEnabled):
+        Textures["Position"] = (TextureDimensions, properties.FilePositionTextureFormat)
+    if(properties.FileRotationTextureEnabled):
+        Textures["Rotation"] = (TextureDimensions, properties.FileRotationTextureFormat)
+    if(properties.FileScaleTextureEnabled and (not properties.FileSingleChannelScaleEnabled)):
+        Textures["Scale"] = (TextureDimensions, properties.FileScaleTextureFormat)
+    if(properties.FrameSampling == "ADAPTIVE" and properties.FileFrameTimeTextureEnabled):
+        Textures["Frame time"] = ((FrameCount, 1), "32")
+    if(GetQuantizationMode() != "GLOBAL"):
+        Memory["InMemory"] += ObjectCount * 3 * 4 * 2
+        if(properties.FileBoundsTextureEnabled):
+            ClusterCount = GetPlannedClusterCount(ObjectCount, ObjectCount, TextureDimensions[1] // FrameCount)
+            Textures["Bounds"] = (RenderRigidBody.GetTextureDimensions(ClusterCount, 2), "32")
+    if(properties.FileAABBTextureEnabled):
+        AABBDimensions = (TextureDimensions[0], TextureDimensions[1] * 2)
+        Memory["PixelBuffers"] += GetPixelBufferBytes(AABBDimensions, "32")
+        Textures["AABB"] = (AABBDimensions, "32")
+
+    return Textures, Memory, GetCaptureTime(FrameStart, FrameEnd, FrameTime, 0.0, FrameCount)
+
+# Fluid: the vertex count may change every frame, so every sampled frame is scanned, but only the vertex and polygon counts are read
+def PlanDynamic(Objects, FrameStart, FrameEnd, FrameSpacing, FrameCount, Sampler : FrameSampler, Plan : dict):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    Modifiers = RenderDynamic.PrepareSelectedObjects(Objects)
+
+    # The triangulate and edge split modifiers are removed again, even if the scan fails
+    try:
+        ScanStart = time.perf_counter()
+        VertexCounts, FaceCounts, MeshSources = RenderDynamic.ScanTopology(Objects, FrameStart, FrameEnd, FrameSpacing, Sampler)
+        ScanTime = time.perf_counter() - ScanStart
+        VertexCount = int(VertexCounts.sum())
+        FrameFaceCounts = FaceCounts.sum(axis = 1)
+        RestFrameIndex = int(np.argmax(FrameFaceCounts)) if FrameCount > 0 else 0
+        RowCount, DataTextureSize = RenderDynamic.GetDataTextureSize(int(FrameFaceCounts.max(initial = 0)), FrameCount)
+
+        # Time the array capture of the rest pose frame, the export does this for every sampled frame on top of the scan
+        CaptureStart = time.perf_counter()
+        if(MeshSources is not None):
+            for MeshSource in MeshSources:
+                MeshSource.Read(FrameStart + RestFrameIndex * FrameSpacing)
+        else:
+            DependencyGraph = bpy.context.evaluated_depsgraph_get()
+            for Object in Objects:
+                CompareMesh = Object.evaluated_get(DependencyGraph).data
+                GetVertexArrays(CompareMesh)
+                GetLoopVertexIndices(CompareMesh)
+        CaptureTime = time.perf_counter() - CaptureStart
+    finally:
+        for i, Object in enumerate(Objects):
+            Object.modifiers.remove(Modifiers[i * 2])
+            Object.modifiers.remove(Modifiers[i * 2 + 1])
+
+    PageLayout = None
+    if(properties.PagedTransformTexture and VertexCount > 0):
+        PageLayout = RenderDynamic.TransformPageLayout(VertexCounts.sum(axis = 1), properties.ExportResolutionU, properties.TransformPageHeight)
+    RowLayout = None
+    if(properties.VariableFrameRows and VertexCount > 0):
+        RowLayout = RenderDynamic.FrameRowLayout(RenderDynamic.GetFrameElementCounts(FaceCounts, RestFrameIndex), DataTextureSize[0])
+        DataTextureSize = (RowLayout.Width, RowLayout.Height)
+    Plan["ElementCount"] = VertexCount
+    if(VertexCount == 0):
+        Plan["Errors"].append("The selected objects have no vertices in the frame range")
+
+    # The buffers of the export, under the same conditions as RenderDynamic
+    # The frame cache is always memory-mapped, so it takes disk space instead of memory
+    Memory = {"PixelBuffers" : 0, "Stacks" : 0, "InMemory" : 0}
+    Textures = dict()
+    if(PageLayout is not None):
+        TransformTextureSize = (PageLayout.Width, PageLayout.Height)
+        for Page in range(PageLayout.PageCount):
+            if(properties.FilePositionTextureEnabled):
+                Textures[f"Position page {Page}"] = ((PageLayout.Width, PageLayout.PageHeight), GetPositionTextureFormat())
+            if(properties.FileRotationTextureEnabled and GetNormalEncoding() != "PACKED"):
+                Textures[f"Rotation page {Page}"] = ((PageLayout.Width, PageLayout.PageHeight), properties.FileRotationTextureFormat, GetNormalChannelCount())
+        if(properties.FilePageTableTextureEnabled):
+            Textures["Page table"] = ((FrameCount, 1), "32")
+    else:
+        TransformTextureSize = RenderDynamic.GetTextureDimensions(VertexCount + 1)
+        if(properties.FilePositionTextureEnabled):
+            Textures["Position"] = (TransformTextureSize, GetPositionTextureFormat())
+        if(properties.FileRotationTextureEnabled and GetNormalEncoding() != "PACKED"):
+            Textures["Rotation"] = (TransformTextureSize, properties.FileRotationTextureFormat, GetNormalChannelCount())
+    if(properties.FileDataTextureEnabled):
+        Textures["Data"] = (DataTextureSize, "16")
+    if(RowLayout is not None and properties.FileFrameRowTextureEnabled):
+        Textures["Frame row"] = ((RowLayout.FrameCount, 1), "32")
+    Memory["PixelBuffers"] += GetPixelBufferBytes(TransformTextureSize, GetPositionTextureFormat())
+    if(GetNormalEncoding() != "PACKED"):
+        Memory["PixelBuffers"] += GetPixelBufferBytes(TransformTextureSize, properties.FileRotationTextureFormat)
+    Memory["PixelBuffers"] += GetPixelBufferBytes(DataTextureSize, "16")
+
+    # The capture pass is the only sweep over the frame range, the data pass reads the frame cache
+    return Textures, Memory, ScanTime + CaptureTime * FrameCount
+
+# Bytes of the (RGBA) pixel buffer of a texture, see CreatePixelBuffer
+def GetPixelBufferBytes(Dimensions : tuple, Format : str) -> int:
+    return Dimensions[0] * Dimensions[1] * 4 * np.dtype(GetPixelDataType(Format)).itemsize
+
+# The largest number of quantization clusters the export can create for the elements, see GetClusterBounds
+def GetPlannedClusterCount(ElementCount : int, ObjectCount : int, RowCount : int) -> int:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    Mode = GetQuantizationMode()
+    if(Mode == "OBJECT"):
+        return ObjectCount
+    elif(Mode == "ROW"):
+        return RowCount
+    return max(1, min(properties.ClusterCount, ElementCount))
+
+# The capture time of the export: every frame evaluation plus the capture of every sampled frame
+def GetCaptureTime(FrameStart, FrameEnd, FrameEvaluationTime, FrameCaptureTime, FrameCount) -> float:
+    FrameEvaluationCount = FrameEnd - FrameStart + 1
+    return FrameEvaluationCount * FrameEvaluationTime + FrameCount * FrameCaptureTime
+
+# Readable lines of a plan, used by the operator report
+def GetPlanReport(Plan : dict) -> list[str]:
+    Report = [f"{Plan['Type'].capitalize()} VAT: {Plan['ElementCount']} elements over {Plan['FrameCount']} frames"]
+    for TextureName, Texture in Plan["Textures"].items():
+        Dimensions = Texture["Dimensions"]
+        FileSizes = ", ".join(f"{BitDepth} bit {Size / (1024 * 1024):.1f} MB" for BitDepth, Size in Texture["FileSizes"].items())
+        Report.append(f"{TextureName} texture: {Dimensions[0]}x{Dimensions[1]} ({FileSizes})")
+    Report.append(f"Predicted peak memory: {Plan['PeakMemory'] / (1024 * 1024):.1f} MB")
+    Report.append(f"Estimated capture time: {Plan['EstimatedCaptureTime']:.1f} s")
+    Report.extend(Plan["Errors"])
+    return Report
+
+# Dry run of the export
+class VATEXPORTER_OT_PlanExport(Operator):
+    bl_idname = "vatexporter.plan"
+    bl_label = "Plan VAT export"
+    bl_description = "Predict the texture sizes, memory and capture time of the export without running it"
+    bl_options = {"REGISTER"}
+
+    # Check if the function can be ran
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+
+    # run the function
+    def execute(self, context):
+        Plan = PlanExport()
+        for Error in Plan["Errors"]:
+            self.report({"ERROR"}, Error)
+        if(Plan["Errors"]):
+            return {"CANCELLED"}
+
+        self.report({"INFO"}, " | ".join(GetPlanReport(Plan)))
+        return {"FINISHED"}
+
+modules = [VATEXPORTER_OT_PlanExport]
+
+def register():
+    for module in modules:
+        register_class(module)
+
+def unregister():
+    for module in modules:
+        unregister_class(module)
+
+if __name__ == "__main__":
+    register()
@@ -1,7 +1,8 @@
 import bpy
-import bmesh
 import os
 import json
+import gzip
+from concurrent.futures import ThreadPoolExecutor
 from bpy.utils import register_class, unregister_class
 from bpy.types import Operator
 from math import ceil, floor
@@ -9,10 +10,31 @@ from mathutils import Vector, Matrix
 import numpy as np
 from .VATFunctions import (
     FilterSelection,
-    UnsignVector,
+    UnsignVectors,
     CreateTexture,
-    ConvertCoordinate,
-    GetExtends
+    ConvertCoordinates,
+    GetVertexArrays,
+    GetPolygonLoopRanges,
+    GetActiveLoopUVs,
+    GetExtends,
+    GetLoopVertexIndices,
+    CreateUVLayer,
+    CreateSoupMesh,
+    ExportMeshFile,
+    CreatePixelBuffer,
+    GetPeakMemory,
+    GetExportReport,
+    FrameSampler,
+    TextureLayout,
+    WriteNormals,
+    GetNormalEncoding,
+    GetPositionTextureFormat,
+    GetNormalEncodingData,
+    GetNormalChannelCount,
+    GetWorldMatrices,
+    GetLocalCorners,
+    GetObjectBounds,
+    FrameCache
 )
 
 # Execute the render dynamic operator
@@ -33,33 +55,59 @@ def RenderDynamic():
     CurrentFrame = bpy.context.scene.frame_current
 
     # Prepass: Get the basic data on the simulation and the target textures
+    Sampler = FrameSampler()
     Modifiers = PrepareSelectedObjects(SelectedObjects)
     FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
 
-    # Pass 1: Prepass
-    VertexCount, Bounds, RestPoseFrame, RowCount, DataTextureSize, StartBounds = PrePass(SelectedObjects, FrameStart, FrameEnd, FrameSpacing)
-    TransformTextureSize = GetTextureDimensions(VertexCount + 1)
+    # Pass 1: Capture pass, the only pass that evaluates the simulation frames
+    Cache = FrameCache()
+    VertexCount, Bounds, RestPoseFrame, RowCount, DataTextureSize, StartBounds, FrameBounds = CapturePass(SelectedObjects, FrameStart, FrameEnd, FrameSpacing, Sampler, Cache)
+    VertexCounts, FaceCounts = GetCachedTopology(Cache, FrameCount, len(SelectedObjects))
+    TransformLayout = PageLayout = None
+    if(properties.PagedTransformTexture):
+        PageLayout = TransformPageLayout(VertexCounts.sum(axis = 1), properties.ExportResolutionU, properties.TransformPageHeight)
+    else:
+        TransformTextureSize = GetTextureDimensions(VertexCount + 1)
+        TransformLayout = TextureLayout(VertexCount + 1, 1, TransformTextureSize)
+    DataLayout = TextureLayout(DataTextureSize[0] * RowCount, FrameCount, DataTextureSize)
+    RowHeight = round(DataTextureSize[1] / RowCount)
+    if(properties.VariableFrameRows):
+        RestFrameIndex = (RestPoseFrame - FrameStart) // FrameSpacing
+        DataLayout = FrameRowLayout(GetFrameElementCounts(FaceCounts, RestFrameIndex), DataTextureSize[0])
+        DataTextureSize = (DataLayout.Width, DataLayout.Height)
 
     # Data pass
-    NewObjects, NewDatas = MeshPass(SelectedObjects, RestPoseFrame, FrameCount, DataTextureSize)
-    PixelPositions, PixelNormals, PixelData = DataPass(SelectedObjects, TransformTextureSize, Bounds, NewDatas, FrameCount, DataTextureSize)
+    NewObjects, NewDatas = MeshPass(SelectedObjects, RestPoseFrame, DataLayout, Sampler)
+    PixelPositions, PixelNormals, PixelData = DataPass(TransformLayout, Bounds, NewDatas, DataLayout, Cache, PageLayout)
+    Cache.Release()
 
     # Export
-    if(properties.FilePositionTextureEnabled):
-        CreateTexture(PixelPositions, TransformTextureSize[0], TransformTextureSize[1], properties.FilePositionTexture, properties.FilePositionTextureFormat)
-    if(properties.FileRotationTextureEnabled):
-        CreateTexture(PixelNormals, TransformTextureSize[0], TransformTextureSize[1], properties.FileRotationTexture, properties.FileRotationTextureFormat)
+    if(PageLayout is not None):
+        CreateTransformPages(PixelPositions, PixelNormals, PageLayout)
+        if(properties.FilePageTableTextureEnabled):
+            CreatePageTableTexture(PageLayout)
+    else:
+        if(properties.FilePositionTextureEnabled):
+            CreateTexture(PixelPositions, TransformTextureSize[0], TransformTextureSize[1], properties.FilePositionTexture, GetPositionTextureFormat())
+        if(properties.FileRotationTextureEnabled and PixelNormals is not None):
+            CreateTexture(PixelNormals, TransformTextureSize[0], TransformTextureSize[1], properties.FileRotationTexture, properties.FileRotationTextureFormat, GetNormalChannelCount())
     if(properties.FileDataTextureEnabled):
         CreateTexture(PixelData, DataTextureSize[0], DataTextureSize[1], properties.FileDataTexture, "16")
+    if(properties.VariableFrameRows and properties.FileFrameRowTextureEnabled):
+        CreateFrameRowTexture(DataLayout)
     if(properties.FileJSONDataEnabled):
         CreateJSON(
             (Bounds[0], Bounds[1]), 
-            round(DataTextureSize[1] / RowCount), 
+            RowHeight, 
             (GetExtends(*Bounds, *StartBounds)),
-            DataTextureSize[0]
+            DataTextureSize[0],
+            FrameBounds,
+            PageLayout,
+            DataLayout if properties.VariableFrameRows else None
         )
 
     # Clean up
+    del PixelPositions, PixelNormals, PixelData
     for i, Object in enumerate(SelectedObjects): 
         Object.modifiers.remove(Modifiers[i * 2])
         Object.modifiers.remove(Modifiers[i * 2 + 1])
@@ -74,10 +122,10 @@ def RenderDynamic():
     for SelectedObject in StartSelection:
         SelectedObject.select_set(True)
 
-    return False, ""
+    return False, GetExportReport("dynamic", Sampler, GetPeakMemory())
 
-# Prepass: Get the basic data on the simulation and the target textures
-def PrePass(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing):
+# Capture pass: Evaluate every sampled frame once, cache the raw mesh arrays and get the basic data on the simulation and the target textures
+def CapturePass(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing, Sampler : FrameSampler, Cache : FrameCache):
     # Basic data
     BoundsMin = np.array([np.inf] * 3)
     BoundsMax = np.array([np.inf * -1] * 3)
@@ -86,31 +134,35 @@ def PrePass(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing
     RestPoseFrame = FrameStart
     VertexCount = 0
     MaxFaceCount = 0
+    FrameBoundsMin = []
+    FrameBoundsMax = []
 
-    # Find the vertexcount and facecount across the frame range
-    for Frame in range(FrameStart, FrameEnd + 1):
-        # Current frame
-        bpy.context.scene.frame_set(Frame)
-        if((Frame - FrameStart) % FrameSpacing != 0):
-            continue
+    # Liquid meshes are read straight from the Mantaflow cache when possible, otherwise every frame is evaluated
+    MeshSources = GetMantaflowMeshSources(Objects, FrameStart, FrameEnd, FrameSpacing, Sampler)
+    if(MeshSources is not None):
+        FrameMeshes = ReadMantaflowFrames(MeshSources, FrameStart, FrameEnd, FrameSpacing)
+    else:
+        FrameMeshes = EvaluateFrames(Objects, FrameStart, FrameEnd, FrameSpacing, Sampler)
 
-        # Gather vertex and face data
+    # Find the vertexcount and facecount across the frame range
+    for Frame, FrameIndex, ObjectMeshes, (LocalBoundsMin, LocalBoundsMax) in FrameMeshes:
+        # Cache the vertex and loop data, positions and normals are stored in the target coordinate system
         LocalFaceCount = 0
-        for Object in Objects:
-            CompareObject = GetObjectAtFrame(Object, Frame)
-            VertexCount += len(CompareObject.data.vertices)
-            LocalFaceCount += len(CompareObject.data.polygons)
-
-            # Get the maximum size of the bounding box for each frame
-            Corners = [ConvertCoordinate(Object.matrix_world @ Vector(Corner)) for Corner in Object.bound_box]
-            LocalBoundsMin = np.array([np.inf] * 3)
-            LocalBoundsMax = np.array([np.inf * -1] * 3)
-            for Corner in Corners:
-                LocalBoundsMin = np.minimum(LocalBoundsMin, Corner)
-                LocalBoundsMax = np.maximum(LocalBoundsMax, Corner)
-
-            BoundsMin = np.minimum(LocalBoundsMin, BoundsMin)
-            BoundsMax = np.maximum(LocalBoundsMax, BoundsMax)
+        for i, (Positions, Normals, LoopStarts, LoopVertices, LoopUVs) in enumerate(ObjectMeshes):
+            Cache.Store("Positions", (FrameIndex, i), ConvertCoordinates(Positions).astype(np.float32))
+            Cache.Store("Normals", (FrameIndex, i), UnsignVectors(ConvertCoordinates(Normals)).astype(np.float32))
+            Cache.Store("LoopStarts", (FrameIndex, i), LoopStarts)
+            Cache.Store("LoopVertices", (FrameIndex, i), LoopVertices)
+            if(LoopUVs is not None):
+                Cache.Store("LoopUVs", (FrameIndex, i), LoopUVs)
+            VertexCount += len(Positions)
+            LocalFaceCount += len(LoopStarts)
+
+        # Bounds of all objects for each frame
+        FrameBoundsMin.append(LocalBoundsMin.tolist())
+        FrameBoundsMax.append(LocalBoundsMax.tolist())
+        np.minimum(LocalBoundsMin, BoundsMin, BoundsMin)
+        np.maximum(LocalBoundsMax, BoundsMax, BoundsMax)
 
         # Write data from the rest pose frame (which is the frame with the most polys)
         if(LocalFaceCount > MaxFaceCount):
@@ -122,60 +174,242 @@ def PrePass(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing
     # Update bounds
     Bounds = (BoundsMin, BoundsMax)
     StartBounds = (StartBoundsMin, StartBoundsMax)
+    FrameBounds = (FrameBoundsMin, FrameBoundsMax)
 
     # Calculate data texture size
+    FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
+    RowCount, DataTextureSize = GetDataTextureSize(MaxFaceCount, FrameCount)
+
+    return VertexCount, Bounds, RestPoseFrame, RowCount, DataTextureSize, StartBounds, FrameBounds
+
+# The rows per frame and the size of the data texture, every frame holds the 3 vertices of every triangle of the rest pose frame
+def GetDataTextureSize(MaxFaceCount : int, FrameCount : int):
     properties = bpy.context.scene.VATExporter_RegularProperties
     MaxTextureSizeU = properties.DataTextureResolutionU
-    FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
     VATMeshVertexCount = MaxFaceCount * 3
-    RowCount = ceil(VATMeshVertexCount / MaxTextureSizeU)
+    RowCount = max(ceil(VATMeshVertexCount / MaxTextureSizeU), 1)
     DataTextureSize = (ceil(VATMeshVertexCount / RowCount), RowCount * FrameCount)
+    return RowCount, DataTextureSize
+
+# Count the vertices and polygons of every object in every sampled frame, without capturing any arrays
+# Returns two (FrameCount, ObjectCount) arrays. Mantaflow meshes only have their file headers read
+def ScanTopology(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing, Sampler : FrameSampler):
+    Frames = list(range(FrameStart, FrameEnd + 1, FrameSpacing))
+    VertexCounts = np.zeros((len(Frames), len(Objects)), dtype = np.int64)
+    FaceCounts = np.zeros((len(Frames), len(Objects)), dtype = np.int64)
+    MeshSources = GetMantaflowMeshSources(Objects, FrameStart, FrameEnd, FrameSpacing, Sampler)
+    if(MeshSources is not None):
+        for FrameIndex, Frame in enumerate(Frames):
+            for i, MeshSource in enumerate(MeshSources):
+                VertexCounts[FrameIndex, i], FaceCounts[FrameIndex, i] = MeshSource.ReadCounts(Frame)
+        return VertexCounts, FaceCounts, MeshSources
+
+    for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameEnd, FrameSpacing):
+        for i, Object in enumerate(Objects):
+            CompareMesh = Object.evaluated_get(DependencyGraph).data
+            VertexCounts[FrameIndex, i] = len(CompareMesh.vertices)
+            FaceCounts[FrameIndex, i] = len(CompareMesh.polygons)
+    return VertexCounts, FaceCounts, None
+
+# Get the (FrameCount, ObjectCount) vertex and polygon counts of the cached frames
+def GetCachedTopology(Cache : FrameCache, FrameCount : int, ObjectCount : int):
+    VertexCounts = np.zeros((FrameCount, ObjectCount), dtype = np.int64)
+    FaceCounts = np.zeros((FrameCount, ObjectCount), dtype = np.int64)
+    for FrameIndex in range(FrameCount):
+        for i in range(ObjectCount):
+            VertexCounts[FrameIndex, i] = len(Cache.Load("Positions", (FrameIndex, i)))
+            FaceCounts[FrameIndex, i] = len(Cache.Load("LoopStarts", (FrameIndex, i)))
+    return VertexCounts, FaceCounts
+
+# Yields (Frame, FrameIndex, ObjectMeshes, FrameBounds) for every sampled frame by evaluating the depsgraph
+# Every object mesh is a tuple of world positions, normals, polygon loop starts, loop vertices and the active loop UVs (or None)
+# The frames in between the sampled frames are still evaluated, non-cached simulations (geometry nodes, dynamic paint, ...) need every step
+def EvaluateFrames(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing, Sampler : FrameSampler):
+    for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameEnd, FrameSpacing):
+        ObjectMeshes = []
+        for Object in Objects:
+            CompareMesh = Object.evaluated_get(DependencyGraph).data
+            Positions, Normals = GetVertexArrays(CompareMesh)
+            WorldMatrix = np.array(Object.matrix_world)
+            LoopStarts, _ = GetPolygonLoopRanges(CompareMesh)
+            ObjectMeshes.append((
+                Positions @ WorldMatrix[:3, :3].T + WorldMatrix[:3, 3],
+                Normals,
+                LoopStarts,
+                GetLoopVertexIndices(CompareMesh),
+                GetActiveLoopUVs(CompareMesh)
+            ))
+
+        # Get the bounding box of all objects for each frame in one go
+        ObjectBoundsMin, ObjectBoundsMax = GetObjectBounds(GetWorldMatrices(Objects, DependencyGraph), GetLocalCorners(Objects))
+        yield Frame, FrameIndex, ObjectMeshes, (ObjectBoundsMin.min(axis = 0), ObjectBoundsMax.max(axis = 0))
+
+# A liquid domain whose mesh can be read from the Mantaflow cache files instead of the depsgraph
+# Mantaflow writes the mesh in grid space, the per axis scale and offset to object space are fitted against one evaluated frame
+class MantaflowMeshSource:
+    def __init__(self, Object : bpy.types.Object, DomainSettings):
+        self.MeshDirectory = os.path.join(bpy.path.abspath(DomainSettings.cache_directory), "mesh")
+        self.FrameOffset = getattr(DomainSettings, "cache_frame_offset", 0)
+        self.WorldMatrix = np.array(Object.matrix_world)
+        self.Origin = self.WorldMatrix[:3, 3].copy()
+        self.Scale = np.ones(3)
+        self.Offset = np.zeros(3)
+
+    # Path of the mesh file of the given scene frame
+    def GetFilePath(self, Frame : int) -> str:
+        return os.path.join(self.MeshDirectory, f"fluid_mesh_{Frame - self.FrameOffset:04d}.bobj.gz")
+
+    # Fit the grid to object space transform against the evaluated mesh of the given frame, returns False if the file doesn't match the mesh
+    def Fit(self, Mesh : bpy.types.Mesh, Frame : int) -> bool:
+        FilePath = self.GetFilePath(Frame)
+        if(not os.path.isfile(FilePath)):
+            return False
+        GridPositions, _, Triangles = ReadBobjFile(FilePath)
+        Positions, _ = GetVertexArrays(Mesh)
+        if(len(GridPositions) != len(Positions) or len(Triangles) != len(Mesh.polygons) or len(Positions) < 2):
+            return False
+
+        # Least squares fit of object = grid * scale + offset for every axis
+        GridCenter = GridPositions.mean(axis = 0)
+        Center = Positions.mean(axis = 0)
+        GridOffsets = GridPositions - GridCenter
+        self.Scale = (GridOffsets * (Positions - Center)).sum(axis = 0) / np.maximum(np.square(GridOffsets).sum(axis = 0), 1e-12)
+        self.Offset = Center - GridCenter * self.Scale
+        Residual = np.abs(GridPositions * self.Scale + self.Offset - Positions).max()
+        return bool(Residual <= 1e-4 * max(float(np.ptp(Positions, axis = 0).max()), 1.0))
+
+    # Read the vertex and triangle count of the given frame from the file header, skipping over the arrays
+    def ReadCounts(self, Frame : int):
+        FilePath = self.GetFilePath(Frame)
+        if(not os.path.isfile(FilePath)):
+            return 0, 0
+        return ReadBobjCounts(FilePath)
+
+    # Read the mesh of the given frame as world positions, normals, polygon loop starts, loop vertices and loop UVs
+    # A frame without a file has no liquid, like the evaluated mesh
+    def Read(self, Frame : int):
+        FilePath = self.GetFilePath(Frame)
+        if(not os.path.isfile(FilePath)):
+            return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype = np.int32), np.zeros(0, dtype = np.int32), None
+        GridPositions, GridNormals, Triangles = ReadBobjFile(FilePath)
+        Positions = GridPositions * self.Scale + self.Offset
+        Normals = GridNormals / self.Scale
+        Normals /= np.maximum(np.linalg.norm(Normals, axis = 1, keepdims = True), 1e-12)
+        LoopStarts = np.arange(0, len(Triangles) * 3, 3, dtype = np.int32)
+        return Positions @ self.WorldMatrix[:3, :3].T + self.Origin, Normals, LoopStarts, Triangles.ravel(), None
+
+# Decode a gzip compressed Mantaflow binary object (.bobj.gz) file
+# The file holds the vertex count and positions, the normal count and normals, and the triangle count and vertex indices
+def ReadBobjFile(FilePath : str):
+    with gzip.open(FilePath, "rb") as File:
+        Data = File.read()
+    Offset = 0
+    Arrays = []
+    for DataType in (np.float32, np.float32, np.int32):
+        Count = int(np.frombuffer(Data, dtype = np.int32, count = 1, offset = Offset)[0])
+        Offset += 4
+        Arrays.append(np.frombuffer(Data, dtype = DataType, count = Count * 3, offset = Offset).reshape(-1, 3))
+        Offset += Count * 12
+    return Arrays[0], Arrays[1], Arrays[2]
+
+# Read the vertex and triangle count of a Mantaflow binary object file without decoding the positions and normals
+def ReadBobjCounts(FilePath : str):
+    Counts = []
+    with gzip.open(FilePath, "rb") as File:
+        for _ in range(3):
+            Counts.append(int(np.frombuffer(File.read(4), dtype = np.int32)[0]))
+            if(len(Counts) < 3):
+                File.seek(Counts[-1] * 12, os.SEEK_CUR)
+    return Counts[0], Counts[2]
+
+# Get the Mantaflow mesh source of every object, or None if any object has to be evaluated through the depsgraph
+# Only liquid domains with a binary mesh cache qualify, with no modifiers after the fluid modifier other than the VAT triangulate and edge split modifiers
+def GetMantaflowMeshSources(Objects : list[bpy.types.Object], FrameStart, FrameEnd, FrameSpacing, Sampler : FrameSampler):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(not properties.ReadFluidCacheDirectly):
+        return None
 
-    return VertexCount, Bounds, RestPoseFrame, RowCount, DataTextureSize, StartBounds
+    MeshSources = []
+    for Object in Objects:
+        Modifiers = Object.modifiers
+        if(len(Modifiers) < 3 or Modifiers[-3].type != "FLUID" or Modifiers[-3].fluid_type != "DOMAIN"):
+            return None
+        DomainSettings = Modifiers[-3].domain_settings
+        if(DomainSettings.domain_type != "LIQUID" or not DomainSettings.use_mesh or DomainSettings.cache_mesh_format != "BOBJECT"):
+            return None
+        MeshSources.append(MantaflowMeshSource(Object, DomainSettings))
+
+    # Fit every source against the first sampled frame that has liquid in it
+    for i, Object in enumerate(Objects):
+        bIsFitted = False
+        for Frame in range(FrameStart, FrameEnd + 1, FrameSpacing):
+            if(not os.path.isfile(MeshSources[i].GetFilePath(Frame))):
+                continue
+            DependencyGraph = Sampler.SetFrame(Frame)
+            bIsFitted = MeshSources[i].Fit(Object.evaluated_get(DependencyGraph).data, Frame)
+            break
+        if(not bIsFitted):
+            return None
+
+    return MeshSources
+
+# Yields (Frame, FrameIndex, ObjectMeshes, FrameBounds) for every sampled frame by decoding the Mantaflow cache files
+# The files are decoded by a thread pool a window of frames ahead. Decompression and the NumPy conversions release the GIL, so this scales with the cores
+# A process pool is not an option, as the workers of a process pool would be new Blender instances
+def ReadMantaflowFrames(MeshSources : list[MantaflowMeshSource], FrameStart, FrameEnd, FrameSpacing):
+    Frames = list(range(FrameStart, FrameEnd + 1, FrameSpacing))
+    WorkerCount = os.cpu_count() or 1
+    WindowSize = WorkerCount * 2
+    with ThreadPoolExecutor(max_workers = WorkerCount) as Executor:
+        for WindowStart in range(0, len(Frames), WindowSize):
+            Window = Frames[WindowStart:WindowStart + WindowSize]
+            Futures = [[Executor.submit(MeshSource.Read, Frame) for MeshSource in MeshSources] for Frame in Window]
+            for k, Frame in enumerate(Window):
+                ObjectMeshes = [Future.result() for Future in Futures[k]]
+
+                # Bounds of the vertices, an empty frame falls back to the origins of the objects
+                Positions = np.concatenate([ObjectMesh[0] for ObjectMesh in ObjectMeshes])
+                if(len(Positions) == 0):
+                    Positions = np.array([MeshSource.Origin for MeshSource in MeshSources])
+                ConvertedPositions = ConvertCoordinates(Positions)
+                yield Frame, WindowStart + k, ObjectMeshes, (ConvertedPositions.min(axis = 0), ConvertedPositions.max(axis = 0))
 
 # Create VAT meshes
-def MeshPass(Objects : list[bpy.types.Object], EvaluationFrame, FrameCount, DataTextureSize):
+def MeshPass(Objects : list[bpy.types.Object], EvaluationFrame, DataLayout : TextureLayout, Sampler : FrameSampler):
     # Mesh data
     scene = bpy.context.scene
-    scene.frame_set(EvaluationFrame)
+    DependencyGraph = Sampler.SetFrame(EvaluationFrame)
     bpy.ops.Object.select_all(action = "DESELECT")
     NewObjects = []
     NewDatas = []
     LocalVertexCount = 0
     properties = scene.VATExporter_RegularProperties
+    PixelUVs = DataLayout.GetPixelUVs()
 
     # Lookup texture data
     for Object in Objects:
-        # Create duplicate objects with new data
-        NewObject = Object.copy()
-        CompareObject = GetObjectAtFrame(Object, EvaluationFrame)
-        NewData = bpy.data.meshes.new_from_object(CompareObject)
-        NewObject = bpy.data.objects.new(Object.name, NewData)
+        # Build the separated triangles of the evaluated mesh straight from its arrays
+        # The vertices are ordered by polygon and corner, so the vertices of the first n triangles are the first 3n vertices
+        CompareObject = Object.evaluated_get(DependencyGraph)
+        CompareData = CompareObject.to_mesh()
+        Positions, _ = GetVertexArrays(CompareData)
+        LoopStarts, LoopTotals = GetPolygonLoopRanges(CompareData)
+        NewData = CreateSoupMesh(Object.name, Positions, GetLoopVertexIndices(CompareData), LoopStarts, LoopTotals)
+        MaterialIndices = np.empty(len(LoopStarts), dtype = np.int32)
+        SmoothFlags = np.empty(len(LoopStarts), dtype = bool)
+        CompareData.polygons.foreach_get("material_index", MaterialIndices)
+        CompareData.polygons.foreach_get("use_smooth", SmoothFlags)
+        NewData.polygons.foreach_set("material_index", MaterialIndices)
+        NewData.polygons.foreach_set("use_smooth", SmoothFlags)
+        for Material in CompareData.materials:
+            NewData.materials.append(Material)
+        CompareObject.to_mesh_clear()
         NewData.transform(Object.matrix_world)
+        NewObject = bpy.data.objects.new(Object.name, NewData)
         bpy.context.collection.objects.link(NewObject)
 
-        # Separate all the triangles in the mesh
-        bm = bmesh.new()
-        bm.from_mesh(NewData)
-        bmesh.ops.split_edges(bm, edges = bm.edges)
-        bm.to_mesh(NewData)
-        bm.free()
-        NewData.update()
-
-        # Clear the UV channels of this new object
-        UVLayers = NewObject.data.uv_layers
-        for UVLayer in UVLayers:
-            UVLayers.remove(UVLayer)
-
-        # Set the UVs & data texture pixels
-        PixelUVLayer = NewObject.data.uv_layers.new(name = "PixelUVs")
-        for Loop in NewObject.data.loops:
-            CurrentRow = floor((Loop.vertex_index + LocalVertexCount) / DataTextureSize[0])
-            # Set the UVs
-            PixelUVLayer.data[Loop.index].uv = (
-                ((((Loop.vertex_index + LocalVertexCount) % DataTextureSize[0]) + 0.5) / DataTextureSize[0]),
-                ((CurrentRow * FrameCount + 0.5) / DataTextureSize[1])
-            )
+        # Set the UVs & data texture pixels, vertex i of the mesh is loop i
+        CreateUVLayer(NewData, "PixelUVs", PixelUVs[LocalVertexCount:LocalVertexCount + len(NewData.vertices)])
 
         # Update the arrays for cleanup afterwards
         NewObjects.append(NewObject)
@@ -189,90 +423,175 @@ def MeshPass(Objects : list[bpy.types.Object], EvaluationFrame, FrameCount, Data
     # Return
     return NewObjects, NewDatas
 
-# Data pass: Creates the position, normal and data textures
-def DataPass(Objects : list[bpy.types.Object], TextureSize, Bounds, RestPoseDatas : list[bpy.types.Mesh], FrameCount, DataTextureSize):  
+# Data pass: Creates the position, normal and data textures from the frame cache
+# With a page layout every frame has its own block of transform texels, and the data texture holds UVs relative to that block
+def DataPass(TransformLayout : TextureLayout, Bounds, RestPoseDatas : list[bpy.types.Mesh], DataLayout : TextureLayout, Cache : FrameCache, PageLayout = None):  
     # Position and normal texture data
-    TransformTextureSize = TextureSize[0] * TextureSize[1]
-    PixelPositions = np.zeros((TransformTextureSize, 4))
-    PixelNormals = np.zeros((TransformTextureSize, 4))
-    FrameStart = bpy.context.scene.frame_start
-    FrameEnd = bpy.context.scene.frame_end
-    FrameSpacing = bpy.context.scene.VATExporter_RegularProperties.FrameSpacing
+    if(PageLayout is not None):
+        TransformTextureSize = PageLayout.Width * PageLayout.Height
+    else:
+        TransformTextureSize = TransformLayout.Width * TransformLayout.Height
+        TransformUVs = TransformLayout.GetPixelUVs()
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    PixelPositions = CreatePixelBuffer(TransformTextureSize, [0.0, 0.0, 0.0, 0.0], GetPositionTextureFormat())
+    PixelNormals = None
+    if(GetNormalEncoding() != "PACKED"):
+        PixelNormals = CreatePixelBuffer(TransformTextureSize, [0.0, 0.0, 0.0, 0.0], properties.FileRotationTextureFormat)
     BoundsMin = Bounds[0]
     BoundsMax = Bounds[1]
 
     # Data texture
-    PixelData = np.zeros((DataTextureSize[0] * DataTextureSize[1], 4))
-    DefaultDataValue = (0.5 / DataTextureSize[0], 0.5 / DataTextureSize[1], 0.0, 1.0)
-    PixelData = np.full((DataTextureSize[0] * DataTextureSize[1], 4), DefaultDataValue)
+    DefaultDataValue = (0.5 / DataLayout.Width, 0.5 / DataLayout.Height, 0.0, 1.0)
+    if(PageLayout is not None):
+        DefaultDataValue = (0.5 / PageLayout.Width, 0.5 / PageLayout.PageHeight, 0.0, 1.0)
+    PixelData = CreatePixelBuffer(DataLayout.Width * DataLayout.Height, DefaultDataValue)
 
-    # Write to the texture data
-    FrameVertexCount = 0
-    for Frame in range(FrameStart, FrameEnd + 1):
-        if((Frame - FrameStart) % FrameSpacing != 0):
-            continue  
+    # The rest pose meshes don't change, so the polygon and corner of every rest loop are looked up once
+    RestLoopArrays = [GetRestLoopArrays(RestPoseData) for RestPoseData in RestPoseDatas]
 
+    # Write to the texture data, a whole object at once
+    FrameVertexCount = 0
+    for FrameIndex in range(DataLayout.FrameCount):
         LocalVertexCount = 0
-        FrameIndex = floor((Frame - FrameStart) / FrameSpacing)
-        VerticalPixelIndex = DataTextureSize[0] * FrameIndex
+        if(PageLayout is not None):
+            FrameVertexCount = PageLayout.FrameTexelStarts[FrameIndex]
+        DataFrameIndices = DataLayout.GetFrameIndices(FrameIndex)
         for i, RestPoseData in enumerate(RestPoseDatas):
-            CompareObject = GetObjectAtFrame(Objects[i], Frame)
-            UVLayer = CompareObject.data.uv_layers.active
-            CompareVertices = CompareObject.data.vertices
-            RestPosePolygons = RestPoseData.polygons
-            RestPoseLoops = RestPoseData.loops
-            TargetLoops = CompareObject.data.loops
-            for RestPosePolygon in RestPosePolygons:
-                if(RestPosePolygon.index >= len(CompareObject.data.polygons)):
-                    continue
-                TargetPolygon = CompareObject.data.polygons[RestPosePolygon.index]
-                PolygonLoops = TargetPolygon.loop_indices
-                RestPoseLoopIndices = RestPosePolygon.loop_indices
-                for k, RestPoseLoopIndex in enumerate(RestPoseLoopIndices):
-                    # Get the data for the pixel positions
-                    TargetLoop = TargetLoops[PolygonLoops[k]]
-                    VertexIndex = TargetLoop.vertex_index
-                    TargetVertex = CompareVertices[VertexIndex]
-                    TransformArrayPosition = VertexIndex + FrameVertexCount + 1
-
-                    # Calculate the translation data
-                    TargetPosition = Objects[i].matrix_world @ TargetVertex.co
-                    ConvertedPosition = ConvertCoordinate(TargetPosition)
-
-                    # Calculate the normal data
-                    TargetNormal = ConvertCoordinate(TargetVertex.normal)
-                    ConvertedNormal = UnsignVector(Vector((TargetNormal[0], TargetNormal[1], TargetNormal[2])))
-
-                    # Write to
-                    PixelPositions[TransformArrayPosition] = (*GetRelativePosition(ConvertedPosition, Vector(BoundsMin), Vector(BoundsMax)), 1.0)
-                    PixelNormals[TransformArrayPosition] = (*ConvertedNormal, 1.0)
-
-                    # Write the data for the data texture
-                    # UV data of transform textures
-                    CurrentRow = floor((RestPoseLoops[RestPoseLoopIndex].vertex_index + LocalVertexCount) / DataTextureSize[0])
-                    Remainder = (RestPoseLoops[RestPoseLoopIndex].vertex_index + LocalVertexCount ) % DataTextureSize[0]
-                    DataTextureArrayIndex = CurrentRow * DataTextureSize[0] * FrameCount + Remainder + VerticalPixelIndex
-                    # UV data of source mesh
-                    Coordinates = (0.0, 0.0)
-                    if(UVLayer != None):
-                        Coordinates = UVLayer.data[TargetLoop.index].uv
-                        Coordinates[0] = max(0.0, min(1.0, Coordinates[0]))
-                        Coordinates[1] = max(0.0, min(1.0, Coordinates[1]))
-                    UVPixel = (
-                        (((TransformArrayPosition) % TextureSize[0]) + 0.5) / TextureSize[0],
-                        (floor(TransformArrayPosition / TextureSize[0]) + 0.5) / TextureSize[1],
-                        Coordinates[0],
-                        Coordinates[1]
-                    )
-                    PixelData[DataTextureArrayIndex] = UVPixel
-
-
-            FrameVertexCount += len(CompareVertices)
+            Positions = Cache.Load("Positions", (FrameIndex, i))
+            LoopPolygons, LoopCorners, RestLoopVertices = RestLoopArrays[i]
+
+            # Match the rest loops to the loops of the same polygon corner in this frame, polygons that don't exist (anymore) are skipped
+            TargetLoopStarts = Cache.Load("LoopStarts", (FrameIndex, i))
+            bHasTarget = LoopPolygons < len(TargetLoopStarts)
+            TargetLoops = TargetLoopStarts[LoopPolygons[bHasTarget]] + LoopCorners[bHasTarget]
+            VertexIndices = Cache.Load("LoopVertices", (FrameIndex, i))[TargetLoops]
+            TransformArrayIndices = VertexIndices + FrameVertexCount + 1
+
+            # Write to the transform textures
+            PixelPositions[TransformArrayIndices, :3] = GetRelativePositions(Positions[VertexIndices], BoundsMin, BoundsMax)
+            PixelPositions[TransformArrayIndices, 3] = 1.0
+            if(PixelNormals is not None):
+                PixelNormals[TransformArrayIndices, 3] = 1.0
+            WriteNormals(PixelPositions, PixelNormals, TransformArrayIndices, Cache.Load("Normals", (FrameIndex, i))[VertexIndices])
+
+            # Write the data texture: the UV of the transform texels and the (clamped) UV of the source mesh
+            DataTextureArrayIndices = DataFrameIndices[RestLoopVertices[bHasTarget] + LocalVertexCount]
+            if(PageLayout is not None):
+                PixelData[DataTextureArrayIndices, :2] = PageLayout.GetTexelUVs(TransformArrayIndices - PageLayout.FrameTexelStarts[FrameIndex])
+            else:
+                PixelData[DataTextureArrayIndices, :2] = TransformUVs[TransformArrayIndices]
+            if(Cache.Contains("LoopUVs", (FrameIndex, i))):
+                PixelData[DataTextureArrayIndices, 2:] = np.clip(Cache.Load("LoopUVs", (FrameIndex, i))[TargetLoops], 0.0, 1.0)
+            else:
+                PixelData[DataTextureArrayIndices, 2:] = 0.0
+
+            FrameVertexCount += len(Positions)
             LocalVertexCount += len(RestPoseData.vertices)
 
-
     return PixelPositions, PixelNormals, PixelData
 
+# Half floats have 11 significant bits, so UVs in the 0.5-1 range step by 1/2048
+# Texel centers of a page up to 1024 texels are exactly on these steps, larger pages round centers onto texel borders
+MaxPageSize = 1024
+
+# Packs the transform texels of every frame into pages of a fixed height, which are stacked in a single pixel buffer
+# Every frame starts at a new row with its own empty texel and never crosses a page, so the data texture only needs UVs within a page
+# The UVs are stored as half floats, which can only address every texel of a page up to MaxPageSize texels wide and high
+class TransformPageLayout:
+    def __init__(self, FrameVertexCounts : np.ndarray, MaxWidth : int, PageHeight : int):
+        FrameTexelCounts = np.asarray(FrameVertexCounts) + 1
+        self.Width = int(min(MaxWidth, MaxPageSize, FrameTexelCounts.max()))
+        FrameRowCounts = -(-FrameTexelCounts // self.Width)
+        self.PageHeight = int(max(min(PageHeight, MaxPageSize), FrameRowCounts.max()))
+
+        # Fill the pages frame by frame
+        self.FramePages = np.zeros(len(FrameRowCounts), dtype = np.int32)
+        self.FrameRowOffsets = np.zeros(len(FrameRowCounts), dtype = np.int32)
+        Page = Row = 0
+        for FrameIndex, FrameRowCount in enumerate(FrameRowCounts):
+            if(Row + FrameRowCount > self.PageHeight):
+                Page += 1
+                Row = 0
+            self.FramePages[FrameIndex] = Page
+            self.FrameRowOffsets[FrameIndex] = Row
+            Row += FrameRowCount
+        self.PageCount = Page + 1
+        self.Height = self.PageCount * self.PageHeight
+        self.FrameTexelStarts = (self.FramePages * self.PageHeight + self.FrameRowOffsets) * self.Width
+
+    # UVs of texels relative to the first texel of their frame
+    def GetTexelUVs(self, LocalTexelIndices : np.ndarray) -> np.ndarray:
+        UVs = np.empty((len(LocalTexelIndices), 2))
+        UVs[:, 0] = (LocalTexelIndices % self.Width + 0.5) / self.Width
+        UVs[:, 1] = (LocalTexelIndices // self.Width + 0.5) / self.PageHeight
+        return UVs
+
+    # The texels of a single page in the stacked pixel buffer
+    def GetPageSlice(self, Page : int) -> slice:
+        PageTexelCount = self.Width * self.PageHeight
+        return slice(Page * PageTexelCount, (Page + 1) * PageTexelCount)
+
+# Stores every frame of the data texture in as many rows as its triangles need, frame after frame
+# Has the same interface as TextureLayout, the elements are the vertices of the VAT mesh
+class FrameRowLayout:
+    def __init__(self, FrameElementCounts : np.ndarray, Width : int):
+        self.Width = Width
+        self.FrameCount = len(FrameElementCounts)
+        self.ElementCount = int(FrameElementCounts.max(initial = 0))
+        self.FrameElementCounts = FrameElementCounts
+        self.FrameRowCounts = -(-FrameElementCounts // Width)
+        self.FrameRowOffsets = np.cumsum(self.FrameRowCounts) - self.FrameRowCounts
+        self.Height = int(max(self.FrameRowCounts.sum(), 1))
+
+    # Texel indices of the elements for the given frame. Elements past the triangle budget of the frame have no texel and must not be written
+    def GetFrameIndices(self, FrameIndex : int, Elements = slice(None)) -> np.ndarray:
+        return (np.arange(self.ElementCount) + self.FrameRowOffsets[FrameIndex] * self.Width)[Elements]
+
+    # UV coordinate of every element in the first frame, the shader adds the row offset of the frame
+    def GetPixelUVs(self) -> np.ndarray:
+        Elements = np.arange(self.ElementCount)
+        PixelUVs = np.empty((self.ElementCount, 2))
+        PixelUVs[:, 0] = (Elements % self.Width + 0.5) / self.Width
+        PixelUVs[:, 1] = (Elements // self.Width + 0.5) / self.Height
+        return PixelUVs
+
+# Get the number of VAT mesh vertices every frame needs, which is the end of the last triangle that exists in the frame
+# The VAT mesh holds 3 vertices per triangle of the rest frame, object after object. FaceCounts is (FrameCount, ObjectCount)
+def GetFrameElementCounts(FaceCounts : np.ndarray, RestFrameIndex : int) -> np.ndarray:
+    RestFaceCounts = FaceCounts[RestFrameIndex]
+    ObjectElementOffsets = np.cumsum(RestFaceCounts * 3) - RestFaceCounts * 3
+    ObjectElementEnds = np.where(FaceCounts > 0, ObjectElementOffsets + np.minimum(FaceCounts, RestFaceCounts) * 3, 0)
+    return ObjectElementEnds.max(axis = 1, initial = 0)
+
+# Creates the frame row texture: a single row with a texel per frame, holding the row offset (in UV space) in red, the triangle count in green and the row count in blue
+def CreateFrameRowTexture(DataLayout : FrameRowLayout):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    Pixels = np.ones((DataLayout.FrameCount, 4), dtype = np.float32)
+    Pixels[:, 0] = DataLayout.FrameRowOffsets / DataLayout.Height
+    Pixels[:, 1] = DataLayout.FrameElementCounts // 3
+    Pixels[:, 2] = DataLayout.FrameRowCounts
+    CreateTexture(Pixels, DataLayout.FrameCount, 1, properties.FileFrameRowTexture, "32")
+
+# Write every page of the position and normal textures to its own texture, the page index is appended to the file name
+def CreateTransformPages(PixelPositions, PixelNormals, PageLayout : TransformPageLayout):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    for Page in range(PageLayout.PageCount):
+        PageSlice = PageLayout.GetPageSlice(Page)
+        if(properties.FilePositionTextureEnabled):
+            CreateTexture(PixelPositions[PageSlice], PageLayout.Width, PageLayout.PageHeight, f"{properties.FilePositionTexture}_{Page}", GetPositionTextureFormat())
+        if(properties.FileRotationTextureEnabled and PixelNormals is not None):
+            CreateTexture(PixelNormals[PageSlice], PageLayout.Width, PageLayout.PageHeight, f"{properties.FileRotationTexture}_{Page}", properties.FileRotationTextureFormat, GetNormalChannelCount())
+
+# Creates the page table texture: a single row with a texel per frame, holding the page in red and the row offset (in UV space) in green
+def CreatePageTableTexture(PageLayout : TransformPageLayout):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    FrameCount = len(PageLayout.FramePages)
+    Pixels = np.ones((FrameCount, 4), dtype = np.float32)
+    Pixels[:, 0] = PageLayout.FramePages
+    Pixels[:, 1] = PageLayout.FrameRowOffsets / PageLayout.PageHeight
+    Pixels[:, 2] = PageLayout.FrameRowOffsets
+    CreateTexture(Pixels, FrameCount, 1, properties.FilePageTableTexture, "32")
+
 # Function to export the VAT mesh
 def ExportVATMesh(Objects : list[bpy.types.Object]):
     # Get base data
@@ -290,17 +609,11 @@ def ExportVATMesh(Objects : list[bpy.types.Object]):
     # Export
     BaseName = bpy.path.clean_name(properties.FileMeshName)
     TargetDirectory = bpy.path.abspath(properties.OutputDirectory)
-    ExportFile = os.path.join(TargetDirectory, bpy.path.clean_name(BaseName) + ".fbx")
-    bpy.ops.export_scene.fbx(
-        filepath = ExportFile,
-        use_selection = True,
-        bake_space_transform = False,
-        bake_anim = False
-    )
+    ExportMeshFile(Objects, os.path.join(TargetDirectory, bpy.path.clean_name(BaseName)))
 
 
 # Create the JSON data used by the shader
-def CreateJSON(Bounds : tuple[Vector, Vector], RowHeight, Extends, DataTextureSizeU):
+def CreateJSON(Bounds : tuple[Vector, Vector], RowHeight, Extends, DataTextureSizeU, FrameBounds = None, PageLayout : TransformPageLayout = None, RowLayout : FrameRowLayout = None):
     # Create the JSON dict
     properties = bpy.context.scene.VATExporter_RegularProperties
     SimulationData = dict()
@@ -312,6 +625,20 @@ def CreateJSON(Bounds : tuple[Vector, Vector], RowHeight, Extends, DataTextureSi
     SimulationData["RowHeight"] = RowHeight
     SimulationData["ExtendsMin"] = list(Extends[0])
     SimulationData["Extendsmax"] = list(Extends[1])
+    SimulationData.update(GetNormalEncodingData())
+    if(FrameBounds != None):
+        SimulationData["FrameBoundsMin"] = FrameBounds[0]
+        SimulationData["FrameBoundsMax"] = FrameBounds[1]
+    if(PageLayout is not None):
+        SimulationData["PageCount"] = PageLayout.PageCount
+        SimulationData["PageWidth"] = PageLayout.Width
+        SimulationData["PageHeight"] = PageLayout.PageHeight
+        SimulationData["FramePages"] = PageLayout.FramePages.tolist()
+        SimulationData["FrameRowOffsets"] = PageLayout.FrameRowOffsets.tolist()
+    if(RowLayout is not None):
+        SimulationData["DataHeight"] = RowLayout.Height
+        SimulationData["FrameDataRowOffsets"] = RowLayout.FrameRowOffsets.tolist()
+        SimulationData["FrameTriangleCounts"] = (RowLayout.FrameElementCounts // 3).tolist()
 
     # Export the JSON
     TargetDirectory = bpy.path.abspath(properties.OutputDirectory)
@@ -341,26 +668,18 @@ def PrepareSelectedObjects(Objects : list[bpy.types.Object]):
 
     return Modifiers
 
-# Getting object data at a certain frame
-def GetObjectAtFrame(Object : bpy.types.Object, Frame : int) -> bpy.types.Object:
-    # Get base variables
-    context = bpy.context
-    scene = context.scene
-    scene.frame_set(Frame)
+# Get (N, 3) positions from within the bounds
+def GetRelativePositions(Positions : np.ndarray, BoundsMin : np.ndarray, BoundsMax : np.ndarray) -> np.ndarray:
+    BoundsSize = np.maximum(BoundsMax - BoundsMin, 0.01)
+    return np.minimum((Positions - BoundsMin) / BoundsSize, 1.0)
 
-    # Get the object at the current frame
-    DependencyGraph = context.view_layer.depsgraph
-    CompareObject = Object.evaluated_get(DependencyGraph)
-
-    return CompareObject
-
-# Get position from within the bounds
-def GetRelativePosition(Position : Vector, BoundsMin : Vector, BoundsMax : Vector) -> Vector:
-    OriginPosition = Position - BoundsMin
-    BoundsSize = BoundsMax - BoundsMin
-    RelativePosition = Vector([min(OriginPosition[i] / max(BoundsSize[i], 0.01), 1.0) for i in range(3)])
-
-    return RelativePosition
+# Get the polygon, the corner within the polygon and the vertex of every loop of a rest pose mesh, ordered by polygon
+def GetRestLoopArrays(RestPoseData : bpy.types.Mesh):
+    LoopStarts, LoopTotals = GetPolygonLoopRanges(RestPoseData)
+    LoopPolygons = np.repeat(np.arange(len(LoopStarts)), LoopTotals)
+    LoopCorners = np.arange(len(LoopPolygons)) - np.repeat(np.cumsum(LoopTotals) - LoopTotals, LoopTotals)
+    RestLoopVertices = GetLoopVertexIndices(RestPoseData)[LoopStarts[LoopPolygons] + LoopCorners]
+    return LoopPolygons, LoopCorners, RestLoopVertices
 
 # Get the texture dimensions
 def GetTextureDimensions(VertexCount : int) -> tuple:
@@ -409,6 +728,18 @@ def IsDefaultExportValid():
     if(FileRotationTexture == "" and FileRotationTextureEnabled):
         Warning = "Incorrect rotation texture name"
         return True, Warning
+    # Check file name for frame row texture
+    FileFrameRowTexture = bpy.path.clean_name(properties.FileFrameRowTexture)
+    FileFrameRowTextureEnabled = properties.FileFrameRowTextureEnabled and properties.VariableFrameRows
+    if(FileFrameRowTexture == "" and FileFrameRowTextureEnabled):
+        Warning = "Incorrect frame row texture name"
+        return True, Warning
+    # Check file name for page table texture
+    FilePageTableTexture = bpy.path.clean_name(properties.FilePageTableTexture)
+    FilePageTableTextureEnabled = properties.FilePageTableTextureEnabled and properties.PagedTransformTexture
+    if(FilePageTableTexture == "" and FilePageTableTextureEnabled):
+        Warning = "Incorrect page table texture name"
+        return True, Warning
     # Check f ile name for data texture
     FileDataTexture = bpy.path.clean_name(properties.FileDataTexture)
     FileDataTextureEnabled = properties.FileDataTextureEnabled
@@ -448,10 +779,17 @@ class VATEXPORTER_OT_RenderDynamic(Operator):
             return {"CANCELLED"}
         
         # Run the main operation
-        bVATError, VATErrorDescription = RenderDynamic()
+        # Put the scene back on its frame, even if the export fails halfway
+        CurrentFrame = context.scene.frame_current
+        try:
+            bVATError, VATReport = RenderDynamic()
+        finally:
+            context.scene.frame_set(CurrentFrame)
         if(bVATError):
-            self.report({"ERROR"}, VATErrorDescription)
+            self.report({"ERROR"}, VATReport)
             return {"CANCELLED"}
+
+        self.report({"INFO"}, VATReport)
         return {"FINISHED"}
 
 def register():
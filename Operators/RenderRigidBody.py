@@ -9,15 +9,54 @@ from math import ceil, floor
 import numpy as np
 from .VATFunctions import (
     FilterSelection,
-    CompareBounds,
     CreateTexture,
     GetExtends,
     GetEvaluationFrame,
     ExportWithLODs,
-    ConvertCoordinate,
-    ConvertQuaternion
+    ConvertCoordinates,
+    GetBasisMatrix,
+    GetWorldMatrices,
+    DecomposeMatrices,
+    ConvertRelativeRotations,
+    GetLocalCorners,
+    GetObjectBounds,
+    GetEvaluatedMesh,
+    CreateUVLayer,
+    GetLoopVertexIndices,
+    GetVertexArrays,
+    CreatePixelBuffer,
+    CreateStagingBuffer,
+    GetFrameSpacing,
+    SelectAdaptiveFrames,
+    CreateFrameTimeTexture,
+    IterateChunks,
+    GetPeakMemory,
+    GetExportReport,
+    FrameSampler,
+    TextureLayout,
+    GetQuantizationMode,
+    GetClusterBounds,
+    NormalizeClusterPositions,
+    CreateClusterBoundsTexture,
+    GetClusterUVs,
+    GetQuantizationData,
+    EvaluateFCurve,
+    QuaternionsToMatrices,
+    EulersToMatrices,
+    ComposeMatrices,
+    ScatterElementUVs,
+    GetCompactionData
 )
 
+# Offsets of the transform channels in the F-curve channel buffer
+FCurveChannels = {
+    "location" : 0,
+    "rotation_euler" : 3,
+    "rotation_quaternion" : 6,
+    "scale" : 10
+}
+FCurveChannelCount = 13
+
 
 # Executing the rigid body VAT render
 def RenderRigidBody(): 
@@ -25,92 +64,173 @@ def RenderRigidBody():
     StartSelection = bpy.context.selected_objects
     SelectedObjects = FilterSelection(StartSelection)
     if(len(SelectedObjects) < 1):
-        return
+        return True, "No valid meshes selected", []
     context = bpy.context
     properties = context.scene.VATExporter_RegularProperties
 
     FrameStart = context.scene.frame_start
     FrameEnd = context.scene.frame_end
-    FrameSpacing = properties.FrameSpacing
+    FrameSpacing = GetFrameSpacing()
 
     # Data so we can "reset" the scene later
     CurrentFrame = bpy.context.scene.frame_current
 
     # Texture data
+    # Frames are written straight into the textures, unless the frames that end up in them are only known after capturing the whole range
     ObjectCount = len(SelectedObjects)
     FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
-    TextureDimensions = GetTextureDimensions(ObjectCount, FrameCount)
-    TextureArraySize = TextureDimensions[0] * TextureDimensions[1]
-    PixelPositions = np.full((TextureArraySize, 4), [0.0, 0.0, 0.0, 1.0])
-    PixelNormals = np.full((TextureArraySize, 4), [0.0, 0.0, 0.0, 1.0])
-    PixelScales = np.ones((TextureArraySize, 4))
-
-    PositionBounds = Vector((0.0, 0.0, 0.0))
-    ScaleBounds = Vector((0.0, 0.0, 0.0))
+    bCaptureFrameStacks = properties.FrameSampling == "ADAPTIVE" or properties.CompactStaticElements
+    FrameLocationStack = FrameRotationStack = FrameScaleStack = PixelPositions = PixelNormals = PixelScales = None
+    if(bCaptureFrameStacks):
+        FrameLocationStack = CreateStagingBuffer((FrameCount, ObjectCount, 3))
+        FrameRotationStack = CreateStagingBuffer((FrameCount, ObjectCount, 4))
+        FrameScaleStack = CreateStagingBuffer((FrameCount, ObjectCount, 3))
+    else:
+        Layout, PixelPositions, PixelNormals, PixelScales = CreateTextureBuffers(ObjectCount, FrameCount)
+
+    PositionBounds = np.zeros(3)
+    ScaleBounds = np.zeros(3)
     ExtendsMin = np.array([np.inf] * 3)
     ExtendsMax = np.array([np.inf * -1] * 3)
+    Sampler = FrameSampler()
     EvaluationFrame = GetEvaluationFrame()
-    CompareLocations, StartScales, StartRotations, StartExtendsMin, StartExtendsMax = PrepareSelectedObjects(SelectedObjects, EvaluationFrame)
+    StartLocations, StartScales, InverseStartRotations, StartExtendsMin, StartExtendsMax = PrepareSelectedObjects(SelectedObjects, EvaluationFrame, Sampler)
+    BasisMatrix = GetBasisMatrix()
+
+    # The pieces don't deform, so their local bounding boxes are read once
+    # Every frame keeps the bounds of all pieces together, and optionally the bounds of every piece
+    LocalCorners = GetLocalCorners(SelectedObjects)
+    FrameBoundsMin = np.zeros((FrameCount, 3))
+    FrameBoundsMax = np.zeros((FrameCount, 3))
+    ObjectBoundsStack = None
+    if(properties.FileAABBTextureEnabled):
+        ObjectBoundsStack = CreateStagingBuffer((FrameCount, ObjectCount, 6))
+
+    # Cluster bounds need the range every object moves in
+    QuantizationMode = GetQuantizationMode()
+    if(QuantizationMode != "GLOBAL"):
+        ObjectMin = np.full((ObjectCount, 3), np.inf, dtype = np.float32)
+        ObjectMax = np.full((ObjectCount, 3), -np.inf, dtype = np.float32)
 
     # Accumulate the VAT data
-    for Frame in range(FrameStart, FrameEnd + 1):
-        # Check if we should write data for this specific frame (if we don't it might break non-cached simulations)
-        bpy.context.scene.frame_set(Frame)
-        if((Frame - FrameStart) % FrameSpacing != 0):
-            continue
-
-        # Loop over the objects and get their position
-        FrameIndex = floor((Frame - FrameStart) / FrameSpacing)
-        VerticalPixelIndex = FrameIndex * TextureDimensions[0]
-        for i, Object in enumerate(SelectedObjects):
-            # Temp object
-            DependencyGraph = context.view_layer.depsgraph
-            CompareObject = Object.evaluated_get(DependencyGraph)
-
-            # Frame data
-            FrameLocation = ConvertCoordinate(CompareObject.matrix_world.translation) - CompareLocations[i]
-            CurrentScale = ConvertCoordinate(CompareObject.matrix_world.to_scale(), FlipAxes = False)
-            FrameScale = Vector([CurrentScale[j] / StartScales[i][j] for j in range(3)])
-            CurrentRotation = CompareObject.matrix_world.to_quaternion()
-            Rotation = ConvertQuaternion(CurrentRotation @ StartRotations[i].inverted())
-
-            # Create the basic data arrays
-            CurrentRow = floor(i / TextureDimensions[0])
-            Remainder = i % TextureDimensions[0]
-            PixelIndex = CurrentRow * FrameCount * TextureDimensions[0] + Remainder + VerticalPixelIndex
-            PositionAlpha = 1.0
-            if(properties.FileScaleTextureEnabled and properties.FileSingleChannelScaleEnabled):
-                PositionAlpha = FrameScale[0]
-            PixelPositions[PixelIndex] = (*FrameLocation, PositionAlpha)
-            PixelNormals[PixelIndex] = Rotation
-            PixelScales[PixelIndex] = (*FrameScale, 1.0)
-
-            # Create the bounds data
-            CompareBounds(PositionBounds, FrameLocation)
-            CompareBounds(ScaleBounds, FrameScale)
-            Corners = [ConvertCoordinate(Object.matrix_world @ Vector(Corner)) for Corner in Object.bound_box]
-            for Corner in Corners:
-                ExtendsMin = np.minimum(ExtendsMin, Corner)
-                ExtendsMax = np.maximum(ExtendsMax, Corner)
+    for Frame, FrameIndex, Matrices in SampleWorldMatrices(SelectedObjects, Sampler, FrameStart, FrameEnd, FrameSpacing):
+        # Frame data of all objects at once
+        Translations, Scales, Rotations = DecomposeMatrices(Matrices)
+        FrameLocations = (ConvertCoordinates(Translations) - StartLocations).astype(np.float32)
+        FrameScales = (ConvertCoordinates(Scales, FlipAxes = False) / StartScales).astype(np.float32)
+        FrameRotations = ConvertRelativeRotations(Rotations, InverseStartRotations, BasisMatrix)
+
+        # Create the extends data
+        ObjectBoundsMin, ObjectBoundsMax = GetObjectBounds(Matrices, LocalCorners)
+        FrameBoundsMin[FrameIndex] = ObjectBoundsMin.min(axis = 0)
+        FrameBoundsMax[FrameIndex] = ObjectBoundsMax.max(axis = 0)
+        np.minimum(ExtendsMin, FrameBoundsMin[FrameIndex], ExtendsMin)
+        np.maximum(ExtendsMax, FrameBoundsMax[FrameIndex], ExtendsMax)
+        if(ObjectBoundsStack is not None):
+            ObjectBoundsStack[FrameIndex, :, :3] = ObjectBoundsMin
+            ObjectBoundsStack[FrameIndex, :, 3:] = ObjectBoundsMax
+
+        # Create the bounds data
+        np.maximum(np.abs(FrameLocations).max(axis = 0), PositionBounds, PositionBounds)
+        np.maximum(np.abs(FrameScales).max(axis = 0), ScaleBounds, ScaleBounds)
+        if(QuantizationMode != "GLOBAL"):
+            np.minimum(ObjectMin, FrameLocations, ObjectMin)
+            np.maximum(ObjectMax, FrameLocations, ObjectMax)
+
+        # Write the frame
+        if(bCaptureFrameStacks):
+            FrameLocationStack[FrameIndex] = FrameLocations
+            FrameRotationStack[FrameIndex] = FrameRotations
+            FrameScaleStack[FrameIndex] = FrameScales
+        else:
+            WriteFrameToTextures(PixelPositions, PixelNormals, PixelScales, Layout.GetFrameIndices(FrameIndex), FrameLocations, FrameRotations, FrameScales)
+
+    # Adaptive sampling: only keep the frames that can't be interpolated and write those to the textures
+    # Rotation and scale errors are weighted by the size of the pieces, so that all errors are expressed as distances
+    # Static pieces are left out of the textures, so only the dynamic pieces get a column
+    SampledFrames = None
+    SourceFrameCount = FrameCount
+    DynamicIndices = np.arange(ObjectCount)
+    if(bCaptureFrameStacks):
+        Radii = GetObjectRadii(SelectedObjects)
+        if(properties.CompactStaticElements):
+            DynamicIndices = GetDynamicPieces(FrameLocationStack, FrameRotationStack, FrameScaleStack, Radii, properties.StaticTolerance)
+        TextureFrames = np.arange(FrameCount)
+        if(properties.FrameSampling == "ADAPTIVE"):
+            SampledFrames = SelectAdaptiveFrames(
+                [FrameLocationStack, FrameRotationStack, FrameScaleStack],
+                properties.AdaptiveTolerance,
+                [1.0, 2.0 * Radii, Radii]
+            )
+            TextureFrames = SampledFrames
+        FrameCount = len(TextureFrames)
+        Layout, PixelPositions, PixelNormals, PixelScales = CreateTextureBuffers(len(DynamicIndices), FrameCount)
+        for TextureFrameIndex, FrameIndex in enumerate(TextureFrames):
+            WriteFrameToTextures(
+                PixelPositions, 
+                PixelNormals, 
+                PixelScales, 
+                Layout.GetFrameIndices(TextureFrameIndex), 
+                FrameLocationStack[FrameIndex][DynamicIndices], 
+                FrameRotationStack[FrameIndex][DynamicIndices], 
+                FrameScaleStack[FrameIndex][DynamicIndices]
+            )
+    del FrameLocationStack, FrameRotationStack, FrameScaleStack
+    TextureDimensions = (Layout.Width, Layout.Height)
     
     # Convert data
     PositionBounds = [max((ceil(axis * 10000)/10000), 0.01) for axis in PositionBounds]
     ScaleBounds = [max((ceil(axis * 10000)/10000), 0.01) for axis in ScaleBounds]
-    PixelPositions = NormalizePositions(PixelPositions, PositionBounds)
+    QuantizationErrors = ClusterMin = ClusterUVs = None
+    if(QuantizationMode != "GLOBAL"):
+        ObjectClusters, ClusterMin, ClusterExtent = GetClusterBounds(QuantizationMode, ObjectMin[DynamicIndices], ObjectMax[DynamicIndices], np.arange(len(DynamicIndices)), Layout)
+        BoundsDimensions = GetTextureDimensions(len(ClusterMin), 2)
+        ClusterUVs = ScatterElementUVs(GetClusterUVs(ObjectClusters, BoundsDimensions), DynamicIndices, ObjectCount)
+        PixelPositions, QuantizationErrors = NormalizeClusterPositions(
+            PixelPositions, 
+            Layout, 
+            ObjectClusters, 
+            ClusterMin, 
+            ClusterExtent, 
+            PositionBounds, 
+            properties.FilePositionTextureFormat
+        )
+        # The alpha channel (packed scale) keeps its regular encoding
+        for Chunk in IterateChunks(PixelPositions):
+            Chunk[:, 3] = np.clip((Chunk[:, 3] + 1.0) / 2.0, 0, 1)
+    else:
+        PixelPositions = NormalizePositions(PixelPositions, PositionBounds)
     PixelNormals = NormalizePositions(PixelNormals, Vector((1.0, 1.0, 1.0)))
     PixelScales = NormalizePositions(PixelScales, ScaleBounds)
 
     # Create exports
+    PixelUVs = ScatterElementUVs(Layout.GetPixelUVs(), DynamicIndices, ObjectCount)
+    LODWarnings = []
     if(properties.FileMeshEnabled):
-        CreateVATMeshes(SelectedObjects, EvaluationFrame, TextureDimensions, FrameCount)
+        if(properties.ShareInstancedMeshes):
+            LODWarnings = CreateInstancedVATMeshes(SelectedObjects, EvaluationFrame, PixelUVs, Sampler, ClusterUVs)
+        else:
+            LODWarnings = CreateVATMeshes(SelectedObjects, EvaluationFrame, PixelUVs, Sampler, ClusterUVs)
     if(properties.FilePositionTextureEnabled):
         CreateTexture(PixelPositions, TextureDimensions[0], TextureDimensions[1], properties.FilePositionTexture, properties.FilePositionTextureFormat)
     if(properties.FileRotationTextureEnabled):
         CreateTexture(PixelNormals, TextureDimensions[0], TextureDimensions[1], properties.FileRotationTexture, properties.FileRotationTextureFormat)
     if(properties.FileScaleTextureEnabled and (not properties.FileSingleChannelScaleEnabled)):
         CreateTexture(PixelScales, TextureDimensions[0], TextureDimensions[1], properties.FileScaleTexture, properties.FileScaleTextureFormat)
+    if(SampledFrames is not None and properties.FileFrameTimeTextureEnabled):
+        CreateFrameTimeTexture(SampledFrames, SourceFrameCount)
+    if(ClusterMin is not None and properties.FileBoundsTextureEnabled):
+        CreateClusterBoundsTexture(ClusterMin, ClusterExtent, BoundsDimensions)
+    TextureFrames = SampledFrames if SampledFrames is not None else np.arange(FrameCount)
+    if(ObjectBoundsStack is not None):
+        CreateAABBTexture(ObjectBoundsStack, TextureFrames, Layout, DynamicIndices)
     if(properties.FileJSONDataEnabled):
         OutputExtendsMin, OutputExtendsMax = GetExtends(ExtendsMin, ExtendsMax, StartExtendsMin, StartExtendsMax)
+        ExtraData = GetQuantizationData(ClusterMin)
+        ExtraData["FrameBoundsMin"] = FrameBoundsMin[TextureFrames].tolist()
+        ExtraData["FrameBoundsMax"] = FrameBoundsMax[TextureFrames].tolist()
+        if(properties.CompactStaticElements):
+            ExtraData.update(GetCompactionData(len(DynamicIndices), ObjectCount))
         CreateJSON(
             PositionBounds, 
             ScaleBounds, 
@@ -118,64 +238,203 @@ def RenderRigidBody():
             OutputExtendsMax, 
             properties,
             TextureDimensions[0],
-            FrameCount
+            FrameCount,
+            SampledFrames,
+            ExtraData
             )
 
     # "Reset" scene
+    del PixelPositions, PixelNormals, PixelScales, ObjectBoundsStack
     bpy.context.scene.frame_current = CurrentFrame
     bpy.ops.object.select_all(action = "DESELECT")
     for SelectedObject in StartSelection:
         SelectedObject.select_set(True)
 
+    return False, GetExportReport("rigid body", Sampler, GetPeakMemory(), QuantizationErrors), LODWarnings
+
+# Create the texture layout and the pixel buffers for the given amount of objects and frames
+def CreateTextureBuffers(ObjectCount : int, FrameCount : int):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    TextureDimensions = GetTextureDimensions(ObjectCount, FrameCount)
+    Layout = TextureLayout(ObjectCount, FrameCount, TextureDimensions)
+    TextureArraySize = TextureDimensions[0] * TextureDimensions[1]
+    PixelPositions = CreatePixelBuffer(TextureArraySize, [0.0, 0.0, 0.0, 1.0], properties.FilePositionTextureFormat)
+    PixelNormals = CreatePixelBuffer(TextureArraySize, [0.0, 0.0, 0.0, 1.0], properties.FileRotationTextureFormat)
+    PixelScales = CreatePixelBuffer(TextureArraySize, [1.0, 1.0, 1.0, 1.0], properties.FileScaleTextureFormat)
+
+    return Layout, PixelPositions, PixelNormals, PixelScales
+
+# Write the transforms of all objects for a single frame to the given texels
+def WriteFrameToTextures(PixelPositions, PixelNormals, PixelScales, PixelIndices, FrameLocations, FrameRotations, FrameScales):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    PixelPositions[PixelIndices, :3] = FrameLocations
+    if(properties.FileScaleTextureEnabled and properties.FileSingleChannelScaleEnabled):
+        PixelPositions[PixelIndices, 3] = FrameScales[:, 0]
+    PixelNormals[PixelIndices] = FrameRotations
+    PixelScales[PixelIndices, :3] = FrameScales
+
+# Create the AABB texture: it uses the columns of the position texture, and every frame has a row with the min and a row with the max of every piece
+# The bounds are stored unnormalized in the target coordinate system
+def CreateAABBTexture(ObjectBoundsStack, Frames : np.ndarray, Layout : TextureLayout, Elements : np.ndarray):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    AABBLayout = TextureLayout(Layout.ElementCount, len(Frames) * 2, (Layout.Width, Layout.Height * 2))
+    PixelBounds = CreatePixelBuffer(AABBLayout.Width * AABBLayout.Height, [0.0, 0.0, 0.0, 1.0], "32")
+    for TextureFrameIndex, FrameIndex in enumerate(Frames):
+        PixelBounds[AABBLayout.GetFrameIndices(TextureFrameIndex * 2), :3] = ObjectBoundsStack[FrameIndex][Elements, :3]
+        PixelBounds[AABBLayout.GetFrameIndices(TextureFrameIndex * 2 + 1), :3] = ObjectBoundsStack[FrameIndex][Elements, 3:]
+    CreateTexture(PixelBounds, AABBLayout.Width, AABBLayout.Height, properties.FileAABBTexture, "32")
+    del PixelBounds
+
+# Get the indices of the pieces that move away from their rest transform by more than the tolerance somewhere in the captured range
+# Rotation and scale deviations are measured at the furthest corner of the piece, so all deviations are distances
+def GetDynamicPieces(FrameLocationStack, FrameRotationStack, FrameScaleStack, Radii : np.ndarray, Tolerance : float) -> np.ndarray:
+    Deviations = np.zeros(len(Radii))
+    for FrameIndex in range(len(FrameLocationStack)):
+        LocationDeviations = np.linalg.norm(FrameLocationStack[FrameIndex], axis = 1)
+        RotationDeviations = 2.0 * Radii * np.linalg.norm(FrameRotationStack[FrameIndex][:, :3], axis = 1)
+        ScaleDeviations = Radii * np.abs(FrameScaleStack[FrameIndex] - 1.0).max(axis = 1)
+        np.maximum(Deviations, LocationDeviations + RotationDeviations + ScaleDeviations, Deviations)
+
+    # The textures need at least one column
+    DynamicIndices = np.flatnonzero(Deviations > Tolerance)
+    if(len(DynamicIndices) == 0):
+        DynamicIndices = np.arange(1)
+    return DynamicIndices
+
+# Whether the world matrix of an object only depends on its own keyframes, so its F-curves can be evaluated without stepping the scene
+def CanEvaluateFCurves(Object : bpy.types.Object) -> bool:
+    AnimationData = Object.animation_data
+    if(AnimationData is None or AnimationData.action is None):
+        return False
+    if(len(AnimationData.drivers) > 0 or len(AnimationData.nla_tracks) > 0):
+        return False
+
+    # The action has to be applied as is, muted curves would still be evaluated below
+    if(AnimationData.action_influence != 1.0 or AnimationData.action_blend_type != "REPLACE"):
+        return False
+    if(any(FCurve.mute for FCurve in AnimationData.action.fcurves)):
+        return False
+    if(Object.parent is not None or len(Object.constraints) > 0 or Object.rigid_body is not None):
+        return False
+    if(Object.rotation_mode == "AXIS_ANGLE"):
+        return False
+
+    # Delta transforms are not part of the channels
+    bHasDeltaTransform = (
+        Vector(Object.delta_location).length > 0.0
+        or tuple(Object.delta_scale) != (1.0, 1.0, 1.0)
+        or Vector(Object.delta_rotation_euler).length > 0.0
+        or tuple(Object.delta_rotation_quaternion) != (1.0, 0.0, 0.0, 0.0)
+    )
+    if(bHasDeltaTransform):
+        return False
+
+    return all(FCurve.data_path in FCurveChannels for FCurve in AnimationData.action.fcurves)
+
+# Evaluate the transform channels of the objects for all frames into a (FrameCount, ObjectCount, 13) buffer
+# Channels without an F-curve keep the current value of the object
+def CaptureFCurveChannels(Objects : list[bpy.types.Object], Frames : np.ndarray):
+    Channels = CreateStagingBuffer((len(Frames), len(Objects), FCurveChannelCount))
+    for i, Object in enumerate(Objects):
+        Channels[:, i] = (*Object.location, *Object.rotation_euler, *Object.rotation_quaternion, *Object.scale)
+        for FCurve in Object.animation_data.action.fcurves:
+            Channels[:, i, FCurveChannels[FCurve.data_path] + FCurve.array_index] = EvaluateFCurve(FCurve, Frames)
+
+    return Channels
+
+# Build the world matrices of one frame of F-curve channels, grouped by rotation mode
+def ComposeChannelMatrices(Channels : np.ndarray, RotationModes : np.ndarray) -> np.ndarray:
+    Channels = np.asarray(Channels, dtype = np.float64)
+    Rotations = np.empty((len(Channels), 3, 3))
+    for RotationMode in np.unique(RotationModes):
+        Mask = RotationModes == RotationMode
+        if(RotationMode == "QUATERNION"):
+            Rotations[Mask] = QuaternionsToMatrices(Channels[Mask, 6:10])
+        else:
+            Rotations[Mask] = EulersToMatrices(Channels[Mask, 3:6], RotationMode)
+
+    return ComposeMatrices(Channels[:, 0:3], Rotations, Channels[:, 10:13])
+
+# Yields (Frame, FrameIndex, Matrices) for every sampled frame, with the (N, 4, 4) world matrices of all objects
+# Objects that only follow their own keyframes are evaluated from their F-curves up front, the scene is only stepped for the other objects
+def SampleWorldMatrices(Objects : list[bpy.types.Object], Sampler : FrameSampler, FrameStart : int, FrameEnd : int, FrameSpacing : int):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    bCanEvaluate = np.array([properties.UseFCurveFastPath and CanEvaluateFCurves(Object) for Object in Objects], dtype = bool)
+    FastIndices = np.flatnonzero(bCanEvaluate)
+    SlowIndices = np.flatnonzero(~bCanEvaluate)
+    SlowObjects = [Objects[i] for i in SlowIndices]
+
+    Frames = np.arange(FrameStart, FrameEnd + 1, FrameSpacing)
+    if(len(FastIndices) > 0):
+        FastObjects = [Objects[i] for i in FastIndices]
+        Channels = CaptureFCurveChannels(FastObjects, Frames)
+        RotationModes = np.array([Object.rotation_mode for Object in FastObjects])
+
+    # Nothing has to be evaluated by the depsgraph
+    if(len(SlowIndices) == 0):
+        for FrameIndex, Frame in enumerate(Frames):
+            yield int(Frame), FrameIndex, ComposeChannelMatrices(Channels[FrameIndex], RotationModes)
+        del Channels
+        return
+
+    Matrices = np.empty((len(Objects), 4, 4))
+    for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameEnd, FrameSpacing):
+        if(len(FastIndices) > 0):
+            Matrices[FastIndices] = ComposeChannelMatrices(Channels[FrameIndex], RotationModes)
+        Matrices[SlowIndices] = GetWorldMatrices(SlowObjects, DependencyGraph)
+        yield Frame, FrameIndex, Matrices
+
+    if(len(FastIndices) > 0):
+        del Channels
+
+# Get the distance from the origin to the furthest bounding box corner of each object
+def GetObjectRadii(Objects : list[bpy.types.Object]) -> np.ndarray:
+    Radii = np.zeros(len(Objects))
+    for i, Object in enumerate(Objects):
+        Basis = Object.matrix_world.to_3x3()
+        Radii[i] = max((Basis @ Vector(Corner)).length for Corner in Object.bound_box)
+
+    return Radii
+
 # Prepare the objects at the evaluation frame
-def PrepareSelectedObjects(Objects : list[bpy.types.Object], EvaluationFrame : int, bShouldTransform : bool = True):
-    context = bpy.context
-    scene = context.scene
+def PrepareSelectedObjects(Objects : list[bpy.types.Object], EvaluationFrame : int, Sampler : FrameSampler, bShouldTransform : bool = True):
     StartExtendsMin = np.array([np.inf] * 3)
     StartExtendsMax = np.array([np.inf * -1] * 3)
-    CompareLocations = []
-    StartScales = []
-    StartRotations = []
 
-    for Object in Objects:
-        # Create compare meshes
-        scene.frame_set(EvaluationFrame)
-        DependencyGraph = context.view_layer.depsgraph
-        CompareObject = Object.evaluated_get(DependencyGraph)
-
-        CompareMatrix = CompareObject.matrix_world.copy()
-        CompareLocation = ConvertCoordinate(CompareMatrix.translation)
-        CompareLocations.append(CompareLocation)
-        StartScale = Vector((ConvertCoordinate(CompareObject.matrix_world.to_scale(), FlipAxes = False)))
-        StartScales.append(StartScale)
-        StartRotation = CompareMatrix.to_quaternion()
-        StartRotations.append(StartRotation)
-
-        # Return extends
-        Corners = [Object.matrix_world @ Vector(Corner) for Corner in Object.bound_box]
-        for Corner in Corners:
-            StartExtendsMin = np.minimum(StartExtendsMin, ConvertCoordinate(Corner))
-            StartExtendsMax = np.maximum(StartExtendsMax, ConvertCoordinate(Corner))
+    # Rest transforms of all objects at once
+    DependencyGraph = Sampler.SetFrame(EvaluationFrame)
+    Matrices = GetWorldMatrices(Objects, DependencyGraph)
+    Translations, Scales, Rotations = DecomposeMatrices(Matrices)
+    StartLocations = ConvertCoordinates(Translations)
+    StartScales = ConvertCoordinates(Scales, FlipAxes = False)
+    InverseStartRotations = Rotations.transpose(0, 2, 1)
+
+    # Return extends
+    ObjectBoundsMin, ObjectBoundsMax = GetObjectBounds(Matrices, GetLocalCorners(Objects))
+    np.minimum(StartExtendsMin, ObjectBoundsMin.min(axis = 0), StartExtendsMin)
+    np.maximum(StartExtendsMax, ObjectBoundsMax.max(axis = 0), StartExtendsMax)
     
-    return CompareLocations, StartScales, StartRotations, StartExtendsMin, StartExtendsMax
+    return StartLocations, StartScales, InverseStartRotations, StartExtendsMin, StartExtendsMax
 
 # Bring positions to a range from 0-1 based on the maximum calculated bounds
+# This happens in place and in chunks, so it also works as a streaming pass over memory-mapped buffers
 def NormalizePositions(Positions, Bounds):
     # Move positions into range
-    NormalizedPositions = Positions / np.array((*Bounds, 1.0))
-    NormalizedPositions += np.array((1,1,1,1))
-    NormalizedPositions /= np.array((2,2,2,2))
-    NormalizedPositions = np.clip(NormalizedPositions, 0, 1)
+    for Chunk in IterateChunks(Positions):
+        Chunk /= np.array((*Bounds, 1.0))
+        Chunk += np.array((1,1,1,1))
+        Chunk /= np.array((2,2,2,2))
+        np.clip(Chunk, 0, 1, Chunk)
 
-    return NormalizedPositions
+    return Positions
 
 # Create the JSON file for rigid body sims
-def CreateJSON(PositionBounds, ScaleBounds, ExtendsMin, ExtendsMax, properties, PixelCountU, RowHeight):
+def CreateJSON(PositionBounds, ScaleBounds, ExtendsMin, ExtendsMax, properties, PixelCountU, RowHeight, SampledFrames = None, ExtraData = None):
     # Create the dict
     properties = bpy.context.scene.VATExporter_RegularProperties
     SimulationData = dict()
     SimulationData["Type"] = "RIGID"
-    SimulationData["FPS"] = int(bpy.context.scene.render.fps / properties.FrameSpacing)
+    SimulationData["FPS"] = int(bpy.context.scene.render.fps / GetFrameSpacing())
     SimulationData["PixelCountU"] = PixelCountU
     SimulationData["RowHeight"] = RowHeight
     SimulationData["PositionBounds"] = PositionBounds
@@ -184,6 +443,10 @@ def CreateJSON(PositionBounds, ScaleBounds, ExtendsMin, ExtendsMax, properties,
     SimulationData["ExtendsMax"] = ExtendsMax.tolist()
     SimulationData["ScaleEnabled"] = 1.0 if properties.FileScaleTextureEnabled else 0.0
     SimulationData["PackedScale"] = 1.0 if (properties.FileScaleTextureEnabled and properties.FileSingleChannelScaleEnabled) else 0.0
+    if(SampledFrames is not None):
+        SimulationData["SampledFrames"] = SampledFrames.tolist()
+    if(ExtraData != None):
+        SimulationData.update(ExtraData)
 
     # Export to JSON file
     TargetDirectory = bpy.path.abspath(properties.OutputDirectory)
@@ -193,53 +456,30 @@ def CreateJSON(PositionBounds, ScaleBounds, ExtendsMin, ExtendsMax, properties,
         json.dump(SimulationData, File, indent = 2)
 
 # Creates the mesh for exporting
-def CreateVATMeshes(Objects : list[bpy.types.Object], StartFrame, TextureDimensions, FrameCount):
-    scene = bpy.context.scene
-    scene.frame_set(StartFrame)
+def CreateVATMeshes(Objects : list[bpy.types.Object], StartFrame, PixelUVs : np.ndarray, Sampler : FrameSampler, ClusterUVs = None):
+    DependencyGraph = Sampler.SetFrame(StartFrame)
     bpy.ops.Object.select_all(action = "DESELECT")
     NewObjects = []
     NewDatas = []
     for i, Object in enumerate(Objects):
         # Create a copy of the object
-        NewData = GetMeshAtFrame(Object, StartFrame)
+        NewData = GetEvaluatedMesh(Object, DependencyGraph)
         NewObject = bpy.data.objects.new(name = Object.name, object_data = NewData)
         bpy.context.collection.objects.link(NewObject)
 
         # Setting the UVs (sample texture UVs)
-        bm = bmesh.new()
-        bm.from_mesh(NewData)
-        bmesh.ops.triangulate(bm, faces = bm.faces[:])
-        bm.to_mesh(NewData)
-        bm.free()
-        NewData.update()
-        PixelUVLayer = NewObject.data.uv_layers.new(name = "PixelUVs")
-        OriginUVLayer1 = NewObject.data.uv_layers.new(name = "OriginUVs1")
-        OriginUVLayer2 = NewObject.data.uv_layers.new(name = "OriginUVs2")
-        Vertices = NewObject.data.vertices
-
-        # Write UV data
-        CurrentRow = floor(i / TextureDimensions[0])
-        Remainder = i % TextureDimensions[0]
-        for Loop in NewObject.data.loops:
-            Coordinate = (
-                (Remainder + 0.5) / TextureDimensions[0],
-                (CurrentRow * FrameCount + 0.5) / TextureDimensions[1]
-            )
-            PixelUVLayer.data[Loop.index].uv = Coordinate
-            VertexLocation = ConvertCoordinate(Vertices[Loop.vertex_index].co - Object.matrix_world.translation)
-            OriginUVLayer1.data[Loop.index].uv = (
-                VertexLocation[0],
-                1.0
-            )
-            OriginUVLayer2.data[Loop.index].uv = (
-                VertexLocation[1],
-                1.0 - VertexLocation[2]
-            )
+        TriangulateMesh(NewData)
+        CreateUVLayer(NewData, "PixelUVs", np.broadcast_to(PixelUVs[i], (len(NewData.loops), 2)))
+        if(ClusterUVs is not None):
+            CreateUVLayer(NewData, "ClusterUVs", np.broadcast_to(ClusterUVs[i], (len(NewData.loops), 2)))
+
+        # Write the offset of every vertex to the origin of its piece
+        CreateOriginUVLayers(NewData, np.array(Object.matrix_world.translation, dtype = np.float32))
         
         NewObjects.append(NewObject)
         NewDatas.append(NewData)
     
-    ExportWithLODs(NewObjects)
+    LODWarnings = ExportWithLODs(NewObjects)
 
     # Remove the objects and meshes after we were done with them
     for NewObject, NewData in zip(NewObjects, NewDatas):
@@ -247,22 +487,113 @@ def CreateVATMeshes(Objects : list[bpy.types.Object], StartFrame, TextureDimensi
         bpy.data.meshes.remove(NewData)
         pass
 
-# Get the object data at a certain frame
-def GetMeshAtFrame(Object : bpy.types.Object, Frame, bShouldTransform : bool = True):
-    # Base variables
-    context = bpy.context
-    scene = context.scene
-    scene.frame_set(Frame)
+    return LODWarnings
+
+# Creates one mesh per group of objects sharing their mesh data and modifiers, and an instance table that places every piece
+# The meshes stay in object space, the instance table holds the rest transform and texture UVs of every piece
+def CreateInstancedVATMeshes(Objects : list[bpy.types.Object], StartFrame, PixelUVs : np.ndarray, Sampler : FrameSampler, ClusterUVs = None):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    DependencyGraph = Sampler.SetFrame(StartFrame)
+
+    # Rest transforms of every piece in the target coordinate system
+    Translations, Scales, Rotations = DecomposeMatrices(GetWorldMatrices(Objects, DependencyGraph))
+    Origins = ConvertCoordinates(Translations)
+    RestScales = ConvertCoordinates(Scales, FlipAxes = False)
+    RestRotations = ConvertRelativeRotations(Rotations, np.broadcast_to(np.eye(3), Rotations.shape), GetBasisMatrix())
+
+    NewObjects = []
+    NewDatas = []
+    Instances = []
+    for MeshIndex, ObjectIndices in enumerate(GroupInstancedObjects(Objects)):
+        # Build the mesh of the first object of the group, without its transform
+        Object = Objects[ObjectIndices[0]]
+        NewData = GetEvaluatedMesh(Object, DependencyGraph, bShouldTransform = False)
+        NewObject = bpy.data.objects.new(name = Object.name, object_data = NewData)
+        bpy.context.collection.objects.link(NewObject)
+        TriangulateMesh(NewData)
+        CreateOriginUVLayers(NewData, np.zeros(3, dtype = np.float32))
+        NewObjects.append(NewObject)
+        NewDatas.append(NewData)
+
+        for i in ObjectIndices:
+            Instance = {
+                "Piece" : i,
+                "Mesh" : MeshIndex,
+                "Origin" : Origins[i].tolist(),
+                "Rotation" : RestRotations[i].tolist(),
+                "Scale" : RestScales[i].tolist(),
+                "PixelUV" : PixelUVs[i].tolist()
+            }
+            if(ClusterUVs is not None):
+                Instance["ClusterUV"] = ClusterUVs[i].tolist()
+            Instances.append(Instance)
+
+    LODWarnings = ExportWithLODs(NewObjects)
+
+    # Export the instance table next to the mesh
+    InstanceTable = dict()
+    InstanceTable["Meshes"] = [NewObject.name for NewObject in NewObjects]
+    InstanceTable["Instances"] = sorted(Instances, key = lambda Instance : Instance["Piece"])
+    TargetDirectory = bpy.path.abspath(properties.OutputDirectory)
+    FileName = bpy.path.clean_name(properties.FileMeshName + "_Instances")
+    TargetFile = os.path.join(TargetDirectory, FileName + ".json")
+    with open(TargetFile, "w") as File:
+        json.dump(InstanceTable, File, indent = 2)
+
+    # Remove the objects and meshes after we were done with them
+    for NewObject, NewData in zip(NewObjects, NewDatas):
+        bpy.data.objects.remove(NewObject)
+        bpy.data.meshes.remove(NewData)
 
-    # Creating a new measure object at the current frame
-    DependencyGraph = context.view_layer.depsgraph
-    CompareObject = Object.evaluated_get(DependencyGraph)
-    TemporaryMesh = bpy.data.meshes.new_from_object(CompareObject)
-    if(bShouldTransform):
-        TemporaryMesh.transform(Object.matrix_world)
+    return LODWarnings
 
-    # Return
-    return TemporaryMesh
+# Group the indices of the objects that share their mesh data and modifier stack
+def GroupInstancedObjects(Objects : list[bpy.types.Object]) -> list[list[int]]:
+    Groups = dict()
+    for i, Object in enumerate(Objects):
+        Key = (Object.data.as_pointer(), GetModifierSignature(Object))
+        Groups.setdefault(Key, []).append(i)
+    return list(Groups.values())
+
+# The type and settings of every modifier of the object, so objects with the same modifier stack produce the same mesh
+def GetModifierSignature(Object : bpy.types.Object) -> tuple:
+    Signature = []
+    for Modifier in Object.modifiers:
+        Settings = [Modifier.type]
+        for Property in Modifier.bl_rna.properties:
+            if(Property.is_readonly or Property.type == "COLLECTION" or Property.identifier in ("name", "show_expanded", "is_active")):
+                continue
+            Value = getattr(Modifier, Property.identifier)
+            if(Property.type == "POINTER"):
+                Value = Value.as_pointer() if Value != None else None
+            elif(isinstance(Value, set)):
+                Value = frozenset(Value)
+            elif(not isinstance(Value, (str, bool, int, float))):
+                Value = tuple(Value)
+            Settings.append((Property.identifier, Value))
+        Signature.append(tuple(Settings))
+    return tuple(Signature)
+
+# Triangulate the mesh in place
+def TriangulateMesh(Mesh : bpy.types.Mesh):
+    bm = bmesh.new()
+    bm.from_mesh(Mesh)
+    bmesh.ops.triangulate(bm, faces = bm.faces[:])
+    bm.to_mesh(Mesh)
+    bm.free()
+    Mesh.update()
+
+# Write the offset of every vertex to the given origin into the OriginUVs1 and OriginUVs2 layers
+def CreateOriginUVLayers(Mesh : bpy.types.Mesh, Origin : np.ndarray):
+    Positions, _ = GetVertexArrays(Mesh)
+    LoopLocations = ConvertCoordinates(Positions - Origin)[GetLoopVertexIndices(Mesh)]
+    OriginUVs1 = np.ones((len(LoopLocations), 2), dtype = np.float32)
+    OriginUVs1[:, 0] = LoopLocations[:, 0]
+    OriginUVs2 = np.empty((len(LoopLocations), 2), dtype = np.float32)
+    OriginUVs2[:, 0] = LoopLocations[:, 1]
+    OriginUVs2[:, 1] = 1.0 - LoopLocations[:, 2]
+    CreateUVLayer(Mesh, "OriginUVs1", OriginUVs1)
+    CreateUVLayer(Mesh, "OriginUVs2", OriginUVs2)
 
 # Calculates the texture dimensions based on the user's settings
 def GetTextureDimensions(PixelCountU : int, FrameCount : int):
@@ -313,6 +644,23 @@ def IsDefaultExportValid():
     if(FileScaleTexture == "" and FileScaleTextureEnabled):
         Warning = "Incorrect scale texture name"
         return False, Warning
+    # Check file name for frame time texture
+    FileFrameTimeTexture = bpy.path.clean_name(properties.FileFrameTimeTexture)
+    FileFrameTimeTextureEnabled = properties.FileFrameTimeTextureEnabled and properties.FrameSampling == "ADAPTIVE"
+    if(FileFrameTimeTexture == "" and FileFrameTimeTextureEnabled):
+        Warning = "Incorrect frame time texture name"
+        return False, Warning
+    # Check file name for bounds texture
+    FileBoundsTexture = bpy.path.clean_name(properties.FileBoundsTexture)
+    FileBoundsTextureEnabled = properties.FileBoundsTextureEnabled and GetQuantizationMode() != "GLOBAL"
+    if(FileBoundsTexture == "" and FileBoundsTextureEnabled):
+        Warning = "Incorrect bounds texture name"
+        return False, Warning
+    # Check file name for AABB texture
+    FileAABBTexture = bpy.path.clean_name(properties.FileAABBTexture)
+    if(FileAABBTexture == "" and properties.FileAABBTextureEnabled):
+        Warning = "Incorrect AABB texture name"
+        return False, Warning
 
     return True, ""
 
@@ -365,7 +713,19 @@ class VATEXPORTER_OT_RenderRigidBody(Operator):
             self.report({"ERROR"}, Warning)
             return {"CANCELLED"}
 
-        RenderRigidBody()
+        # Put the scene back on its frame, even if the export fails halfway
+        CurrentFrame = context.scene.frame_current
+        try:
+            bVATError, VATReport, LODWarnings = RenderRigidBody()
+        finally:
+            context.scene.frame_set(CurrentFrame)
+        if(bVATError):
+            self.report({"ERROR"}, VATReport)
+            return {"CANCELLED"}
+
+        for LODWarning in LODWarnings:
+            self.report({"WARNING"}, LODWarning)
+        self.report({"INFO"}, VATReport)
         return {"FINISHED"}
 
 def register():
@@ -10,12 +10,39 @@ from importlib import reload
 from .VATFunctions import (
     CreateTexture,
     FilterSelection, 
-    CompareBounds, 
-    UnsignVector, 
     ExportWithLODs, 
     GetExtends,
-    ConvertCoordinate,
-    GetEvaluationFrame
+    ConvertCoordinates,
+    UnsignVectors,
+    GetVertexArrays,
+    GetEvaluatedMesh,
+    GetEvaluationFrame,
+    GetLoopVertexIndices,
+    CreateUVLayer,
+    CreatePixelBuffer,
+    CreateStagingBuffer,
+    ChunkTexelCount,
+    WriteNormals,
+    GetNormalEncoding,
+    GetPositionTextureFormat,
+    GetNormalEncodingData,
+    GetNormalChannelCount,
+    GetQuantizationMode,
+    GetClusterBounds,
+    NormalizeClusterPositions,
+    CreateClusterBoundsTexture,
+    GetClusterUVs,
+    GetQuantizationData,
+    GetFrameSpacing,
+    SelectAdaptiveFrames,
+    CreateFrameTimeTexture,
+    IterateChunks,
+    GetPeakMemory,
+    GetExportReport,
+    FrameSampler,
+    TextureLayout,
+    ScatterElementUVs,
+    GetCompactionData
 )
 
 # Softbody calculation
@@ -24,82 +51,88 @@ def RenderSoftbodyVAT():
     StartSelection = bpy.context.selected_objects
     SelectedObjects = FilterSelection(StartSelection)
     if(len(SelectedObjects) < 1):
-        return True, "No valid meshes selected"
+        return True, "No valid meshes selected", []
     context = bpy.context
     properties = context.scene.VATExporter_RegularProperties
     bCaughtVATError = False
 
     FrameStart = context.scene.frame_start
     FrameEnd = context.scene.frame_end
-    FrameSpacing = properties.FrameSpacing
+    FrameSpacing = GetFrameSpacing()
 
     # Data so we can "reset" the scene at the end
     FrameCurrent = context.scene.frame_current
     StartActive = bpy.context.active_object
 
     # Prepare selected objects
+    Sampler = FrameSampler()
     EvaluationFrame = GetEvaluationFrame()
-    EdgeSplitModifiers, VertexCount, StartVertices, CompareMeshes, StartExtendsMin, StartExtendsMax = PrepareSelectedObjects(SelectedObjects, EvaluationFrame)
+    EdgeSplitModifiers, VertexCount, ObjectVertexCounts, StartPositions, StartExtendsMin, StartExtendsMax = PrepareSelectedObjects(SelectedObjects, EvaluationFrame, Sampler)
     FrameCount = ceil((FrameEnd - FrameStart + 1) / FrameSpacing)
     
     # Initialize export data
-    TextureDimensions = GetTextureDimensions(VertexCount, FrameCount)
-    TextureArraySize = TextureDimensions[0] * TextureDimensions[1]
-    PixelPositions = np.full((TextureArraySize, 4), [0.0, 0.0, 0.0, 1.0])
-    PixelNormals = np.full((TextureArraySize, 4), [0.0, 0.0, 0.0, 1.0])
-    Bounds = Vector((0.0, 0.0, 0.0))
+    # Frames are written straight into the textures, unless the frames that end up in them are only known after capturing the whole range
+    bIsCompressed = properties.SoftBodyCompression == "PCA"
+    bCaptureFrameStacks = properties.FrameSampling == "ADAPTIVE" or bIsCompressed or properties.CompactStaticElements
+    FramePositions = FrameNormals = PixelPositions = PixelNormals = None
+    if(bCaptureFrameStacks):
+        FramePositions = CreateStagingBuffer((FrameCount, VertexCount, 3))
+        FrameNormals = CreateStagingBuffer((FrameCount, VertexCount, 3))
+    else:
+        Layout, PixelPositions, PixelNormals = CreateTextureBuffers(VertexCount, FrameCount)
+    Bounds = np.zeros(3)
     ExtendsMin = np.array([np.inf] * 3)
     ExtendsMax = np.array([np.inf * -1] * 3)
 
-    # Start VAT process
-    PrevFrameVertexCount = 0
-    for Frame in range(FrameStart, FrameEnd + 1):
-        # Check if we should write data for this specific frame (if we don't it might break non-cached simulations)
-        if((Frame - FrameStart) % FrameSpacing != 0):
-            bpy.context.scene.frame_set(Frame)
-            continue
+    # Cluster bounds need the range every vertex moves in
+    QuantizationMode = GetQuantizationMode()
+    if(QuantizationMode != "GLOBAL"):
+        VertexMin = np.full((VertexCount, 3), np.inf, dtype = np.float32)
+        VertexMax = np.full((VertexCount, 3), -np.inf, dtype = np.float32)
 
+    # Start VAT process
+    for Frame, FrameIndex, DependencyGraph in Sampler.SampleFrames(FrameStart, FrameEnd, FrameSpacing):
         # Start writing to frame
-        FrameIndex = floor((Frame - FrameStart) / FrameSpacing)
-        VerticalPixelIndex = FrameIndex * TextureDimensions[0]
         FrameVertexCount = 0
-        for SelectedObject in SelectedObjects:   
+        for i, SelectedObject in enumerate(SelectedObjects):   
             # Get data from the frame
-            CompareMesh = GetMeshAtFrame(SelectedObject, Frame)
-            Vertices = CompareMesh.vertices
-
-            # Create vertex offset and normals data
-            for Vertex in Vertices:
-                # Get the vertex data
-                CompareVertex = StartVertices[FrameVertexCount + Vertex.index]
-                PositionOffset = ConvertCoordinate(Vertex.co - CompareVertex.co)
-                VertexNormal = UnsignVector(ConvertCoordinate(Vertex.normal.copy()))
-
-                # Update extends for correct culling
-                ConvertedPosition = ConvertCoordinate(Vertex.co)
-                np.minimum(ConvertedPosition[:], ExtendsMin, ExtendsMin)
-                np.maximum(ConvertedPosition[:], ExtendsMax, ExtendsMax)
-                
-                # Write the vertex data to the array
-                CurrentRow = floor((FrameVertexCount + Vertex.index) / TextureDimensions[0])
-                Remainder = (FrameVertexCount +  Vertex.index) % TextureDimensions[0]
-                TextureArrayIndex = CurrentRow * TextureDimensions[0] * FrameCount + Remainder + VerticalPixelIndex
-                PixelPositions[TextureArrayIndex] = (*PositionOffset, 1.0)
-                PixelNormals[TextureArrayIndex] = (*VertexNormal, 1.0)
-
-                # Update bounds
-                CompareBounds(Bounds, PositionOffset)
-            
-            ObjectVertexCount = len(Vertices)
+            CompareMesh = GetEvaluatedMesh(SelectedObject, DependencyGraph)
+            Positions, Normals = GetVertexArrays(CompareMesh)
             bpy.data.meshes.remove(CompareMesh)
 
+            # The vertex count has to match the rest pose for every object
+            ObjectVertexCount = len(Positions)
+            if(ObjectVertexCount != ObjectVertexCounts[i]):
+                bCaughtVATError = True
+                break
+
+            # Create vertex offset and normals data for the whole object at once
+            VertexSlice = slice(FrameVertexCount, FrameVertexCount + ObjectVertexCount)
+            PositionOffsets = ConvertCoordinates(Positions - StartPositions[VertexSlice])
+            VertexNormals = UnsignVectors(ConvertCoordinates(Normals))
+
+            # Update extends for correct culling
+            ConvertedPositions = ConvertCoordinates(Positions)
+            np.minimum(ConvertedPositions.min(axis = 0, initial = np.inf), ExtendsMin, ExtendsMin)
+            np.maximum(ConvertedPositions.max(axis = 0, initial = -np.inf), ExtendsMax, ExtendsMax)
+
+            # Write the vertex data to the array
+            if(bCaptureFrameStacks):
+                FramePositions[FrameIndex, VertexSlice] = PositionOffsets
+                FrameNormals[FrameIndex, VertexSlice] = VertexNormals
+            else:
+                TextureArrayIndices = Layout.GetFrameIndices(FrameIndex, VertexSlice)
+                PixelPositions[TextureArrayIndices, :3] = PositionOffsets
+                WriteNormals(PixelPositions, PixelNormals, TextureArrayIndices, VertexNormals)
+
+            # Update bounds
+            np.maximum(np.abs(PositionOffsets).max(axis = 0, initial = 0.0), Bounds, Bounds)
+            if(QuantizationMode != "GLOBAL"):
+                np.minimum(VertexMin[VertexSlice], PositionOffsets, VertexMin[VertexSlice])
+                np.maximum(VertexMax[VertexSlice], PositionOffsets, VertexMax[VertexSlice])
+
             # Update local array position
             FrameVertexCount += ObjectVertexCount
-        
-        # Check if the vertex count decreases this frame
-        if(Frame != FrameStart and FrameVertexCount != PrevFrameVertexCount):
-            bCaughtVATError = True
-        PrevFrameVertexCount = FrameVertexCount
 
         # Loop out of the frame loop if we encounter an error with the VAT objects
         if(bCaughtVATError):
@@ -108,32 +141,111 @@ def RenderSoftbodyVAT():
     # Error out if the loop encountered irregular polycounts
     if(bCaughtVATError):
         RemoveEdgeSplit(SelectedObjects, EdgeSplitModifiers)
-        return True, "The polycount is changing per frame, which is not allowed with VATs. Check your modifiers."
+        del PixelPositions, PixelNormals, FramePositions, FrameNormals
+        return True, "The polycount is changing per frame, which is not allowed with VATs. Check your modifiers.", []
+
+    # Static vertices are left out of the textures, so only the moving vertices get a column
+    DynamicIndices = np.arange(VertexCount)
+    if(properties.CompactStaticElements):
+        DynamicIndices = GetDynamicVertices(FramePositions, properties.StaticTolerance)
+
+    # Adaptive sampling: only keep the frames that can't be interpolated and write those to the textures
+    SampledFrames = None
+    SourceFrameCount = FrameCount
+    if(properties.FrameSampling == "ADAPTIVE"):
+        SampledFrames = SelectAdaptiveFrames([FramePositions], properties.AdaptiveTolerance)
+        FrameCount = len(SampledFrames)
+
+    # Eigen shape compression: the texture rows hold the mean shape and the basis shapes instead of frames
+    CompressionData = None
+    if(bIsCompressed):
+        PositionShapes, NormalShapes, ShapeWeights, MaxError = CreateEigenShapes(
+            FramePositions, 
+            FrameNormals, 
+            SampledFrames, 
+            properties.CompressionErrorBudget, 
+            properties.MaxEigenShapeCount
+        )
+        ShapeCount = len(ShapeWeights[0])
+        Layout, PixelPositions, PixelNormals = CreateTextureBuffers(len(DynamicIndices), ShapeCount + 1)
+        for ShapeIndex in range(ShapeCount + 1):
+            TextureArrayIndices = Layout.GetFrameIndices(ShapeIndex)
+            PixelPositions[TextureArrayIndices, :3] = PositionShapes[ShapeIndex][DynamicIndices]
+            PixelNormals[TextureArrayIndices, :3] = NormalShapes[ShapeIndex][DynamicIndices]
+        Bounds = np.abs(PositionShapes).max(axis = (0, 1))
+        PixelNormals, NormalBounds = NormalizePositions(PixelNormals, np.abs(NormalShapes).max(axis = (0, 1)))
+        CompressionData = {
+            "Compression" : "PCA",
+            "ShapeCount" : ShapeCount,
+            "FrameCount" : FrameCount,
+            "NormalBounds" : NormalBounds,
+            "WeightPixelCountU" : GetWeightTextureWidth(ShapeCount),
+            "MaxError" : MaxError
+        }
+    elif(bCaptureFrameStacks):
+        TextureFrames = SampledFrames if SampledFrames is not None else np.arange(FrameCount)
+        Layout, PixelPositions, PixelNormals = CreateTextureBuffers(len(DynamicIndices), FrameCount)
+        for TextureFrameIndex, FrameIndex in enumerate(TextureFrames):
+            TextureArrayIndices = Layout.GetFrameIndices(TextureFrameIndex)
+            PixelPositions[TextureArrayIndices, :3] = FramePositions[FrameIndex][DynamicIndices]
+            WriteNormals(PixelPositions, PixelNormals, TextureArrayIndices, FrameNormals[FrameIndex][DynamicIndices])
+    del FramePositions, FrameNormals
+    TextureDimensions = (Layout.Width, Layout.Height)
 
     # Get the correct position data normalized for pixels and get the bounds
-    PixelPositions, Bounds = NormalizePositions(PixelPositions, Bounds)    
+    QuantizationErrors = ClusterMin = ClusterUVs = None
+    if(QuantizationMode != "GLOBAL"):
+        ObjectIndices = np.repeat(np.arange(len(SelectedObjects)), ObjectVertexCounts)
+        VertexClusters, ClusterMin, ClusterExtent = GetClusterBounds(QuantizationMode, VertexMin[DynamicIndices], VertexMax[DynamicIndices], ObjectIndices[DynamicIndices], Layout)
+        BoundsDimensions = GetTextureDimensions(len(ClusterMin), 2)
+        ClusterUVs = ScatterElementUVs(GetClusterUVs(VertexClusters, BoundsDimensions), DynamicIndices, VertexCount)
+        Bounds = [max((ceil(axis * 10000)/10000), 0.01) for axis in Bounds]
+        PixelPositions, QuantizationErrors = NormalizeClusterPositions(
+            PixelPositions, 
+            Layout, 
+            VertexClusters, 
+            ClusterMin, 
+            ClusterExtent, 
+            Bounds, 
+            GetPositionTextureFormat()
+        )
+    else:
+        PixelPositions, Bounds = NormalizePositions(PixelPositions, Bounds)    
 
     # Create the export data
+    PixelUVs = ScatterElementUVs(Layout.GetPixelUVs(), DynamicIndices, VertexCount)
+    LODWarnings = []
     if(properties.FileMeshEnabled):
-        CreateVATMeshes(SelectedObjects, TextureDimensions, FrameCount, EvaluationFrame)
+        LODWarnings = CreateVATMeshes(SelectedObjects, PixelUVs, EvaluationFrame, Sampler, ClusterUVs)
     if(properties.FilePositionTextureEnabled):
-        CreateTexture(PixelPositions, TextureDimensions[0], TextureDimensions[1], properties.FilePositionTexture, properties.FilePositionTextureFormat)
-    if(properties.FileRotationTextureEnabled):
-        CreateTexture(PixelNormals, TextureDimensions[0], TextureDimensions[1], properties.FileRotationTexture, properties.FileRotationTextureFormat)
+        CreateTexture(PixelPositions, TextureDimensions[0], TextureDimensions[1], properties.FilePositionTexture, GetPositionTextureFormat())
+    if(properties.FileRotationTextureEnabled and PixelNormals is not None):
+        CreateTexture(PixelNormals, TextureDimensions[0], TextureDimensions[1], properties.FileRotationTexture, properties.FileRotationTextureFormat, GetNormalChannelCount())
+    if(SampledFrames is not None and properties.FileFrameTimeTextureEnabled):
+        CreateFrameTimeTexture(SampledFrames, SourceFrameCount)
+    if(bIsCompressed and properties.FileWeightTextureEnabled):
+        CreateWeightTexture(ShapeWeights)
+    if(ClusterMin is not None and properties.FileBoundsTextureEnabled):
+        CreateClusterBoundsTexture(ClusterMin, ClusterExtent, BoundsDimensions)
     if(properties.FileJSONDataEnabled):
         OutputExtendsMin, OutputExtendsMax = GetExtends(ExtendsMin, ExtendsMax, StartExtendsMin, StartExtendsMax)
+        ExtraData = GetQuantizationData(ClusterMin)
+        if(CompressionData != None):
+            ExtraData.update(CompressionData)
+        if(properties.CompactStaticElements):
+            ExtraData.update(GetCompactionData(len(DynamicIndices), VertexCount))
         CreateJSON(Bounds, 
                    OutputExtendsMin, 
                    OutputExtendsMax, 
                    properties, 
                    TextureDimensions[0], 
-                   FrameCount
+                   Layout.FrameCount,
+                   SampledFrames,
+                   ExtraData
                    )
 
     # Reset selected objects to their original state
-    for CompareMesh in CompareMeshes:
-        bpy.data.meshes.remove(CompareMesh)
-
+    del PixelPositions, PixelNormals
     RemoveEdgeSplit(SelectedObjects, EdgeSplitModifiers)
     bpy.context.scene.frame_set(FrameCurrent)
     bpy.ops.object.select_all(action = "DESELECT")
@@ -143,15 +255,127 @@ def RenderSoftbodyVAT():
         bpy.context.view_layer.objects.active = StartActive
 
     # Return
-    return False, ""
+    return False, GetExportReport("soft body", Sampler, GetPeakMemory(), QuantizationErrors), LODWarnings
+
+# Get the indices of the vertices whose offset to the rest pose exceeds the tolerance somewhere in the captured range
+def GetDynamicVertices(FramePositions, Tolerance : float) -> np.ndarray:
+    Deviations = np.zeros(FramePositions.shape[1], dtype = np.float32)
+    for FrameIndex in range(len(FramePositions)):
+        np.maximum(Deviations, np.linalg.norm(FramePositions[FrameIndex], axis = 1), Deviations)
+
+    # The textures need at least one column
+    DynamicIndices = np.flatnonzero(Deviations > Tolerance)
+    if(len(DynamicIndices) == 0):
+        DynamicIndices = np.arange(1)
+    return DynamicIndices
+
+# Compress the captured frames into eigen shapes: a mean shape, K basis shapes and a weight per basis shape per frame
+# K is the smallest number of shapes that reconstructs every vertex within the error budget
+# Returns the position and normal shapes as (K + 1, VertexCount, 3) arrays (mean first), the (FrameCount, K) weights and the max error
+def CreateEigenShapes(FramePositions, FrameNormals, SampledFrames, ErrorBudget : float, MaxShapeCount : int):
+    Frames = SampledFrames if SampledFrames is not None else np.arange(len(FramePositions))
+    FrameCount = len(Frames)
+    VertexCount = FramePositions.shape[1]
+
+    # Center the offsets around the mean shape, the (Frame, Vertex * 3) offsets are staged like the frame stacks they come from
+    # Everything that touches all vertices is done in column chunks (whole vertices), so only a chunk of every frame is in memory at once
+    ChunkColumns = max(ChunkTexelCount // FrameCount, 1) * 3
+    FramePositions = FramePositions.reshape(len(FramePositions), -1)
+    FrameNormals = FrameNormals.reshape(len(FrameNormals), -1)
+    Offsets = CreateStagingBuffer((FrameCount, VertexCount * 3))
+    MeanOffsets = np.empty(VertexCount * 3, dtype = np.float32)
+
+    # The SVD is calculated through the (small) frame x frame Gram matrix, as there are far more vertices than frames
+    GramMatrix = np.zeros((FrameCount, FrameCount))
+    for Start in range(0, Offsets.shape[1], ChunkColumns):
+        Columns = slice(Start, Start + ChunkColumns)
+        Chunk = FramePositions[Frames, Columns]
+        MeanOffsets[Columns] = Chunk.mean(axis = 0, dtype = np.float64)
+        Chunk -= MeanOffsets[Columns]
+        Offsets[:, Columns] = Chunk
+        Chunk = Chunk.astype(np.float64)
+        GramMatrix += Chunk @ Chunk.T
+    EigenValues, EigenVectors = np.linalg.eigh(GramMatrix)
+    Order = np.argsort(EigenValues)[::-1]
+    EigenValues = np.maximum(EigenValues[Order], 0.0)
+    EigenVectors = EigenVectors[:, Order]
+    Rank = int(np.count_nonzero(EigenValues > EigenValues[0] * 1e-12)) if EigenValues[0] > 0.0 else 0
+    MaxShapeCount = min(MaxShapeCount, Rank)
+    SingularValues = np.sqrt(EigenValues[:MaxShapeCount])
+    Weights = EigenVectors[:, :MaxShapeCount] * SingularValues
+    Basis = np.empty((VertexCount * 3, MaxShapeCount), dtype = np.float32)
+    BasisProjection = (EigenVectors[:, :MaxShapeCount] / SingularValues).astype(np.float32)
+    for Start in range(0, Offsets.shape[1], ChunkColumns):
+        Basis[Start:Start + ChunkColumns] = Offsets[:, Start:Start + ChunkColumns].T @ BasisProjection
+
+    # Add shapes until the error budget is met, Offsets becomes the residual
+    ShapeCount = 0
+    MaxError = GetMaxVertexError(Offsets, ChunkColumns)
+    while(MaxError > ErrorBudget and ShapeCount < MaxShapeCount):
+        ShapeWeights = Weights[:, ShapeCount].astype(np.float32)
+        for Start in range(0, Offsets.shape[1], ChunkColumns):
+            Offsets[:, Start:Start + ChunkColumns] -= np.outer(ShapeWeights, Basis[Start:Start + ChunkColumns, ShapeCount])
+        ShapeCount += 1
+        MaxError = GetMaxVertexError(Offsets, ChunkColumns)
+    Weights = Weights[:, :ShapeCount]
+    Basis = Basis[:, :ShapeCount]
+
+    PositionShapes = np.empty((ShapeCount + 1, VertexCount, 3), dtype = np.float32)
+    PositionShapes[0] = MeanOffsets.reshape(-1, 3)
+    PositionShapes[1:] = Basis.T.reshape(ShapeCount, VertexCount, 3)
+
+    # Fit normal shapes that use the same weights, so the shader only needs a single set of weights
+    NormalWeights = np.ones((FrameCount, ShapeCount + 1))
+    NormalWeights[:, 1:] = Weights
+    Projection = np.linalg.pinv(NormalWeights).astype(np.float32)
+    NormalShapes = np.empty((ShapeCount + 1, VertexCount * 3), dtype = np.float32)
+    for Start in range(0, NormalShapes.shape[1], ChunkColumns):
+        NormalShapes[:, Start:Start + ChunkColumns] = Projection @ FrameNormals[Frames, Start:Start + ChunkColumns]
+
+    return PositionShapes, NormalShapes.reshape(ShapeCount + 1, VertexCount, 3), Weights, float(MaxError)
+
+# Get the largest distance between a reconstructed vertex and its captured position
+# The (Frame, Vertex * 3) residuals are read in chunks of ChunkColumns columns, which has to be a multiple of 3
+def GetMaxVertexError(Residuals : np.ndarray, ChunkColumns : int) -> float:
+    MaxSquaredError = 0.0
+    for Start in range(0, Residuals.shape[1], ChunkColumns):
+        Chunk = Residuals[:, Start:Start + ChunkColumns].reshape(len(Residuals), -1, 3)
+        MaxSquaredError = max(MaxSquaredError, float(np.max(np.square(Chunk).sum(axis = -1), initial = 0.0)))
+    return float(np.sqrt(MaxSquaredError))
+
+# Width of the weight texture, four weights are packed in every pixel
+def GetWeightTextureWidth(ShapeCount : int) -> int:
+    return max(1, ceil(ShapeCount / 4))
+
+# Create the weight texture. Every row is a frame and every pixel holds the weights of four shapes
+def CreateWeightTexture(Weights : np.ndarray):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    FrameCount, ShapeCount = Weights.shape
+    TextureWidth = GetWeightTextureWidth(ShapeCount)
+    Pixels = np.zeros((FrameCount, TextureWidth * 4), dtype = np.float32)
+    Pixels[:, :ShapeCount] = Weights
+    CreateTexture(Pixels.reshape(-1, 4), TextureWidth, FrameCount, properties.FileWeightTexture, "32")
+
+# Create the texture layout and the pixel buffers for the given amount of vertices and frames
+def CreateTextureBuffers(VertexCount : int, FrameCount : int):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    TextureDimensions = GetTextureDimensions(VertexCount, FrameCount)
+    Layout = TextureLayout(VertexCount, FrameCount, TextureDimensions)
+    TextureArraySize = TextureDimensions[0] * TextureDimensions[1]
+    PixelPositions = CreatePixelBuffer(TextureArraySize, [0.0, 0.0, 0.0, 1.0], GetPositionTextureFormat())
+    PixelNormals = None
+    if(GetNormalEncoding() != "PACKED"):
+        PixelNormals = CreatePixelBuffer(TextureArraySize, [0.0, 0.0, 0.0, 1.0], properties.FileRotationTextureFormat)
+
+    return Layout, PixelPositions, PixelNormals
 
 # Assign edge split modifier
-def PrepareSelectedObjects(Objects : list[bpy.types.Object], EvaluationFrame : int):
+def PrepareSelectedObjects(Objects : list[bpy.types.Object], EvaluationFrame : int, Sampler : FrameSampler):
     # Get the object data from the evaluation frame
     VertexCount = 0
     EdgeSplitModifiers = []
-    Vertices = []
-    CompareMeshes = []
+    ObjectVertexCounts = []
+    StartPositions = []
     StartExtendsMin = np.array([np.inf] * 3)
     StartExtendsMax = np.array([np.inf * -1] * 3)
 
@@ -169,80 +393,63 @@ def PrepareSelectedObjects(Objects : list[bpy.types.Object], EvaluationFrame : i
         EdgeSplitModifier.use_edge_sharp = bShouldSplitVertices
         EdgeSplitModifiers.append(EdgeSplitModifier)
 
+    # Evaluate the rest pose once for all objects
+    DependencyGraph = Sampler.SetFrame(EvaluationFrame)
+    for Object in Objects:
         # Calculate vertex data
-        CompareMesh = GetMeshAtFrame(Object, EvaluationFrame)
-        Vertices += CompareMesh.vertices
-        
-        VertexCount += len(CompareMesh.vertices)
-        CompareMeshes.append(CompareMesh)
+        CompareMesh = GetEvaluatedMesh(Object, DependencyGraph)
+        Positions, _ = GetVertexArrays(CompareMesh)
+        bpy.data.meshes.remove(CompareMesh)
+        StartPositions.append(Positions)
+        ObjectVertexCounts.append(len(Positions))
+        VertexCount += len(Positions)
 
         # Calculate start extends
-        for Vertex in CompareMesh.vertices:
-            ConvertedCoord = Vector((Vertex.co[0], -1 * Vertex.co[1], Vertex.co[2]))
-            np.minimum(StartExtendsMin, ConvertedCoord, StartExtendsMin)
-            np.maximum(StartExtendsMax, ConvertedCoord, StartExtendsMax)
+        ConvertedCoords = Positions * np.array((1.0, -1.0, 1.0), dtype = np.float32)
+        np.minimum(StartExtendsMin, ConvertedCoords.min(axis = 0, initial = np.inf), StartExtendsMin)
+        np.maximum(StartExtendsMax, ConvertedCoords.max(axis = 0, initial = -np.inf), StartExtendsMax)
 
     # Clean up and return
-    return EdgeSplitModifiers, VertexCount, Vertices, CompareMeshes, StartExtendsMin, StartExtendsMax
+    StartPositions = np.concatenate(StartPositions) if StartPositions else np.zeros((0, 3), dtype = np.float32)
+    return EdgeSplitModifiers, VertexCount, ObjectVertexCounts, StartPositions, StartExtendsMin, StartExtendsMax
 
 # Remove the edge split modifier we just added
 def RemoveEdgeSplit(Objects : list[bpy.types.Object], EdgeSplitModifiers):
     for i, Object in enumerate(Objects):
         Object.modifiers.remove(EdgeSplitModifiers[i])
 
-# Get the object data at a certain frame
-def GetMeshAtFrame(Object : bpy.types.Object, Frame, bShouldTransform : bool = True):
-    # Base variables
-    context = bpy.context
-    scene = context.scene
-    scene.frame_set(Frame)
-
-    # Creating a new measure object at the current frame
-    DependencyGraph = context.view_layer.depsgraph
-    CompareObject = Object.evaluated_get(DependencyGraph)
-    TemporaryObject = bpy.data.meshes.new_from_object(CompareObject)
-    if(bShouldTransform):
-        TemporaryObject.transform(Object.matrix_world)
-
-    # Return
-    return TemporaryObject
-
 # Bring positions to a range from 0-1 based on the maximum calculated bounds
+# This happens in place and in chunks, so it also works as a streaming pass over memory-mapped buffers
 def NormalizePositions(Positions, Bounds):
     # Set the bounds to a minimum of 0.01 to prevent divisions by 0 in the shader
     MeasureBounds = [max((ceil(axis * 10000)/10000), 0.01) for axis in Bounds]
 
     # Move positions into range
-    NormalizedPositions = Positions / np.array((*MeasureBounds, 1.0))
-    NormalizedPositions += np.array((1,1,1,0))
-    NormalizedPositions /= np.array((2,2,2,1))
-    NormalizedPositions = np.clip(NormalizedPositions, 0, 1)
+    for Chunk in IterateChunks(Positions):
+        Chunk /= np.array((*MeasureBounds, 1.0))
+        Chunk += np.array((1,1,1,0))
+        Chunk /= np.array((2,2,2,1))
+        np.clip(Chunk, 0, 1, Chunk)
 
-    return NormalizedPositions, MeasureBounds
+    return Positions, MeasureBounds
 
 # Create VAT mesh andd export it
-def CreateVATMeshes(Objects : list[bpy.types.Object], TextureDimensions, FrameCount, StartFrame):
-    scene = bpy.context.scene
-    scene.frame_set(StartFrame)
+def CreateVATMeshes(Objects : list[bpy.types.Object], PixelUVs : np.ndarray, StartFrame, Sampler : FrameSampler, ClusterUVs = None):
+    DependencyGraph = Sampler.SetFrame(StartFrame)
     LocalVertexCount = 0
     bpy.ops.object.select_all(action = "DESELECT")
     NewObjects = []
     NewDatas = []
     for Object in Objects:
         # Create a copy
-        NewData = GetMeshAtFrame(Object, StartFrame)
+        NewData = GetEvaluatedMesh(Object, DependencyGraph)
         NewObject = bpy.data.objects.new(name = Object.name, object_data = NewData)
 
         # Create the mesh UVs
-        PixelUVLayer = NewObject.data.uv_layers.new(name = "PixelUVs")
-        for Loop in NewObject.data.loops:
-            CurrentRow = floor((LocalVertexCount + Loop.vertex_index) / TextureDimensions[0])
-            Remainder = (LocalVertexCount + Loop.vertex_index) % TextureDimensions[0]
-
-            PixelUVLayer.data[Loop.index].uv = (
-                (Remainder + 0.5) / TextureDimensions[0], 
-                (CurrentRow * FrameCount + 0.5) / TextureDimensions[1]
-            )
+        LoopVertexIndices = LocalVertexCount + GetLoopVertexIndices(NewData)
+        CreateUVLayer(NewData, "PixelUVs", PixelUVs[LoopVertexIndices])
+        if(ClusterUVs is not None):
+            CreateUVLayer(NewData, "ClusterUVs", ClusterUVs[LoopVertexIndices])
 
         # Link the object to the scene
         bpy.context.collection.objects.link(NewObject)
@@ -252,25 +459,32 @@ def CreateVATMeshes(Objects : list[bpy.types.Object], TextureDimensions, FrameCo
         LocalVertexCount += len(NewObject.data.vertices)
 
     # Export the meshes
-    ExportWithLODs(NewObjects)
+    LODWarnings = ExportWithLODs(NewObjects)
 
     # Clean up
     for i, NewObject in enumerate(NewObjects):
         bpy.data.objects.remove(NewObject)
         bpy.data.meshes.remove(NewDatas[i])
 
+    return LODWarnings
+
 # Creates the JSON file containing the VAT data
-def CreateJSON(Bounds, ExtendsMin, ExtendsMax, properties, PixelCountU, RowHeight):
+def CreateJSON(Bounds, ExtendsMin, ExtendsMax, properties, PixelCountU, RowHeight, SampledFrames = None, ExtraData = None):
     # Create JSON dict
     properties = bpy.context.scene.VATExporter_RegularProperties
     SimulationData = dict()
     SimulationData["Type"] = "SOFTBODY"
-    SimulationData["FPS"] = int(bpy.context.scene.render.fps / properties.FrameSpacing)
+    SimulationData["FPS"] = int(bpy.context.scene.render.fps / GetFrameSpacing())
     SimulationData["PixelCountU"] = PixelCountU
     SimulationData["Bounds"] = Bounds
     SimulationData["RowHeight"] = RowHeight
     SimulationData["ExtendsMin"] = ExtendsMin.tolist()
     SimulationData["ExtendsMax"] = ExtendsMax.tolist()
+    SimulationData.update(GetNormalEncodingData())
+    if(SampledFrames is not None):
+        SimulationData["SampledFrames"] = SampledFrames.tolist()
+    if(ExtraData != None):
+        SimulationData.update(ExtraData)
 
     # Export the JSPON
     TargetDirectory = bpy.path.abspath(properties.OutputDirectory)
@@ -323,6 +537,24 @@ def IsDefaultExportValid():
     if(FileRotationTexture == "" and FileRotationTextureEnabled):
         Warning = "Incorrect rotation texture name"
         return False, Warning
+    # Check file name for frame time texture
+    FileFrameTimeTexture = bpy.path.clean_name(properties.FileFrameTimeTexture)
+    FileFrameTimeTextureEnabled = properties.FileFrameTimeTextureEnabled and properties.FrameSampling == "ADAPTIVE"
+    if(FileFrameTimeTexture == "" and FileFrameTimeTextureEnabled):
+        Warning = "Incorrect frame time texture name"
+        return False, Warning
+    # Check file name for weight texture
+    FileWeightTexture = bpy.path.clean_name(properties.FileWeightTexture)
+    FileWeightTextureEnabled = properties.FileWeightTextureEnabled and properties.SoftBodyCompression == "PCA"
+    if(FileWeightTexture == "" and FileWeightTextureEnabled):
+        Warning = "Incorrect weight texture name"
+        return False, Warning
+    # Check file name for bounds texture
+    FileBoundsTexture = bpy.path.clean_name(properties.FileBoundsTexture)
+    FileBoundsTextureEnabled = properties.FileBoundsTextureEnabled and GetQuantizationMode() != "GLOBAL"
+    if(FileBoundsTexture == "" and FileBoundsTextureEnabled):
+        Warning = "Incorrect bounds texture name"
+        return False, Warning
 
     return True, ""
 
@@ -358,11 +590,19 @@ class VATEXPORTER_OT_RenderSoftBody(Operator):
             return {"CANCELLED"}
           
 
-        bVATError, VATErrorDescription = RenderSoftbodyVAT()
+        # Put the scene back on its frame, even if the export fails halfway
+        CurrentFrame = context.scene.frame_current
+        try:
+            bVATError, VATReport, LODWarnings = RenderSoftbodyVAT()
+        finally:
+            context.scene.frame_set(CurrentFrame)
         if(bVATError):
-            self.report({"ERROR"}, VATErrorDescription)
+            self.report({"ERROR"}, VATReport)
             return {"CANCELLED"}
         
+        for LODWarning in LODWarnings:
+            self.report({"WARNING"}, LODWarning)
+        self.report({"INFO"}, VATReport)
         return {"FINISHED"}
 
 modules = [VATEXPORTER_OT_RenderSoftBody]
@@ -4,6 +4,31 @@ import bpy
 from mathutils import Vector, Matrix, Quaternion
 import numpy as np
 import os
+import mmap
+import weakref
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from .GLBWriter import GLBMesh, WriteGLB
+
+# The resource module is only available on Unix, Windows reads the peak memory through the process API
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# OpenImageIO ships with Blender and allows writing EXRs scanline by scanline. Fall back to bpy images if it is missing
+try:
+    import OpenImageIO
+except ImportError:
+    OpenImageIO = None
+
+# Number of texels that get processed at once when streaming through pixel buffers
+ChunkTexelCount = 1 << 20
 
 # Filter objects so only to return objects of type mesh
 def FilterSelection(Objects : list[bpy.types.Object]) -> list[bpy.types.Object]:
@@ -50,6 +75,26 @@ def ConvertCoordinate(Coordinate, FlipAxes = True, SwizzleAxes = True) -> Vector
 
     return NewCoordinate
 
+# Convert an array of vectors (shape (..., 3)) to the correct coordinate system in one go
+def ConvertCoordinates(Coordinates : np.ndarray, FlipAxes = True, SwizzleAxes = True) -> np.ndarray:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    NewCoordinates = Coordinates.copy()
+    # Flip coordinates based on input
+    if(FlipAxes):
+        FlipVector = np.array((
+            -1.0 if properties.FlipX else 1.0,
+            -1.0 if properties.FlipY else 1.0,
+            -1.0 if properties.FlipZ else 1.0
+        ), dtype = NewCoordinates.dtype)
+        NewCoordinates *= FlipVector
+
+    # Rearrange coordinate channels
+    if(SwizzleAxes):
+        SwizzleOrder = ["xyz".index(Axis) for Axis in properties.CoordinateSystem]
+        NewCoordinates = NewCoordinates[..., SwizzleOrder]
+
+    return NewCoordinates
+
 # Moves a normalized vector from range (-1,1) to range (0,1)
 def UnsignVector(InputVector) -> Vector:
     InputVector += Vector((1.0, 1.0, 1.0))
@@ -57,6 +102,89 @@ def UnsignVector(InputVector) -> Vector:
     InputVector = np.clip(InputVector, 0, 1)
     return InputVector
 
+# Moves an array of normalized vectors from range (-1,1) to range (0,1)
+def UnsignVectors(InputVectors : np.ndarray) -> np.ndarray:
+    OutputVectors = InputVectors + 1.0
+    OutputVectors /= 2.0
+    np.clip(OutputVectors, 0, 1, OutputVectors)
+    return OutputVectors
+
+# Number of bits of the two octahedral components when the normal is packed into a single channel
+# The packed value is an integer divided by 2^11, which a half float holds exactly, so the position texture can stay 16 bit
+NormalPackingBits = (6, 5)
+NormalPackingScale = 1 << sum(NormalPackingBits)
+
+# The normal encoding used by the export. Eigen shapes are reconstructed linearly, so those always use unsigned RGB normals
+def GetNormalEncoding() -> str:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(properties.VATType == "RIGIDBODY"):
+        return "RGB"
+    if(properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"):
+        return "RGB"
+    return properties.NormalEncoding
+
+# The format of the position texture, packed normals fit within the precision of every format
+def GetPositionTextureFormat() -> str:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    return properties.FilePositionTextureFormat
+
+# Number of channels written to the normal texture. Octahedral normals only need red and green, which needs OpenImageIO to write
+def GetNormalChannelCount() -> int:
+    if(GetNormalEncoding() == "OCTAHEDRAL" and OpenImageIO != None):
+        return 2
+    return 4
+
+# Octahedral encode an array of normalized vectors (shape (..., 3)) into two components in range (0,1)
+def EncodeOctahedral(Normals : np.ndarray) -> np.ndarray:
+    Normals = Normals / np.maximum(np.abs(Normals).sum(axis = -1, keepdims = True), 1e-8)
+    Signs = np.where(Normals[..., :2] >= 0.0, 1.0, -1.0)
+    Folded = (1.0 - np.abs(Normals[..., [1, 0]])) * Signs
+    Encoded = np.where(Normals[..., 2:] < 0.0, Folded, Normals[..., :2])
+    return UnsignVectors(Encoded.astype(np.float32))
+
+# Quantize pairs of (0,1) components and pack each pair into a single value in range (0,1)
+# Decode with: Packed = round(Value * 2048), X = floor(Packed / 32) / 63, Y = (Packed % 32) / 31
+def PackComponentPairs(Pairs : np.ndarray) -> np.ndarray:
+    XSteps = (1 << NormalPackingBits[0]) - 1
+    YSteps = (1 << NormalPackingBits[1]) - 1
+    Packed = np.rint(Pairs[..., 0] * XSteps) * (YSteps + 1) + np.rint(Pairs[..., 1] * YSteps)
+    return (Packed / NormalPackingScale).astype(np.float32)
+
+# Write unsigned normals (range (0,1)) to the given texels with the normal encoding of the export
+# Packed normals go into the alpha of the position texels, so write the positions first
+def WriteNormals(PixelPositions, PixelNormals, Indices, UnsignedNormals : np.ndarray):
+    Encoding = GetNormalEncoding()
+    if(Encoding == "RGB"):
+        PixelNormals[Indices, :3] = UnsignedNormals
+        return
+
+    Encoded = EncodeOctahedral(np.asarray(UnsignedNormals, dtype = np.float32) * 2.0 - 1.0)
+    if(Encoding == "OCTAHEDRAL"):
+        PixelNormals[Indices, :2] = Encoded
+    else:
+        PixelPositions[Indices, 3] = PackComponentPairs(Encoded)
+
+# The JSON flags the shader needs to decode the normals
+def GetNormalEncodingData() -> dict:
+    Encoding = GetNormalEncoding()
+    NormalData = {"NormalEncoding" : Encoding}
+    if(Encoding == "OCTAHEDRAL"):
+        NormalData["NormalChannels"] = GetNormalChannelCount()
+    if(Encoding == "PACKED"):
+        NormalData["NormalPackingBits"] = list(NormalPackingBits)
+        NormalData["NormalPackingScale"] = NormalPackingScale
+    return NormalData
+
+# Read the vertex positions and normals of a mesh into (N, 3) float32 arrays
+def GetVertexArrays(Mesh : bpy.types.Mesh):
+    VertexCount = len(Mesh.vertices)
+    Positions = np.empty(VertexCount * 3, dtype = np.float32)
+    Normals = np.empty(VertexCount * 3, dtype = np.float32)
+    Mesh.vertices.foreach_get("co", Positions)
+    Mesh.vertices.foreach_get("normal", Normals)
+
+    return Positions.reshape(-1, 3), Normals.reshape(-1, 3)
+
 # Get the extends for the correct bounds information in Unreal
 def GetExtends(ExtendsMin, ExtendsMax, StartExtendsMin, StartExtendsMax):
     ExtraExtendsMin = np.maximum(np.zeros(3), StartExtendsMin - ExtendsMin)
@@ -66,8 +194,88 @@ def GetExtends(ExtendsMin, ExtendsMax, StartExtendsMin, StartExtendsMax):
 
     return OutputExtendsMin, OutputExtendsMax
 
+# The data type of a pixel buffer. 8 bit textures are stored as half floats, as that precision is more than enough for them
+def GetPixelDataType(Format : str):
+    return np.float16 if Format == "8" else np.float32
+
+# Create an uninitialized buffer of the given shape
+# When streaming is enabled, the buffer is a memory-mapped staging file instead of an in-memory array
+def CreateStagingBuffer(Shape : tuple, DataType = np.float32):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(not properties.StreamTextures):
+        return np.empty(Shape, dtype = DataType)
+
+    FileHandle, FilePath = tempfile.mkstemp(suffix = ".vatbuffer", dir = bpy.app.tempdir or None)
+    ByteCount = int(np.prod(Shape)) * np.dtype(DataType).itemsize
+    os.ftruncate(FileHandle, max(ByteCount, 1))
+    MappedFile = MapStagingFile(FileHandle, FilePath, max(ByteCount, 1), mmap.ACCESS_WRITE)
+    return np.ndarray(Shape, dtype = DataType, buffer = MappedFile)
+
+# Map a temporary file into memory, the file is removed as soon as the last array using the mapping is gone
+# Closing the mapping while arrays still use it would leave them pointing at freed memory, so it is only ever closed by dropping the arrays
+def MapStagingFile(FileHandle : int, FilePath : str, ByteCount : int, Access) -> mmap.mmap:
+    MappedFile = mmap.mmap(FileHandle, ByteCount, access = Access)
+    os.close(FileHandle)
+    weakref.finalize(MappedFile, RemoveStagingFile, FilePath)
+    return MappedFile
+
+# Remove a staging file once its mapping is closed
+def RemoveStagingFile(FilePath : str):
+    try:
+        os.remove(FilePath)
+    except OSError:
+        pass
+
+# Create a (TexelCount, 4) pixel buffer filled with the default value
+def CreatePixelBuffer(TexelCount : int, DefaultValue, Format : str = "16"):
+    PixelBuffer = CreateStagingBuffer((TexelCount, 4), GetPixelDataType(Format))
+    for Chunk in IterateChunks(PixelBuffer):
+        Chunk[:] = DefaultValue
+
+    return PixelBuffer
+
+# Get the peak resident memory of the Blender process in bytes, which includes memory-mapped pages and Blender's own buffers
+# Nothing has to be tracked during the export, so this doesn't slow down any allocation
+def GetPeakMemory() -> int:
+    if(resource != None):
+        PeakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return PeakMemory if sys.platform == "darwin" else PeakMemory * 1024
+
+    import ctypes
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + [(Name, ctypes.c_size_t) for Name in (
+            "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+            "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage"
+        )]
+    Counters = ProcessMemoryCounters()
+    Counters.cb = ctypes.sizeof(Counters)
+    Process = ctypes.windll.kernel32.GetCurrentProcess()
+    if(not ctypes.windll.psapi.GetProcessMemoryInfo(Process, ctypes.byref(Counters), Counters.cb)):
+        return 0
+    return Counters.PeakWorkingSetSize
+
+# Create the message the operators report after a successful export
+# QuantizationErrors is the (global bounds, cluster bounds) max position error when cluster bounds are used
+def GetExportReport(VATName : str, Sampler, PeakMemory : int, QuantizationErrors : tuple = None) -> str:
+    Report = f"Exported {VATName} VAT ({Sampler.FrameSetCount} frame evaluations, peak process memory {PeakMemory / (1024 * 1024):.1f} MB"
+    if(QuantizationErrors != None):
+        Report += f", max position error {QuantizationErrors[1]:.5f} (global bounds: {QuantizationErrors[0]:.5f})"
+    return Report + ")"
+
+# Iterate over a pixel buffer in blocks of rows, so memory-mapped buffers never have to be loaded as a whole
+def IterateChunks(PixelBuffer : np.ndarray, ChunkSize : int = ChunkTexelCount):
+    for Start in range(0, len(PixelBuffer), ChunkSize):
+        yield PixelBuffer[Start:Start + ChunkSize]
+
 # Creates a texture with the given pixels
-def CreateTexture(Pixels, TextureWidth, TextureHeight, FileName, Format):
+# Textures with less than 4 channels are written with OpenImageIO, as Blender images are always RGBA
+def CreateTexture(Pixels, TextureWidth, TextureHeight, FileName, Format, ChannelCount : int = 4):
+    # Stream the texture to disk when possible
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if((properties.StreamTextures or ChannelCount < 4) and OpenImageIO != None):
+        WriteTextureScanlines(Pixels, TextureWidth, TextureHeight, FileName, Format, ChannelCount)
+        return
+
     # Create the texture itself
     Texture = bpy.data.images.new(
         name = FileName,
@@ -79,7 +287,7 @@ def CreateTexture(Pixels, TextureWidth, TextureHeight, FileName, Format):
     )
     
     # Set the texture settings
-    Texture.pixels = Pixels.ravel()
+    Texture.pixels.foreach_set(np.asarray(Pixels, dtype = np.float32).ravel())
     Texture.use_half_precision = False
 
     # Export the textures to disk
@@ -100,54 +308,584 @@ def CreateTexture(Pixels, TextureWidth, TextureHeight, FileName, Format):
     bpy.data.images.remove(Texture)
     return
 
+# Writes the pixels to an EXR in blocks of scanlines, without creating a Blender image of the full texture
+def WriteTextureScanlines(Pixels, TextureWidth, TextureHeight, FileName, Format, ChannelCount : int = 4):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    ExportDirectory = bpy.path.abspath(properties.OutputDirectory)
+    TargetFile = os.path.join(ExportDirectory, FileName + ".exr")
+
+    # Same output settings as the Blender image export
+    PixelFormat = OpenImageIO.FLOAT if Format == "32" else OpenImageIO.HALF
+    Spec = OpenImageIO.ImageSpec(TextureWidth, TextureHeight, ChannelCount, PixelFormat)
+    Spec.attribute("compression", "zip")
+    Output = OpenImageIO.ImageOutput.create(TargetFile)
+    if(Output == None or not Output.open(TargetFile, Spec)):
+        raise RuntimeError(f"Could not open {TargetFile} for writing")
+
+    # Blender stores the bottom row first, EXR scanlines start at the top
+    Rows = Pixels.reshape(TextureHeight, TextureWidth, 4)
+    ChunkRowCount = max(1, ChunkTexelCount // TextureWidth)
+    for ScanlineStart in range(0, TextureHeight, ChunkRowCount):
+        ScanlineEnd = min(ScanlineStart + ChunkRowCount, TextureHeight)
+        RowStart = TextureHeight - ScanlineEnd
+        RowEnd = TextureHeight - ScanlineStart
+        Scanlines = np.ascontiguousarray(Rows[RowStart:RowEnd][::-1, :, :ChannelCount], dtype = np.float32)
+        Output.write_scanlines(ScanlineStart, ScanlineEnd, 0, Scanlines)
+
+    Output.close()
+
 # Export mesh with LODs
-def ExportWithLODs(Objects : list[bpy.types.Object]):
+# Returns the warnings of LODs that had to fall back from a background worker to this Blender instance
+def ExportWithLODs(Objects : list[bpy.types.Object]) -> list[str]:
     # Get base data
     scene = bpy.context.scene
     properties = scene.VATExporter_RegularProperties
     
     # Cancel if mesh export is not enabled
     if(not properties.FileMeshEnabled):
-        return
-
-    # Give each object a decimate modifier, store the modifier in an array
-    DecimateModifiers = []
-    bpy.ops.object.select_all(action = "DESELECT")
-    for Object in Objects:
-        Object.select_set(True)
-        DecimateModifier = Object.modifiers.new("Decimate", "DECIMATE")
-        DecimateModifier.angle_limit = 0.0
-        DecimateModifier.decimate_type = "DISSOLVE"
-        DecimateModifier.use_dissolve_boundaries = True
-        DecimateModifiers.append(DecimateModifier)
+        return []
 
     # Prepare LOD and export data
     LODList = scene.VATExporter_LODList
     if(len(LODList) == 0):
         bpy.ops.vatexporter.addlod() # Add LOD0 incase its missing
 
-    # Iterate through the LODs and export
+    # Export settings
     BaseName = bpy.path.clean_name(properties.FileMeshName)
     BaseDirectory = bpy.path.abspath(properties.OutputDirectory)
-    for i, LOD in enumerate(LODList):
-        # Correct settings for the LODs
-        AngleLimit = 3.141519 * (1 - LOD.ReductionRate / 100.0)
-        for DecimateModifier in DecimateModifiers:
-            DecimateModifier.angle_limit = AngleLimit
-
-        # Export settings
+    FilePaths = []
+    for i in range(len(LODList)):
         NewName = BaseName
         if(i > 0):
             NewName += f"_LOD{i}"
-        ExportFile = os.path.join(BaseDirectory, bpy.path.clean_name(NewName) + ".fbx")
+        FilePaths.append(os.path.join(BaseDirectory, bpy.path.clean_name(NewName)))
+
+    # Hand the LODs to background workers, the LODs a worker couldn't export are exported here
+    RemainingLODs = list(range(len(LODList)))
+    Warnings = []
+    if(properties.ParallelLODs and len(LODList) > 1):
+        RemainingLODs, Warnings = ExportLODsInWorkers(Objects, LODList, FilePaths, properties.LODWorkerCount)
+    if(len(RemainingLODs) == 0):
+        return Warnings
+
+    # Give each object a decimate modifier and iterate through the LODs
+    bpy.ops.object.select_all(action = "DESELECT")
+    DecimateModifiers = AddDecimateModifiers(Objects)
+    for i in RemainingLODs:
+        # Correct settings for the LODs
+        LOD = LODList[i]
+        for DecimateModifier in DecimateModifiers:
+            DecimateModifier.angle_limit = GetLODAngleLimit(LOD.ReductionRate)
 
         # Perform the export
-        bpy.ops.export_scene.fbx(
-            filepath = ExportFile,
-            use_selection = True,
-            bake_space_transform = False,
-            bake_anim = False
-        )
+        ExportStart = time.perf_counter()
+        FilePath = ExportMeshFile(Objects, FilePaths[i])
+        SetLODStats(LOD, GetTriangleCount(Objects, bpy.context.evaluated_depsgraph_get()), time.perf_counter() - ExportStart, FilePath)
+
+    return Warnings
+
+# Give each object a selected DISSOLVE decimate modifier without reduction, the angle limit sets the reduction of a LOD
+def AddDecimateModifiers(Objects : list[bpy.types.Object]) -> list[bpy.types.DecimateModifier]:
+    DecimateModifiers = []
+    for Object in Objects:
+        Object.select_set(True)
+        DecimateModifier = Object.modifiers.new("Decimate", "DECIMATE")
+        DecimateModifier.angle_limit = 0.0
+        DecimateModifier.decimate_type = "DISSOLVE"
+        DecimateModifier.use_dissolve_boundaries = True
+        DecimateModifiers.append(DecimateModifier)
+    return DecimateModifiers
+
+# Get the angle limit of the decimate modifiers for a LOD reduction rate (0-100%)
+def GetLODAngleLimit(ReductionRate : float) -> float:
+    return 3.141519 * (1 - ReductionRate / 100.0)
+
+# Get the number of triangles of the evaluated objects
+def GetTriangleCount(Objects : list[bpy.types.Object], DependencyGraph) -> int:
+    TriangleCount = 0
+    for Object in Objects:
+        EvaluatedObject = Object.evaluated_get(DependencyGraph)
+        _, LoopTotals = GetPolygonLoopRanges(EvaluatedObject.data)
+        TriangleCount += int((LoopTotals - 2).sum())
+    return TriangleCount
+
+# Store the results of a LOD export in the LOD list
+def SetLODStats(LOD, TriangleCount : int, ExportTime : float, FilePath : str):
+    LOD.TriangleCount = TriangleCount
+    LOD.ExportTime = ExportTime
+    LOD.FileSize = os.path.getsize(FilePath) / (1024 * 1024) if os.path.exists(FilePath) else 0.0
+
+# Export the LODs in a pool of background Blender processes, one LOD per process
+# The base VAT meshes are handed over in a temporary blend file, every worker decimates them and writes its LOD
+# Returns the indices of the LODs that failed, so they can still be exported in this process, and a warning for every failed LOD
+def ExportLODsInWorkers(Objects : list[bpy.types.Object], LODList, FilePaths : list[str], WorkerCount : int):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    JobDirectory = tempfile.mkdtemp(prefix = "vatlods_", dir = bpy.app.tempdir or None)
+    BlendFile = os.path.join(JobDirectory, "BaseMeshes.blend")
+    bpy.data.libraries.write(BlendFile, set(Objects), path_remap = "ABSOLUTE")
+    AddonDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    WorkerScript = os.path.join(os.path.dirname(os.path.abspath(__file__)), "LODWorker.py")
+
+    # Write a job file per LOD and run it in its own process
+    def RunWorker(i):
+        JobFile = os.path.join(JobDirectory, f"LOD{i}.json")
+        ResultFile = os.path.join(JobDirectory, f"LOD{i}_Result.json")
+        with open(JobFile, "w") as File:
+            json.dump({
+                "AddonParent" : os.path.dirname(AddonDirectory),
+                "AddonPackage" : os.path.basename(AddonDirectory),
+                "BlendFile" : BlendFile,
+                "ObjectNames" : [Object.name for Object in Objects],
+                "AngleLimit" : GetLODAngleLimit(LODList[i].ReductionRate),
+                "FilePath" : FilePaths[i],
+                "MeshFileFormat" : properties.MeshFileFormat,
+                "QuantizeMeshFile" : properties.QuantizeMeshFile,
+                "ResultFile" : ResultFile
+            }, File)
+        Command = [bpy.app.binary_path, "--background", "--factory-startup", "--python-exit-code", "1", "--python", WorkerScript, "--", JobFile]
+        Process = subprocess.run(Command, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE)
+        if(Process.returncode != 0 or not os.path.exists(ResultFile)):
+            ErrorLines = Process.stderr.decode(errors = "replace").strip().splitlines()
+            return ErrorLines[-1] if len(ErrorLines) > 0 else f"exit code {Process.returncode}"
+        with open(ResultFile) as File:
+            return json.load(File)
+
+    FailedLODs = []
+    Warnings = []
+    LODIndices = list(range(len(LODList)))
+    try:
+        with ThreadPoolExecutor(max_workers = max(1, min(WorkerCount, len(LODIndices)))) as Executor:
+            for i, Result in zip(LODIndices, Executor.map(RunWorker, LODIndices)):
+                if(isinstance(Result, str)):
+                    FailedLODs.append(i)
+                    Warnings.append(f"LOD{i} failed in the background worker ({Result}), it was exported in this Blender instance instead")
+                    continue
+                SetLODStats(LODList[i], Result["TriangleCount"], Result["ExportTime"], Result["FilePath"])
+    finally:
+        shutil.rmtree(JobDirectory, ignore_errors = True)
+    return FailedLODs, Warnings
+
+# Export the (selected) objects to a mesh file in the format of the export settings, the extension is added to the path
+# Returns the path of the written file
+def ExportMeshFile(Objects : list[bpy.types.Object], FilePath : str) -> str:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    return WriteMeshFile(Objects, FilePath, properties.MeshFileFormat, properties.QuantizeMeshFile)
+
+# Write the (selected) objects to a FBX or GLB file, the extension is added to the path
+# GLB files are written straight from the evaluated mesh arrays, so they don't depend on the selection
+def WriteMeshFile(Objects : list[bpy.types.Object], FilePath : str, Format : str, bQuantize : bool = False) -> str:
+    if(Format == "GLB"):
+        DependencyGraph = bpy.context.evaluated_depsgraph_get()
+        WriteGLB(FilePath + ".glb", [GetGLBMesh(Object, DependencyGraph) for Object in Objects], bQuantize)
+        return FilePath + ".glb"
+    bpy.ops.export_scene.fbx(
+        filepath = FilePath + ".fbx",
+        use_selection = True,
+        bake_space_transform = False,
+        bake_anim = False
+    )
+    return FilePath + ".fbx"
+
+# Read the triangles, corner normals and UV channels of the evaluated object into a GLB mesh
+def GetGLBMesh(Object : bpy.types.Object, DependencyGraph) -> GLBMesh:
+    EvaluatedObject = Object.evaluated_get(DependencyGraph)
+    Mesh = EvaluatedObject.to_mesh()
+    Mesh.calc_loop_triangles()
+    TriangleLoops = np.empty(len(Mesh.loop_triangles) * 3, dtype = np.int32)
+    Mesh.loop_triangles.foreach_get("loops", TriangleLoops)
+    Positions, _ = GetVertexArrays(Mesh)
+    LoopNormals = np.empty(len(Mesh.loops) * 3, dtype = np.float32)
+    Mesh.corner_normals.foreach_get("vector", LoopNormals)
+    LoopUVChannels = []
+    for UVLayer in Mesh.uv_layers:
+        LoopUVs = np.empty(len(Mesh.loops) * 2, dtype = np.float32)
+        UVLayer.data.foreach_get("uv", LoopUVs)
+        LoopUVChannels.append(LoopUVs)
+    Result = GLBMesh.FromLoops(Object.name, np.array(Object.matrix_world), Positions, GetLoopVertexIndices(Mesh), LoopNormals, LoopUVChannels, TriangleLoops)
+    EvaluatedObject.to_mesh_clear()
+    return Result
+
+# Maps VAT elements (vertices or objects) to their texels. Every element gets a column and a block of rows (one row per frame)
+# The mapping is calculated once as an integer array, so that capturing and UV generation don't have to redo it per element
+class TextureLayout:
+    def __init__(self, ElementCount : int, FrameCount : int, TextureDimensions : tuple):
+        self.ElementCount = ElementCount
+        self.FrameCount = FrameCount
+        self.Width = TextureDimensions[0]
+        self.Height = TextureDimensions[1]
+
+        Elements = np.arange(ElementCount)
+        self.Columns = Elements % self.Width
+        self.RowBlocks = Elements // self.Width
+        self.BaseIndices = self.RowBlocks * self.Width * FrameCount + self.Columns
+
+    # Texel indices of the elements for the given frame
+    def GetFrameIndices(self, FrameIndex : int, Elements = slice(None)) -> np.ndarray:
+        return self.BaseIndices[Elements] + FrameIndex * self.Width
+
+    # UV coordinate pointing to the first frame of every element
+    def GetPixelUVs(self) -> np.ndarray:
+        PixelUVs = np.empty((self.ElementCount, 2))
+        PixelUVs[:, 0] = (self.Columns + 0.5) / self.Width
+        PixelUVs[:, 1] = (self.RowBlocks * self.FrameCount + 0.5) / self.Height
+        return PixelUVs
+
+# UV that marks an element without texels, so the shader can skip the texture fetch and keep the rest pose
+StaticElementUV = (-1.0, -1.0)
+
+# Spread the UVs of the elements in a compacted layout over all elements, the elements that were left out get the static UV
+def ScatterElementUVs(ElementUVs : np.ndarray, ElementIndices : np.ndarray, ElementCount : int) -> np.ndarray:
+    UVs = np.empty((ElementCount, 2))
+    UVs[:] = StaticElementUV
+    UVs[ElementIndices] = ElementUVs
+    return UVs
+
+# The JSON data describing how many elements were left out of the textures
+def GetCompactionData(DynamicCount : int, ElementCount : int) -> dict:
+    return {
+        "StaticElementCount" : ElementCount - DynamicCount,
+        "DynamicElementCount" : DynamicCount,
+        "CompactionRatio" : DynamicCount / max(ElementCount, 1)
+    }
+
+# Get the vertex index of every loop in the mesh
+def GetLoopVertexIndices(Mesh : bpy.types.Mesh) -> np.ndarray:
+    LoopVertexIndices = np.empty(len(Mesh.loops), dtype = np.int32)
+    Mesh.loops.foreach_get("vertex_index", LoopVertexIndices)
+    return LoopVertexIndices
+
+# Get the first loop and the loop count of every polygon in the mesh
+def GetPolygonLoopRanges(Mesh : bpy.types.Mesh):
+    PolygonCount = len(Mesh.polygons)
+    LoopStarts = np.empty(PolygonCount, dtype = np.int32)
+    LoopTotals = np.empty(PolygonCount, dtype = np.int32)
+    Mesh.polygons.foreach_get("loop_start", LoopStarts)
+    Mesh.polygons.foreach_get("loop_total", LoopTotals)
+    return LoopStarts, LoopTotals
+
+# Get the UV of every loop in the active UV layer, or None if the mesh has no UV layers
+def GetActiveLoopUVs(Mesh : bpy.types.Mesh) -> np.ndarray:
+    UVLayer = Mesh.uv_layers.active
+    if(UVLayer == None):
+        return None
+    LoopUVs = np.empty(len(Mesh.loops) * 2, dtype = np.float32)
+    UVLayer.data.foreach_get("uv", LoopUVs)
+    return LoopUVs.reshape(-1, 2)
+
+# Create a new UV layer and write the (per loop) UVs with a single foreach_set
+def CreateUVLayer(Mesh : bpy.types.Mesh, Name : str, LoopUVs : np.ndarray):
+    UVLayer = Mesh.uv_layers.new(name = Name)
+    UVLayer.data.foreach_set("uv", np.ascontiguousarray(LoopUVs, dtype = np.float32).ravel())
+    return UVLayer
+
+# Create a mesh of disconnected polygons straight from the loop arrays of a source mesh, every loop gets its own vertex
+# The polygons keep their order and their loops are stored one after another, so vertex i of the new mesh is loop i
+def CreateSoupMesh(Name : str, Positions : np.ndarray, LoopVertices : np.ndarray, LoopStarts : np.ndarray, LoopTotals : np.ndarray) -> bpy.types.Mesh:
+    SoupLoopStarts = np.cumsum(LoopTotals, dtype = np.int32) - LoopTotals
+    SourceLoops = np.arange(int(LoopTotals.sum())) + np.repeat(LoopStarts - SoupLoopStarts, LoopTotals)
+    Mesh = bpy.data.meshes.new(Name)
+    Mesh.vertices.add(len(SourceLoops))
+    Mesh.loops.add(len(SourceLoops))
+    Mesh.polygons.add(len(LoopStarts))
+    Mesh.vertices.foreach_set("co", np.ascontiguousarray(Positions[LoopVertices[SourceLoops]], dtype = np.float32).ravel())
+    Mesh.loops.foreach_set("vertex_index", np.arange(len(SourceLoops), dtype = np.int32))
+    Mesh.polygons.foreach_set("loop_start", SoupLoopStarts.astype(np.int32))
+    Mesh.update(calc_edges = True)
+    return Mesh
+
+# Moves the scene through the frame range, evaluating the depsgraph only once per frame
+class FrameSampler:
+    def __init__(self):
+        self.FrameSetCount = 0
+        self.CurrentFrame = None
+
+    # Set the scene to the given frame and return the depsgraph. Nothing gets re-evaluated if the frame did not change
+    def SetFrame(self, Frame : int):
+        context = bpy.context
+        if(Frame != self.CurrentFrame):
+            context.scene.frame_set(Frame)
+            self.FrameSetCount += 1
+            self.CurrentFrame = Frame
+
+        return context.view_layer.depsgraph
+
+    # Yields (Frame, FrameIndex, DependencyGraph) for every sampled frame in the range
+    # Skipped frames are still evaluated by default, as not doing so might break non-cached simulations
+    def SampleFrames(self, FrameStart : int, FrameEnd : int, FrameSpacing : int, bEvaluateSkippedFrames : bool = True):
+        for Frame in range(FrameStart, FrameEnd + 1):
+            bIsSampledFrame = (Frame - FrameStart) % FrameSpacing == 0
+            if(not bIsSampledFrame):
+                if(bEvaluateSkippedFrames):
+                    self.SetFrame(Frame)
+                continue
+
+            DependencyGraph = self.SetFrame(Frame)
+            yield Frame, (Frame - FrameStart) // FrameSpacing, DependencyGraph
+
+# Evaluate an F-curve at all given frames at once, without touching the depsgraph
+# The keyframes are read in bulk: frames on a keyframe and constant extrapolation are handled in NumPy, any other frame uses FCurve.evaluate
+def EvaluateFCurve(FCurve : bpy.types.FCurve, Frames : np.ndarray) -> np.ndarray:
+    KeyCount = len(FCurve.keyframe_points)
+    if(KeyCount == 0 or len(FCurve.modifiers) > 0):
+        return np.array([FCurve.evaluate(float(Frame)) for Frame in Frames])
+
+    Keys = np.empty(KeyCount * 2, dtype = np.float32)
+    FCurve.keyframe_points.foreach_get("co", Keys)
+    KeyFrames = Keys[0::2].astype(np.float64)
+    KeyValues = Keys[1::2].astype(np.float64)
+
+    # Frames that are exactly on a keyframe take the value of that keyframe, whatever the interpolation
+    Values = np.empty(len(Frames))
+    KeyIndices = np.clip(np.searchsorted(KeyFrames, Frames), 0, KeyCount - 1)
+    bIsSolved = np.abs(KeyFrames[KeyIndices] - Frames) < 1e-4
+    Values[bIsSolved] = KeyValues[KeyIndices[bIsSolved]]
+    if(FCurve.extrapolation == "CONSTANT"):
+        bIsBefore = Frames < KeyFrames[0]
+        bIsAfter = Frames > KeyFrames[-1]
+        Values[bIsBefore] = KeyValues[0]
+        Values[bIsAfter] = KeyValues[-1]
+        bIsSolved |= bIsBefore | bIsAfter
+
+    for i in np.flatnonzero(~bIsSolved):
+        Values[i] = FCurve.evaluate(float(Frames[i]))
+    return Values
+
+# Keeps the raw arrays of every evaluated frame, so a frame range only has to be evaluated once
+# The arrays are appended to temporary files and read back through memory maps, as the raw meshes of a whole simulation rarely fit in memory
+class FrameCache:
+    def __init__(self):
+        self.Files = dict()
+        self.Entries = dict()
+        self.Maps = dict()
+
+    # Append an array to the file of the given name. All arrays of a name share the data type of the first one
+    def Store(self, Name : str, Key, Array : np.ndarray):
+        if(Name not in self.Files):
+            FileHandle, FilePath = tempfile.mkstemp(suffix = ".vatcache", dir = bpy.app.tempdir or None)
+            self.Files[Name] = [os.fdopen(FileHandle, "wb"), FilePath, Array.dtype, 0]
+        File, _, DataType, Offset = self.Files[Name]
+        File.write(np.ascontiguousarray(Array, dtype = DataType).tobytes())
+        self.Entries[(Name, Key)] = (Offset, Array.shape)
+        self.Files[Name][3] = Offset + Array.size
+
+    # Whether an array was stored for the given name and key
+    def Contains(self, Name : str, Key) -> bool:
+        return (Name, Key) in self.Entries
+
+    # Read an array back. The first read of a name closes its file, nothing can be stored for that name afterwards
+    def Load(self, Name : str, Key) -> np.ndarray:
+        Offset, Shape = self.Entries[(Name, Key)]
+        if(Name not in self.Maps):
+            File, FilePath, DataType, Size = self.Files[Name]
+            File.close()
+            self.Maps[Name] = np.empty(0, dtype = DataType)
+            if(Size > 0):
+                MappedFile = MapStagingFile(os.open(FilePath, os.O_RDONLY | getattr(os, "O_BINARY", 0)), FilePath, Size * np.dtype(DataType).itemsize, mmap.ACCESS_READ)
+                self.Maps[Name] = np.frombuffer(MappedFile, dtype = DataType, count = Size)
+        return self.Maps[Name][Offset:Offset + int(np.prod(Shape))].reshape(Shape)
+
+    # Close and remove all cache files. Mapped files are removed once the arrays loaded from them are gone as well
+    def Release(self):
+        for Name, (File, FilePath, _, Size) in self.Files.items():
+            File.close()
+            if(Name not in self.Maps or Size == 0):
+                os.remove(FilePath)
+        self.Files.clear()
+        self.Entries.clear()
+        self.Maps.clear()
+
+# Get a (temporary) copy of the evaluated mesh of an object from the given depsgraph
+def GetEvaluatedMesh(Object : bpy.types.Object, DependencyGraph, bShouldTransform : bool = True) -> bpy.types.Mesh:
+    CompareObject = Object.evaluated_get(DependencyGraph)
+    TemporaryMesh = bpy.data.meshes.new_from_object(CompareObject)
+    if(bShouldTransform):
+        TemporaryMesh.transform(Object.matrix_world)
+
+    return TemporaryMesh
+
+# The spacing between captured frames. Adaptive sampling captures every frame and drops frames afterwards
+def GetFrameSpacing() -> int:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(properties.FrameSampling == "ADAPTIVE"):
+        return 1
+    return properties.FrameSpacing
+
+# Check whether linear interpolation between the start and end frame reconstructs all frames in between within the tolerance
+# FrameStacks is a list of (FrameCount, ElementCount, Channels) arrays, Weights scales the error of each stack per element
+def CanInterpolateFrames(FrameStacks : list, Weights : list, StartFrame : int, EndFrame : int, Tolerance : float) -> bool:
+    SquaredTolerance = Tolerance * Tolerance
+    for Frame in range(StartFrame + 1, EndFrame):
+        Factor = (Frame - StartFrame) / (EndFrame - StartFrame)
+        SquaredError = 0.0
+        for FrameStack, Weight in zip(FrameStacks, Weights):
+            StartData = FrameStack[StartFrame]
+            Difference = StartData + (FrameStack[EndFrame] - StartData) * Factor - FrameStack[Frame]
+            SquaredError = SquaredError + np.square(Difference).sum(axis = -1) * np.square(Weight)
+        if(np.max(SquaredError, initial = 0.0) > SquaredTolerance):
+            return False
+
+    return True
+
+# Select the frames to keep so that all dropped frames can be reconstructed by interpolating their kept neighbours
+# The first and last frame are always kept
+def SelectAdaptiveFrames(FrameStacks : list, Tolerance : float, Weights : list = None) -> np.ndarray:
+    if(Weights == None):
+        Weights = [1.0] * len(FrameStacks)
+    LastFrame = len(FrameStacks[0]) - 1
+    SampledFrames = [0]
+    StartFrame = 0
+    while(StartFrame < LastFrame):
+        # Grow the segment exponentially until interpolation fails
+        ValidEndFrame = StartFrame + 1
+        InvalidEndFrame = None
+        while(ValidEndFrame < LastFrame):
+            EndFrame = min(StartFrame + 2 * (ValidEndFrame - StartFrame), LastFrame)
+            if(CanInterpolateFrames(FrameStacks, Weights, StartFrame, EndFrame, Tolerance)):
+                ValidEndFrame = EndFrame
+            else:
+                InvalidEndFrame = EndFrame
+                break
+
+        # Find the longest valid segment in between
+        if(InvalidEndFrame != None):
+            while(InvalidEndFrame - ValidEndFrame > 1):
+                EndFrame = (ValidEndFrame + InvalidEndFrame) // 2
+                if(CanInterpolateFrames(FrameStacks, Weights, StartFrame, EndFrame, Tolerance)):
+                    ValidEndFrame = EndFrame
+                else:
+                    InvalidEndFrame = EndFrame
+
+        SampledFrames.append(ValidEndFrame)
+        StartFrame = ValidEndFrame
+
+    return np.array(SampledFrames)
+
+# Creates a single row texture that maps each texture frame to its frame in the simulation
+# R: frame offset from the start of the simulation, G: the same offset normalized over the frame range
+def CreateFrameTimeTexture(SampledFrames : np.ndarray, SourceFrameCount : int):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    FrameCount = len(SampledFrames)
+    Pixels = np.zeros((FrameCount, 4), dtype = np.float32)
+    Pixels[:, 0] = SampledFrames
+    Pixels[:, 1] = SampledFrames / max(SourceFrameCount - 1, 1)
+    Pixels[:, 3] = 1.0
+    CreateTexture(Pixels, FrameCount, 1, properties.FileFrameTimeTexture, "32")
+
+# The quantization bounds mode of the export. Eigen shapes are signed basis shapes, so those always use the global bounds
+def GetQuantizationMode() -> str:
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(properties.VATType == "FLUID"):
+        return "GLOBAL"
+    if(properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"):
+        return "GLOBAL"
+    return properties.QuantizationBounds
+
+# Group elements (vertices or objects) into clusters that each get their own quantization bounds
+# ElementMin and ElementMax are the (N, 3) ranges every element moves in over the whole simulation
+# Returns the cluster of every element and the (ClusterCount, 3) min and extent of every cluster
+def GetClusterBounds(Mode : str, ElementMin : np.ndarray, ElementMax : np.ndarray, ObjectIndices : np.ndarray, Layout : TextureLayout):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    if(Mode == "OBJECT"):
+        ElementClusters = ObjectIndices
+    elif(Mode == "ROW"):
+        ElementClusters = Layout.RowBlocks
+    else:
+        ElementClusters = KMeansClusters(np.concatenate((ElementMin, ElementMax), axis = 1), properties.ClusterCount)
+
+    # Remove empty clusters and reduce the ranges per cluster
+    UsedClusters, ElementClusters = np.unique(ElementClusters, return_inverse = True)
+    Order = np.argsort(ElementClusters, kind = "stable")
+    Starts = np.searchsorted(ElementClusters[Order], np.arange(len(UsedClusters)))
+    ClusterMin = np.minimum.reduceat(ElementMin[Order], Starts).astype(np.float32)
+    ClusterMax = np.maximum.reduceat(ElementMax[Order], Starts).astype(np.float32)
+    ClusterExtent = np.maximum(ClusterMax - ClusterMin, 0.0001)
+    return ElementClusters.astype(np.int32), ClusterMin, ClusterExtent
+
+# Spatial k-means clustering of the given (N, D) features. The initial centers are spread over the features sorted by length
+def KMeansClusters(Features : np.ndarray, ClusterCount : int, IterationCount : int = 16) -> np.ndarray:
+    Features = np.asarray(Features, dtype = np.float32)
+    ClusterCount = max(1, min(ClusterCount, len(Features)))
+    Order = np.argsort(np.linalg.norm(Features, axis = 1))
+    Centers = Features[Order[np.linspace(0, len(Features) - 1, ClusterCount).astype(np.int64)]]
+    Labels = np.zeros(len(Features), dtype = np.int64)
+    ChunkSize = max(1, ChunkTexelCount // ClusterCount)
+    for Iteration in range(IterationCount):
+        # Assign every feature to its closest center
+        NewLabels = np.empty_like(Labels)
+        for Start in range(0, len(Features), ChunkSize):
+            Chunk = Features[Start:Start + ChunkSize]
+            Distances = np.square(Chunk[:, None, :] - Centers[None, :, :]).sum(axis = -1)
+            NewLabels[Start:Start + ChunkSize] = Distances.argmin(axis = 1)
+        if(Iteration > 0 and np.array_equal(NewLabels, Labels)):
+            break
+        Labels = NewLabels
+
+        # Move the centers to the mean of their features, empty clusters keep their center
+        Counts = np.bincount(Labels, minlength = ClusterCount)
+        Sums = np.zeros_like(Centers)
+        np.add.at(Sums, Labels, Features)
+        bIsUsed = Counts > 0
+        Centers[bIsUsed] = Sums[bIsUsed] / Counts[bIsUsed, None]
+
+    return Labels
+
+# Quantize values in range (0,1) the way the given texture format stores them
+def QuantizeTexels(Values : np.ndarray, Format : str) -> np.ndarray:
+    if(Format == "8"):
+        return np.rint(Values * 255.0) / 255.0
+    if(Format == "16"):
+        return Values.astype(np.float16).astype(np.float32)
+    return Values
+
+# Bring the positions (RGB) to a range from 0-1 based on the bounds of the cluster of their element, frame by frame and in place
+# Returns the max reconstruction error after quantization with the global bounds and with the cluster bounds
+def NormalizeClusterPositions(PixelPositions, Layout : TextureLayout, ElementClusters, ClusterMin, ClusterExtent, GlobalBounds, Format : str):
+    GlobalBounds = np.array(GlobalBounds, dtype = np.float32)
+    ElementMin = ClusterMin[ElementClusters]
+    ElementExtent = ClusterExtent[ElementClusters]
+    GlobalError = ClusterError = 0.0
+    for FrameIndex in range(Layout.FrameCount):
+        TextureArrayIndices = Layout.GetFrameIndices(FrameIndex)
+        Positions = PixelPositions[TextureArrayIndices, :3].astype(np.float32)
+
+        # Error of the regular (symmetric) global bounds encoding
+        GlobalPositions = np.clip((Positions / GlobalBounds + 1.0) / 2.0, 0.0, 1.0)
+        GlobalPositions = (QuantizeTexels(GlobalPositions, Format) * 2.0 - 1.0) * GlobalBounds
+        GlobalError = max(GlobalError, float(np.abs(GlobalPositions - Positions).max(initial = 0.0)))
+
+        # Encode with the cluster bounds
+        ClusterPositions = np.clip((Positions - ElementMin) / ElementExtent, 0.0, 1.0)
+        DecodedPositions = QuantizeTexels(ClusterPositions, Format) * ElementExtent + ElementMin
+        ClusterError = max(ClusterError, float(np.abs(DecodedPositions - Positions).max(initial = 0.0)))
+        PixelPositions[TextureArrayIndices, :3] = ClusterPositions
+
+    return PixelPositions, (GlobalError, ClusterError)
+
+# Creates the bounds texture: the clusters are wrapped into rows like the elements of the other textures
+# The bottom half holds the min and the top half the extent of the clusters, Dimensions come from GetTextureDimensions(ClusterCount, 2)
+def CreateClusterBoundsTexture(ClusterMin : np.ndarray, ClusterExtent : np.ndarray, Dimensions : tuple):
+    properties = bpy.context.scene.VATExporter_RegularProperties
+    ClusterCount = len(ClusterMin)
+    HalfTexelCount = Dimensions[0] * Dimensions[1] // 2
+    Pixels = np.ones((2, HalfTexelCount, 4), dtype = np.float32)
+    Pixels[0, :ClusterCount, :3] = ClusterMin
+    Pixels[1, :ClusterCount, :3] = ClusterExtent
+    CreateTexture(Pixels.reshape(-1, 4), Dimensions[0], Dimensions[1], properties.FileBoundsTexture, "32")
+
+# UV pointing to the min texel of the cluster of every element in the bounds texture, the extent texel is 0.5 above it
+def GetClusterUVs(ElementClusters : np.ndarray, Dimensions : tuple) -> np.ndarray:
+    ClusterUVs = np.empty((len(ElementClusters), 2))
+    ClusterUVs[:, 0] = (ElementClusters % Dimensions[0] + 0.5) / Dimensions[0]
+    ClusterUVs[:, 1] = (ElementClusters // Dimensions[0] + 0.5) / Dimensions[1]
+    return ClusterUVs
+
+# The JSON data the shader needs to decode cluster quantized positions
+def GetQuantizationData(ClusterMin : np.ndarray = None) -> dict:
+    Mode = GetQuantizationMode()
+    QuantizationData = {"QuantizationBounds" : Mode}
+    if(Mode != "GLOBAL" and ClusterMin is not None):
+        QuantizationData["ClusterCount"] = len(ClusterMin)
+    return QuantizationData
 
 # Gets the evaluation frame (for the restpose mesh)
 def GetEvaluationFrame():
@@ -161,55 +899,131 @@ def GetEvaluationFrame():
     else:
         return properties.CustomRestPoseFrame
 
-def ConvertQuaternion(RawQuaternion : Quaternion) -> Quaternion:
-    # Transform the quaternion based on the coordinate system given in the input
+# The matrix that flips and swizzles the axes to the target coordinate system, in the same way as ConvertCoordinate
+def GetBasisMatrix() -> np.ndarray:
     properties = bpy.context.scene.VATExporter_RegularProperties
-    CoordinateSystem = properties.CoordinateSystem
-    FlipX = -1.0 if properties.FlipX else 1.0
-    FlipY = -1.0 if properties.FlipY else 1.0
-    FlipZ = -1.0 if properties.FlipZ else 1.0
-    BasisMatrix = Matrix(((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)))
-    match CoordinateSystem:
-        case "xyz":
-            BasisMatrix = Matrix((
-                (1.0 * FlipX, 0.0, 0.0),
-                (0.0, 1.0 * FlipY, 0.0),
-                (0.0, 0.0, 1.0 * FlipZ)
-            ))
-        case "xzy":
-            BasisMatrix = Matrix((
-                (1.0 * FlipX, 0.0, 0.0),
-                (0.0, 0.0, 1.0 * FlipZ),
-                (0.0, 1.0 * FlipY, 0.0)
-            ))
-        case "yxz":
-            BasisMatrix = Matrix((
-                (0.0, 1.0 * FlipY, 0.0),
-                (1.0 * FlipX, 0.0, 0.0),
-                (0.0, 0.0, 1.0 * FlipZ)
-            ))
-        case "yzx":
-            BasisMatrix = Matrix((
-                (0.0, 1.0 * FlipY, 0.0),
-                (0.0, 0.0, 1.0 * FlipZ),
-                (1.0 * FlipX, 0.0, 0.0)
-            ))
-        case "zxy":
-            BasisMatrix = Matrix((
-                (0.0, 0.0, 1.0 * FlipZ),
-                (1.0 * FlipX, 0.0, 0.0),
-                (0.0, 1.0 * FlipY, 0.0)
-            ))
-        case "zyx":
-            BasisMatrix = Matrix((
-                (0.0, 0.0, 1.0 * FlipZ),
-                (0.0, 1.0 * FlipY, 0.0),
-                (1.0 * FlipX, 0.0, 0.0)
-            ))
+    Flips = np.array((
+        -1.0 if properties.FlipX else 1.0,
+        -1.0 if properties.FlipY else 1.0,
+        -1.0 if properties.FlipZ else 1.0
+    ))
+    SwizzleOrder = ["xyz".index(Axis) for Axis in properties.CoordinateSystem]
+    BasisMatrix = np.zeros((3, 3))
+    BasisMatrix[np.arange(3), SwizzleOrder] = Flips[SwizzleOrder]
+    return BasisMatrix
 
+def ConvertQuaternion(RawQuaternion : Quaternion) -> Quaternion:
+    # Transform the quaternion based on the coordinate system given in the input
+    BasisMatrix = Matrix(GetBasisMatrix().tolist())
     ConvertedRotation = (BasisMatrix @ RawQuaternion.to_matrix() @ BasisMatrix.transposed()).to_quaternion()
 
     # Convert the quaternion from wxyz to xyzw
     NewQuaternion = Quaternion((ConvertedRotation[1], ConvertedRotation[2], ConvertedRotation[3], ConvertedRotation[0]))
     
-    return NewQuaternion
\ No newline at end of file
+    return NewQuaternion
+
+# Stack the world matrices of the evaluated objects into a single (N, 4, 4) array
+# There is no bulk accessor for evaluated transforms, so this is the only per object step of the rigid body capture
+def GetWorldMatrices(Objects : list[bpy.types.Object], DependencyGraph) -> np.ndarray:
+    Matrices = np.empty((len(Objects), 4, 4))
+    for i, Object in enumerate(Objects):
+        Matrices[i] = Object.evaluated_get(DependencyGraph).matrix_world
+    return Matrices
+
+# Split (N, 4, 4) world matrices into (N, 3) translations, (N, 3) scales and (N, 3, 3) rotation matrices
+def DecomposeMatrices(Matrices : np.ndarray):
+    Translations = Matrices[:, :3, 3].copy()
+    Scales = np.linalg.norm(Matrices[:, :3, :3], axis = 1)
+    Rotations = Matrices[:, :3, :3] / np.maximum(Scales, 1e-12)[:, None, :]
+    return Translations, Scales, Rotations
+
+# Convert (N, 3, 3) rotation matrices to (N, 4) wxyz quaternions with a non-negative w
+# Every matrix uses the branch of its largest quaternion component, which keeps the conversion stable near 180 degrees
+def MatricesToQuaternions(Rotations : np.ndarray) -> np.ndarray:
+    m = Rotations
+    Trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    Branch = np.argmax(np.stack((Trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis = 1), axis = 1)
+    Quaternions = np.empty((len(m), 4))
+
+    # Largest component is w
+    Mask = Branch == 0
+    S = np.sqrt(np.maximum(1.0 + Trace[Mask], 1e-12)) * 2.0
+    Quaternions[Mask] = np.stack((0.25 * S, (m[Mask, 2, 1] - m[Mask, 1, 2]) / S, (m[Mask, 0, 2] - m[Mask, 2, 0]) / S, (m[Mask, 1, 0] - m[Mask, 0, 1]) / S), axis = 1)
+    # Largest component is x
+    Mask = Branch == 1
+    S = np.sqrt(np.maximum(1.0 + m[Mask, 0, 0] - m[Mask, 1, 1] - m[Mask, 2, 2], 1e-12)) * 2.0
+    Quaternions[Mask] = np.stack(((m[Mask, 2, 1] - m[Mask, 1, 2]) / S, 0.25 * S, (m[Mask, 0, 1] + m[Mask, 1, 0]) / S, (m[Mask, 0, 2] + m[Mask, 2, 0]) / S), axis = 1)
+    # Largest component is y
+    Mask = Branch == 2
+    S = np.sqrt(np.maximum(1.0 + m[Mask, 1, 1] - m[Mask, 0, 0] - m[Mask, 2, 2], 1e-12)) * 2.0
+    Quaternions[Mask] = np.stack(((m[Mask, 0, 2] - m[Mask, 2, 0]) / S, (m[Mask, 0, 1] + m[Mask, 1, 0]) / S, 0.25 * S, (m[Mask, 1, 2] + m[Mask, 2, 1]) / S), axis = 1)
+    # Largest component is z
+    Mask = Branch == 3
+    S = np.sqrt(np.maximum(1.0 + m[Mask, 2, 2] - m[Mask, 0, 0] - m[Mask, 1, 1], 1e-12)) * 2.0
+    Quaternions[Mask] = np.stack(((m[Mask, 1, 0] - m[Mask, 0, 1]) / S, (m[Mask, 0, 2] + m[Mask, 2, 0]) / S, (m[Mask, 1, 2] + m[Mask, 2, 1]) / S, 0.25 * S), axis = 1)
+
+    Quaternions /= np.linalg.norm(Quaternions, axis = 1, keepdims = True)
+    Quaternions[Quaternions[:, 0] < 0.0] *= -1.0
+    return Quaternions
+
+# Convert (N, 4) wxyz quaternions to (N, 3, 3) rotation matrices, the quaternions don't need to be normalized
+def QuaternionsToMatrices(Quaternions : np.ndarray) -> np.ndarray:
+    q = Quaternions / np.maximum(np.linalg.norm(Quaternions, axis = 1, keepdims = True), 1e-12)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    Rotations = np.empty((len(q), 3, 3))
+    Rotations[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    Rotations[:, 0, 1] = 2.0 * (x * y - w * z)
+    Rotations[:, 0, 2] = 2.0 * (x * z + w * y)
+    Rotations[:, 1, 0] = 2.0 * (x * y + w * z)
+    Rotations[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    Rotations[:, 1, 2] = 2.0 * (y * z - w * x)
+    Rotations[:, 2, 0] = 2.0 * (x * z - w * y)
+    Rotations[:, 2, 1] = 2.0 * (y * z + w * x)
+    Rotations[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return Rotations
+
+# Convert (N, 3) euler angles to (N, 3, 3) rotation matrices, using Blender's rotation modes ("XYZ" rotates around X first)
+def EulersToMatrices(Angles : np.ndarray, Order : str) -> np.ndarray:
+    Rotations = np.broadcast_to(np.eye(3), (len(Angles), 3, 3)).copy()
+    for Axis in Order:
+        i = "XYZ".index(Axis)
+        j, k = (i + 1) % 3, (i + 2) % 3
+        Cos, Sin = np.cos(Angles[:, i]), np.sin(Angles[:, i])
+        AxisRotations = np.zeros((len(Angles), 3, 3))
+        AxisRotations[:, i, i] = 1.0
+        AxisRotations[:, j, j] = Cos
+        AxisRotations[:, j, k] = -Sin
+        AxisRotations[:, k, j] = Sin
+        AxisRotations[:, k, k] = Cos
+        Rotations = AxisRotations @ Rotations
+    return Rotations
+
+# Compose (N, 4, 4) matrices from (N, 3) translations, (N, 3, 3) rotations and (N, 3) scales, in the same way as Matrix.LocRotScale
+def ComposeMatrices(Translations : np.ndarray, Rotations : np.ndarray, Scales : np.ndarray) -> np.ndarray:
+    Matrices = np.zeros((len(Translations), 4, 4))
+    Matrices[:, :3, :3] = Rotations * Scales[:, None, :]
+    Matrices[:, :3, 3] = Translations
+    Matrices[:, 3, 3] = 1.0
+    return Matrices
+
+# Batched version of ConvertQuaternion for the rotations relative to the rest pose
+# Rotations and InverseRestRotations are (N, 3, 3), returns (N, 4) quaternions in xyzw order in the target coordinate system
+def ConvertRelativeRotations(Rotations : np.ndarray, InverseRestRotations : np.ndarray, BasisMatrix : np.ndarray) -> np.ndarray:
+    ConvertedRotations = BasisMatrix @ Rotations @ InverseRestRotations @ BasisMatrix.T
+    Quaternions = MatricesToQuaternions(ConvertedRotations)
+    return Quaternions[:, [1, 2, 3, 0]].astype(np.float32)
+
+# Read the local bounding box corners of the objects into a single (N, 8, 3) array
+def GetLocalCorners(Objects : list[bpy.types.Object]) -> np.ndarray:
+    LocalCorners = np.empty((len(Objects), 8, 3))
+    for i, Object in enumerate(Objects):
+        LocalCorners[i] = Object.bound_box
+    return LocalCorners
+
+# Transform (N, 8, 3) local corners with (N, 4, 4) world matrices to the target coordinate system in one go
+# Returns the (N, 3) min and max of the axis aligned bounding box of every object
+def GetObjectBounds(Matrices : np.ndarray, LocalCorners : np.ndarray):
+    WorldCorners = np.einsum("nij,nkj->nki", Matrices[:, :3, :3], LocalCorners) + Matrices[:, None, :3, 3]
+    ConvertedCorners = ConvertCoordinates(WorldCorners)
+    return ConvertedCorners.min(axis = 1), ConvertedCorners.max(axis = 1)
+
@@ -2,14 +2,16 @@ from . import (
     RenderSoftBody,
     VATFunctions,
     RenderRigidBody,
-    RenderDynamic
+    RenderDynamic,
+    PlanExport
 )
 from importlib import reload
 
-from . import VATFunctions
+from . import GLBWriter, VATFunctions
+reload(GLBWriter)
 reload(VATFunctions)
 
-modules = [RenderSoftBody, RenderRigidBody, RenderDynamic]
+modules = [RenderSoftBody, RenderRigidBody, RenderDynamic, PlanExport]
 
 def register():
     for module in modules:
@@ -22,6 +22,9 @@ class VATEXPORTER_PT_ExportSettings(Panel):
         row.label(text = "Output directory")
         row.prop(properties, "OutputDirectory", text = "")
 
+        row = layout.row()
+        row.prop(properties, "StreamTextures", text = "Stream textures to disk")
+
         # Section on the mesh name
         box = layout.box()
         row = box.row()
@@ -31,6 +34,16 @@ class VATEXPORTER_PT_ExportSettings(Panel):
             row.enabled = False
         row.label(text = "Output mesh name")
         row.prop(properties, "FileMeshName", text = "")
+        row = box.row()
+        if(not properties.FileMeshEnabled):
+            row.enabled = False
+        row.label(text = "Mesh format")
+        row.prop(properties, "MeshFileFormat", text = "")
+        if(properties.MeshFileFormat == "GLB"):
+            row = box.row()
+            if(not properties.FileMeshEnabled):
+                row.enabled = False
+            row.prop(properties, "QuantizeMeshFile", text = "Quantize mesh")
 
         # Section on the JSON data
         box = layout.box()
@@ -62,7 +75,11 @@ class VATEXPORTER_PT_ExportSettings(Panel):
         row.prop(properties, "FileRotationTextureEnabled", text = "File rotation texture")
         row1 = box.row()
         row2 = box.row()
-        if(not properties.FileRotationTextureEnabled):
+        # Packed normals are stored in the position texture, unless eigen shapes force unsigned RGB normals
+        bIsCompressed = properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"
+        if(properties.VATType != "RIGIDBODY" and properties.NormalEncoding == "PACKED" and not bIsCompressed):
+            row.enabled = False
+        if(not row.enabled or not properties.FileRotationTextureEnabled):
             row1.enabled = False
             row2.enabled = False
         row1.label(text = "Rotation texture name")
@@ -81,6 +98,28 @@ class VATEXPORTER_PT_ExportSettings(Panel):
             row.label(text = "Data texture name")
             row.prop(properties, "FileDataTexture", text = "")
 
+        # Section for the page table texture
+        if(properties.VATType == "FLUID" and properties.PagedTransformTexture):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FilePageTableTextureEnabled", text = "Page table texture")
+            row = box.row()
+            if(not properties.FilePageTableTextureEnabled):
+                row.enabled = False
+            row.label(text = "Page table texture name")
+            row.prop(properties, "FilePageTableTexture", text = "")
+
+        # Section for the frame row texture
+        if(properties.VATType == "FLUID" and properties.VariableFrameRows):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FileFrameRowTextureEnabled", text = "Frame row texture")
+            row = box.row()
+            if(not properties.FileFrameRowTextureEnabled):
+                row.enabled = False
+            row.label(text = "Frame row texture name")
+            row.prop(properties, "FileFrameRowTexture", text = "")
+
         # Section for the scale texture
         if(properties.VATType == "RIGIDBODY"):
             box = layout.box()
@@ -100,6 +139,50 @@ class VATEXPORTER_PT_ExportSettings(Panel):
             row2.label(text = "Format")
             row2.prop(properties, "FileScaleTextureFormat", text = "")
 
+        # Section for the AABB texture
+        if(properties.VATType == "RIGIDBODY"):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FileAABBTextureEnabled", text = "AABB texture")
+            row = box.row()
+            if(not properties.FileAABBTextureEnabled):
+                row.enabled = False
+            row.label(text = "AABB texture name")
+            row.prop(properties, "FileAABBTexture", text = "")
+
+        # Section for the bounds texture
+        if(properties.VATType != "FLUID" and properties.QuantizationBounds != "GLOBAL" and not bIsCompressed):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FileBoundsTextureEnabled", text = "Bounds texture")
+            row = box.row()
+            if(not properties.FileBoundsTextureEnabled):
+                row.enabled = False
+            row.label(text = "Bounds texture name")
+            row.prop(properties, "FileBoundsTexture", text = "")
+
+        # Section for the weight texture
+        if(properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FileWeightTextureEnabled", text = "Weight texture")
+            row = box.row()
+            if(not properties.FileWeightTextureEnabled):
+                row.enabled = False
+            row.label(text = "Weight texture name")
+            row.prop(properties, "FileWeightTexture", text = "")
+
+        # Section for the frame time texture
+        if(properties.VATType != "FLUID" and properties.FrameSampling == "ADAPTIVE"):
+            box = layout.box()
+            row = box.row()
+            row.prop(properties, "FileFrameTimeTextureEnabled", text = "Frame time texture")
+            row = box.row()
+            if(not properties.FileFrameTimeTextureEnabled):
+                row.enabled = False
+            row.label(text = "Frame time texture name")
+            row.prop(properties, "FileFrameTimeTexture", text = "")
+
 modules = [VATEXPORTER_PT_ExportSettings]
 
 # Register class
@@ -23,6 +23,9 @@ class VATEXPORTER_PT_MainSettings(Panel):
         column = split.column()
         column.label(text = "Frame start")
         column.label(text = "Frame end")
+        column.label(text = "Frame sampling")
+        if(properties.FrameSampling == "ADAPTIVE"):
+            column.label(text = "Tolerance")
         column.label(text = "Frame spacing")
         column.label(text = "VAT type")
         
@@ -30,8 +33,17 @@ class VATEXPORTER_PT_MainSettings(Panel):
         column = split.column()
         column.prop(scene, "frame_start", text = "")
         column.prop(scene, "frame_end", text = "")
-        column.prop(properties, "FrameSpacing", text = "")
+        column.prop(properties, "FrameSampling", text = "")
+        if(properties.FrameSampling == "ADAPTIVE"):
+            column.prop(properties, "AdaptiveTolerance", text = "")
+        row = column.row()
+        row.enabled = properties.FrameSampling != "ADAPTIVE" or properties.VATType == "FLUID"
+        row.prop(properties, "FrameSpacing", text = "")
         column.prop(properties, "VATType", text = "")
+        if(properties.VATType == "RIGIDBODY"):
+            column.prop(properties, "UseFCurveFastPath", text = "Evaluate keyframes directly")
+        if(properties.VATType == "FLUID"):
+            column.prop(properties, "ReadFluidCacheDirectly", text = "Read fluid cache directly")
 
 modules = [VATEXPORTER_PT_MainSettings]
 
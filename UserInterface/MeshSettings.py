@@ -23,12 +23,31 @@ class VATEXPORTER_PG_LODSettings(PropertyGroup):
         precision = 4
     )
 
+    # Results of the last export
+    TriangleCount : IntProperty(
+        name = "Triangle count",
+        description = "The number of triangles of this LOD in the last export",
+        default = 0
+    )
+    ExportTime : FloatProperty(
+        name = "Export time",
+        description = "The time it took to decimate and write this LOD in the last export, in seconds",
+        default = 0.0
+    )
+    FileSize : FloatProperty(
+        name = "File size",
+        description = "The size of the file of this LOD in the last export, in megabytes",
+        default = 0.0
+    )
+
 # Widget for each individual LOD item
 class VATEXPORTER_UL_LODWidget(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         row = layout.row()
         row.label(text = item.DisplayName, icon = "MESH_DATA")
         row.label(text = f"{item.ReductionRate}%")
+        if(item.TriangleCount > 0):
+            row.label(text = f"{item.TriangleCount} tris")
 
 # Widget that draws the combined LOD menu
 class VATEXPORTER_PT_LODs(Panel):
@@ -62,6 +81,9 @@ class VATEXPORTER_PT_LODs(Panel):
         if(properties.VATType == "SOFTBODY" or properties.VATType == "FLUID"):
             row = layout.row()
             row.prop(properties, "SplitVertices", text = "Split at hard edges")
+        if(properties.VATType == "RIGIDBODY"):
+            row = layout.row()
+            row.prop(properties, "ShareInstancedMeshes", text = "Share instanced meshes")
 
         # LODs box
         if(properties.VATType != "FLUID" and properties.VATType != "PARTICLE"):
@@ -85,6 +107,21 @@ class VATEXPORTER_PT_LODs(Panel):
                 row.label(text = "Reduction rate")
                 row.prop(LOD, "ReductionRate", text = "")
 
+                # Results of the last export
+                if(LOD.TriangleCount > 0):
+                    box = layout.box()
+                    box.label(text = f"Triangles: {LOD.TriangleCount}")
+                    box.label(text = f"Time: {LOD.ExportTime:.2f} s")
+                    box.label(text = f"File size: {LOD.FileSize:.2f} MB")
+
+            # Parallel export
+            row = layout.row()
+            row.prop(properties, "ParallelLODs", text = "Export LODs in parallel")
+            if(properties.ParallelLODs):
+                row = layout.row()
+                row.label(text = "Workers")
+                row.prop(properties, "LODWorkerCount", text = "")
+
 # Button to add a new item to the LOD list
 class VATEXPORTER_OT_AddLOD(Operator):
     bl_idname = "vatexporter.addlod"
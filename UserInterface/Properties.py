@@ -14,6 +14,24 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         soft_max = 10,
         default = 1
     )
+    FrameSampling : EnumProperty(
+        name = "Frame sampling",
+        description = "How to pick the frames that end up in the VAT",
+        items = [
+            ("UNIFORM", "Uniform", "Sample every x amount of frames, based on the frame spacing"),
+            ("ADAPTIVE", "Adaptive", "Capture every frame, then drop the frames that can be reconstructed by interpolating their neighbours. Not available for fluids")
+        ],
+        default = "UNIFORM"
+    )
+    AdaptiveTolerance : FloatProperty(
+        name = "Adaptive tolerance",
+        description = "The maximum positional error allowed when dropping a frame with adaptive sampling",
+        min = 0.0,
+        soft_max = 0.1,
+        default = 0.001,
+        precision = 4,
+        subtype = "DISTANCE"
+    )
     VATType : EnumProperty(
         name = "",
         description = "The type of VAT to choose",
@@ -24,11 +42,26 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         ],
         default = "SOFTBODY"
     )
+    UseFCurveFastPath : BoolProperty(
+        name = "Evaluate keyframes directly",
+        description = "Rigid body only. Evaluate the F-curves of pieces that are only animated by their own transform keyframes, instead of stepping the scene for every frame",
+        default = True
+    )
+    ReadFluidCacheDirectly : BoolProperty(
+        name = "Read fluid cache directly",
+        description = "Fluid only. Decode the mesh files of baked liquid domains in parallel, instead of evaluating the scene for every frame",
+        default = True
+    )
     SplitVertices : BoolProperty(
         name = "Split Vertices",
         description = "Split vertices at the hard edges to preserve their normals. This results in overlapping vertices, but allows you to preserve hard edges.",
         default = True
     )
+    ShareInstancedMeshes : BoolProperty(
+        name = "Share instanced meshes",
+        description = "Rigid body only. Export every unique mesh (objects sharing mesh data and modifiers) once, with an instance table that places the pieces",
+        default = False
+    )
     OutputDirectory : StringProperty(
         name = "Output directory",
         description = "The target directory to store the meshes in",
@@ -52,6 +85,12 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         soft_max = 256
     )
 
+    StreamTextures : BoolProperty(
+        name = "Stream textures to disk",
+        description = "Stage the VAT textures in memory-mapped files and write them to disk in blocks. This keeps memory usage low for very large textures, at the cost of some disk access",
+        default = False
+    )
+
     # Maximum export resolutions
     ExportResolutionU : IntProperty(
         name = "Max size U",
@@ -71,6 +110,96 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         soft_max = 4096,
         default = 4096
     )
+    PagedTransformTexture : BoolProperty(
+        name = "Paged transform textures",
+        description = "Fluid only. Split the position and normal textures into pages of a fixed height, with a table that points every frame to its page. Keeps the UVs in the data texture precise for long simulations",
+        default = False
+    )
+    TransformPageHeight : IntProperty(
+        name = "Page height",
+        description = "The height of a position and normal texture page, at most 1024 so the half float UVs can address every row. Pages grow to fit the largest frame",
+        min = 1,
+        max = 1024,
+        default = 1024
+    )
+    VariableFrameRows : BoolProperty(
+        name = "Tight frame rows",
+        description = "Fluid only. Give every frame of the data texture only the rows its triangles need instead of the rows of the frame with the most triangles, with a table that points every frame to its first row",
+        default = False
+    )
+    # Soft body compression settings
+    SoftBodyCompression : EnumProperty(
+        name = "Compression",
+        description = "How to store the soft body animation",
+        items = [
+            ("NONE", "None", "Store the offset of every vertex for every frame"),
+            ("PCA", "Eigen shapes", "Store a small set of basis shapes and a weight per shape per frame. Greatly reduces texture size for long animations")
+        ],
+        default = "NONE"
+    )
+    CompressionErrorBudget : FloatProperty(
+        name = "Error budget",
+        description = "The maximum distance a reconstructed vertex may be off from the simulation. The number of eigen shapes is picked based on this",
+        min = 0.0,
+        soft_max = 0.1,
+        default = 0.001,
+        precision = 4,
+        subtype = "DISTANCE"
+    )
+    MaxEigenShapeCount : IntProperty(
+        name = "Max eigen shapes",
+        description = "The maximum number of eigen shapes, regardless of the error budget",
+        min = 1,
+        soft_max = 256,
+        default = 64
+    )
+
+    # Normal encoding settings
+    NormalEncoding : EnumProperty(
+        name = "Normal encoding",
+        description = "How the vertex normals are stored. Only applies to soft body and fluid simulations",
+        items = [
+            ("RGB", "RGB", "Store the normal as three unsigned channels in the rotation texture"),
+            ("OCTAHEDRAL", "Octahedral", "Store the octahedral encoded normal in a two channel (red and green) rotation texture"),
+            ("PACKED", "Packed in position", "Pack the octahedral encoded normal in the alpha channel of the position texture (6 and 5 bits per component), which keeps its format. No rotation texture is needed")
+        ],
+        default = "RGB"
+    )
+
+    # Quantization bounds settings
+    QuantizationBounds : EnumProperty(
+        name = "Quantization bounds",
+        description = "Which bounds the positions are normalized with before they are written to the position texture",
+        items = [
+            ("GLOBAL", "Global", "Use a single bounds for all vertices or pieces"),
+            ("OBJECT", "Per object", "Every object gets its own bounds"),
+            ("ROW", "Per texture row", "Every block of texture rows gets its own bounds"),
+            ("KMEANS", "Clustered", "Group vertices or pieces that move in a similar range with k-means, every cluster gets its own bounds")
+        ],
+        default = "GLOBAL"
+    )
+    ClusterCount : IntProperty(
+        name = "Cluster count",
+        description = "The maximum number of k-means clusters",
+        min = 1,
+        soft_max = 256,
+        default = 16
+    )
+    CompactStaticElements : BoolProperty(
+        name = "Compact static elements",
+        description = "Not available for fluids. Leave the vertices or pieces that never leave their rest pose out of the textures, they get a (-1, -1) pixel UV instead",
+        default = False
+    )
+    StaticTolerance : FloatProperty(
+        name = "Static tolerance",
+        description = "The maximum distance an element can move over the whole range and still count as static",
+        min = 0.0,
+        soft_max = 0.1,
+        default = 0.0001,
+        precision = 4,
+        subtype = "DISTANCE"
+    )
+
     # Settings for export coordinate system
     CoordinateSystem : EnumProperty(
         name = "Coordinate system",
@@ -112,6 +241,32 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         description = "Whether to export a VAT mesh",
         default = True
     )
+    MeshFileFormat : EnumProperty(
+        name = "Mesh file format",
+        description = "The file format of the VAT mesh",
+        items = [
+            ("FBX", "FBX", "Export the VAT mesh with Blender's FBX exporter"),
+            ("GLB", "GLB", "Write the positions, normals, triangles and UV channels of the VAT mesh straight to a binary glTF file. Much faster for large meshes, but doesn't export materials")
+        ],
+        default = "FBX"
+    )
+    ParallelLODs : BoolProperty(
+        name = "Parallel LODs",
+        description = "Decimate and export every LOD in its own background Blender process. LODs that fail in the background are exported in this Blender instance",
+        default = False
+    )
+    LODWorkerCount : IntProperty(
+        name = "Workers",
+        description = "The maximum number of background Blender processes that export LODs at the same time",
+        min = 1,
+        soft_max = 16,
+        default = 4
+    )
+    QuantizeMeshFile : BoolProperty(
+        name = "Quantize mesh",
+        description = "GLB only. Store normals as 8 bit and UVs within the 0-1 range as 16 bit values (KHR_mesh_quantization). Positions stay 32 bit floats, so the mesh keeps its object space",
+        default = False
+    )
 
     # Position texture settings
     FilePositionTexture : StringProperty(
@@ -170,6 +325,84 @@ class VATEXPORTER_PG_Properties(PropertyGroup):
         default = True
     )
 
+    # Page table texture settings (paged transform textures)
+    FilePageTableTexture : StringProperty(
+        name = "File page table texture name",
+        description = "The target file name for the texture that maps every frame to its page of the position and normal textures",
+        default = "T_Simulation_VATPT",
+        subtype = "FILE_NAME"
+    )
+    FilePageTableTextureEnabled : BoolProperty(
+        name = "Page table texture enabled",
+        description = "Whether to export the page table texture when using paged transform textures. The page table is always stored in the JSON file",
+        default = True
+    )
+
+    # Frame row texture settings (tight frame rows)
+    FileFrameRowTexture : StringProperty(
+        name = "File frame row texture name",
+        description = "The target file name for the texture that maps every frame to its first row of the data texture",
+        default = "T_Simulation_VATC",
+        subtype = "FILE_NAME"
+    )
+    FileFrameRowTextureEnabled : BoolProperty(
+        name = "Frame row texture enabled",
+        description = "Whether to export the frame row texture when using tight frame rows. The frame rows are always stored in the JSON file",
+        default = True
+    )
+
+    # Frame time texture settings (adaptive sampling)
+    FileFrameTimeTexture : StringProperty(
+        name = "File frame time texture name",
+        description = "The target file name for the texture that maps the texture rows to the simulation frames",
+        default = "T_Simulation_VATT",
+        subtype = "FILE_NAME"
+    )
+    FileFrameTimeTextureEnabled : BoolProperty(
+        name = "Frame time texture enabled",
+        description = "Whether to export the frame time texture when using adaptive sampling. The frame times are always stored in the JSON file",
+        default = False
+    )
+
+    # Bounds texture settings (cluster quantization)
+    FileBoundsTexture : StringProperty(
+        name = "File bounds texture name",
+        description = "The target file name for the texture containing the min and extent of every quantization cluster",
+        default = "T_Simulation_VATB",
+        subtype = "FILE_NAME"
+    )
+    FileBoundsTextureEnabled : BoolProperty(
+        name = "Bounds texture enabled",
+        description = "Whether to export the quantization bounds texture",
+        default = True
+    )
+
+    # AABB texture settings (rigid body)
+    FileAABBTexture : StringProperty(
+        name = "File AABB texture name",
+        description = "The target file name for the texture containing the bounding box of every piece for every frame",
+        default = "T_Simulation_VATA",
+        subtype = "FILE_NAME"
+    )
+    FileAABBTextureEnabled : BoolProperty(
+        name = "AABB texture enabled",
+        description = "Whether to export the per frame bounding box of every piece, which can be used for culling",
+        default = False
+    )
+
+    # Weight texture settings (eigen shape compression)
+    FileWeightTexture : StringProperty(
+        name = "File weight texture name",
+        description = "The target file name for the texture containing the eigen shape weights per frame",
+        default = "T_Simulation_VATW",
+        subtype = "FILE_NAME"
+    )
+    FileWeightTextureEnabled : BoolProperty(
+        name = "Weight texture enabled",
+        description = "Whether to export the eigen shape weight texture",
+        default = True
+    )
+
     # JSON settings
     FileJSONData : StringProperty(
         name = "JSON data file name",
@@ -41,14 +41,76 @@ class VATEXPORTER_PT_TextureSettings(Panel):
         row.prop(properties, "FlipZ", text = "Z")
         column.prop(properties, "ExportResolutionU", text = "")
         
+        # Compression settings
+        if(properties.VATType == "SOFTBODY"):
+            row = layout.row()
+            split = row.split(factor = 0.4)
+            column = split.column()
+            column.label(text = "Compression")
+            if(properties.SoftBodyCompression == "PCA"):
+                column.label(text = "Error budget")
+                column.label(text = "Max shapes")
+            column = split.column()
+            column.prop(properties, "SoftBodyCompression", text = "")
+            if(properties.SoftBodyCompression == "PCA"):
+                column.prop(properties, "CompressionErrorBudget", text = "")
+                column.prop(properties, "MaxEigenShapeCount", text = "")
+
+        # Quantization bounds settings
+        if(properties.VATType != "FLUID"):
+            row = layout.row()
+            if(properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"):
+                row.enabled = False
+            split = row.split(factor = 0.4)
+            column = split.column()
+            column.label(text = "Bounds")
+            if(properties.QuantizationBounds == "KMEANS"):
+                column.label(text = "Clusters")
+            column = split.column()
+            column.prop(properties, "QuantizationBounds", text = "")
+            if(properties.QuantizationBounds == "KMEANS"):
+                column.prop(properties, "ClusterCount", text = "")
+
+        # Static element settings
+        if(properties.VATType != "FLUID"):
+            row = layout.row()
+            split = row.split(factor = 0.4)
+            column = split.column()
+            column.label(text = "Static")
+            if(properties.CompactStaticElements):
+                column.label(text = "Tolerance")
+            column = split.column()
+            column.prop(properties, "CompactStaticElements", text = "Compact")
+            if(properties.CompactStaticElements):
+                column.prop(properties, "StaticTolerance", text = "")
+
+        # Normal encoding settings
+        if(properties.VATType != "RIGIDBODY"):
+            row = layout.row()
+            if(properties.VATType == "SOFTBODY" and properties.SoftBodyCompression == "PCA"):
+                row.enabled = False
+            split = row.split(factor = 0.4)
+            column = split.column()
+            column.label(text = "Normals")
+            column = split.column()
+            column.prop(properties, "NormalEncoding", text = "")
+
         # Advanced settings
         if(properties.VATType == "FLUID"):
             row = layout.row()
             split = row.split(factor = 0.4)
             column = split.column()
             column.label(text = "Max U (Data)")
+            column.label(text = "Pages")
+            if(properties.PagedTransformTexture):
+                column.label(text = "Page height")
+            column.label(text = "Frame rows")
             column = split.column()
             column.prop(properties, "DataTextureResolutionU", text = "")
+            column.prop(properties, "PagedTransformTexture", text = "Paged")
+            if(properties.PagedTransformTexture):
+                column.prop(properties, "TransformPageHeight", text = "")
+            column.prop(properties, "VariableFrameRows", text = "Tight")
 
 # Register class
 def register():
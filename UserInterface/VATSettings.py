@@ -30,6 +30,7 @@ class VATEXPORTER_PT_ExportSection(Panel):
         properties = scene.VATExporter_RegularProperties
 
         # A different button for every editor mode
+        layout.operator("vatexporter.plan", text = "Plan export")
         if(properties.VATType == "SOFTBODY"): # Softbody
             layout.operator("vatexporter.rendersoftbody", text = "Export")
         elif(properties.VATType == "RIGIDBODY"): # Rigidbody